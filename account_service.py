@@ -3,11 +3,14 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
 from werkzeug.exceptions import NotFound, Forbidden
 
 from app import db
-from app.models import Account, Transaction, User
-from app.utils.validators import validate_amount
+from app.models import Account, User
+from app.services.summary import mark_summaries_stale
+from app.services.transaction_service import TransactionService
+from app.utils.ids import uuid7
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +28,9 @@ class AccountService:
             SQLAlchemyError: If database operation fails
         """
         try:
-            return Account.query.filter_by(user_id=user_id).all()
+            # Shards are only non-empty for hot accounts, but loading them up
+            # front keeps the balance column from issuing a query per row
+            return Account.query.options(selectinload(Account.shards)).filter_by(user_id=user_id).all()
         except SQLAlchemyError as e:
             logger.error(f"Failed to fetch accounts for user {user_id}: {str(e)}")
             raise
@@ -43,7 +48,9 @@ class AccountService:
             NotFound: If account doesn't exist
             Forbidden: If user doesn't own the account 
         """
-        account = Account.query.get(account_id)
+        account = Account.query.options(
+            selectinload(Account.cards), selectinload(Account.shards)
+        ).filter_by(account_id=account_id).first()
         
         if not account:
             raise NotFound(description='Account not found')
@@ -62,7 +69,7 @@ class AccountService:
             user_id: UUID of the requesting user
             account_id: UUID of the account
         Returns:
-            Decimal: Account balance
+            int: Account balance in cents
         Raises:
             NotFound: If account doesn't exist
             Forbidden: If user doesn't own the account
@@ -76,7 +83,7 @@ class AccountService:
             if str(account.user_id) != str(user_id):
                 raise Forbidden(description='Unauthorized access to account')
 
-            return account.balance
+            return account.total_balance_cents
 
         except SQLAlchemyError as e:
             logger.error(f"Failed to fetch balance for account {account_id}: {str(e)}")
@@ -99,17 +106,18 @@ class AccountService:
             if not user:
                 raise NotFound(description='User not found')
             
-            # Generate virtual account number
+            # Generate virtual account number; uuid4 digits, as a uuid7's lead with the clock
             account_number = f"SA{str(uuid.uuid4().int)[:10]}"
 
             account = Account(
-                account_id=uuid.uuid4(),
+                account_id=uuid7(),
                 user_id=user_id,
                 account_number=account_number,
                 created_at=datetime.utcnow()
             )
 
             db.session.add(account)
+            mark_summaries_stale(user_id)
             db.session.commit()
 
             logger.info(f"Created new account {account.account_id} for user {user_id}")
@@ -121,57 +129,23 @@ class AccountService:
             raise
 
     @staticmethod
-    def transfer_funds(source_account_id, target_account_id, amount, reference=""):
+    def transfer_funds(user_id, source_account_id, target_account_id, amount, reference=""):
         """
-        Transfer funds between accounts
+        Transfer funds between accounts; the same locked, journaled and
+        fraud-checked path as TransactionService.transfer_funds
         Args:
+            user_id: UUID of requesting user, who must own the source account
             source_account_id: UUID of source account
             target_account_id: UUID of target account
-            amount: Decimal amount to transfer
+            amount: Integer amount to transfer, in cents
             reference: Optional transfer reference
         Returns:
             Transaction: The created transaction record
         Raises:
+            Forbidden: If user doesn't own source account
+            NotFound: If accounts don't exist
             ValueError: If transfer is invalid
-            SQLAlchemyError: If database operation fails
         """
-        try:
-            # Validate amount
-            amount = validate_amount(amount)
-
-            source = Account.query.get(source_account_id)
-            target = Account.query.get(target_account_id)
-
-            if not source or not target:
-                raise NotFound(description="One or both accounts not found")
-
-            if source.balance < amount:
-                raise ValueError("Insufficient funds")
-
-            # Perform transfer
-            source.balance -= amount
-            target.balance += amount
-
-            # Create transaction record
-            transaction = Transaction(
-                transaction_id=uuid.uuid4(),
-                from_account_id=source_account_id,
-                to_account_id=target_account_id,
-                amount=amount,
-                transaction_type='transfer',
-                reference=reference,
-                status='completed',
-                created_at=datetime.utcnow(),
-                completed_at=datetime.utcnow()
-            )
-
-            db.session.add(transaction)
-            db.session.commit()
-
-            logger.info(f"Transferred {amount} from {source_account_id} to {target_account_id}")
-            return transaction
-
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            logger.error(f"Transfer failed between {source_account_id} and {target_account_id}: {str(e)}")
-            raise
+        return TransactionService.transfer_funds(
+            user_id, source_account_id, target_account_id, amount, reference
+        )
@@ -1,10 +1,15 @@
 import logging
 
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, session, flash
+from flask import Blueprint, current_app, request, jsonify, render_template, redirect, url_for, session, flash
 from werkzeug.exceptions import NotFound, Forbidden, BadRequest
 from flask_login import login_required, current_user
 
 from app.services.account_service import AccountService
+from app.services.activity import ActivityService
+from app.services.read_models import ReadModelService
+from app.services.summary import SummaryService
+from app.utils.idempotency import idempotent
+from app.utils.money import to_decimal, to_major
 from app.utils.validators import validate_amount, InvalidInputError
 
 accounts_bp = Blueprint('accounts', __name__)
@@ -16,32 +21,105 @@ logger = logging.getLogger(__name__)
 def dashboard():
     """Dashboard page with account overview"""
     try:
-        accounts = AccountService.get_user_accounts(current_user.user_id)
-        return render_template('dashboard.html', accounts=accounts)
+        summary = _summary_json(SummaryService.get_summary(
+            current_user.user_id, current_app.config['SUMMARY_RECENT_LIMIT']
+        ))
+        return render_template('dashboard.html', accounts=summary['accounts'], summary=summary)
     except Exception as e:
         logger.error(f"Dashboard error: {str(e)}")
         flash('Unable to load dashboard data', 'danger')
         return redirect(url_for('auth.login'))
 
 
+@accounts_bp.route('/summary', methods=['GET'])
+@login_required
+def get_summary():
+    """Accounts, total balance, recent transactions and this month's count in one call"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', current_app.config['SUMMARY_RECENT_LIMIT'])), 20))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit', 'code': 'VALIDATION_ERROR'}), 400
+
+    try:
+        summary = SummaryService.get_summary(current_user.user_id, limit)
+        return jsonify(_summary_json(summary)), 200
+    except Exception as e:
+        logger.error(f"Failed to get summary for user {current_user.user_id}: {str(e)}")
+        return jsonify({'error': 'Failed to retrieve summary', 'code': 'SERVER_ERROR'}), 500
+
+
+@accounts_bp.route('/activity', methods=['GET'])
+@login_required
+def get_activity():
+    """Per-day or per-week inflow/outflow series for the user's accounts"""
+    try:
+        days = int(request.args.get('days', 30))
+        activity = ActivityService.get_activity(
+            current_user.user_id,
+            days=days,
+            bucket=request.args.get('bucket', 'day'),
+            account_id=request.args.get('account_id')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e), 'code': 'VALIDATION_ERROR'}), 400
+    except Exception as e:
+        logger.error(f"Failed to get activity for user {current_user.user_id}: {str(e)}")
+        return jsonify({'error': 'Failed to retrieve activity', 'code': 'SERVER_ERROR'}), 500
+
+    def points(series):
+        return [{
+            'start': point['start'].isoformat(),
+            'inflow': to_major(point['inflow_cents']),
+            'outflow': to_major(point['outflow_cents']),
+            'count': point['count']
+        } for point in series]
+
+    return jsonify({
+        'bucket': activity['bucket'],
+        'start': activity['start'].isoformat(),
+        'end': activity['end'].isoformat(),
+        'accounts': {str(acc_id): points(series) for acc_id, series in activity['accounts'].items()},
+        'total': points(activity['total'])
+    }), 200
+
+
+def _summary_json(summary):
+    """Summary in the same shapes as the account and transaction list endpoints"""
+    return {
+        'accounts': [{
+            'account_id': str(acc['account_id']),
+            'account_number': acc['account_number'],
+            'balance': to_major(acc['balance_cents']),
+            'status': acc['status'],
+            'created_at': acc['created_at'].isoformat() if acc['created_at'] else None
+        } for acc in summary['accounts']],
+        'total_balance': to_major(summary['total_balance_cents']),
+        'recent_transactions': [{
+            'transaction_id': str(txn['transaction_id']),
+            'amount': to_major(txn['amount_cents']),
+            'type': txn['transaction_type'],
+            'status': txn['status'],
+            'reference': txn['reference'],
+            'timestamp': txn['created_at'].isoformat(),
+            'from_account': str(txn['from_account_id']) if txn['from_account_id'] else None,
+            'to_account': str(txn['to_account_id'])
+        } for txn in summary['recent_transactions']],
+        'recent_count': summary['recent_count']
+    }
+
+
 @accounts_bp.route('/', methods=['GET'])
 @login_required
 def get_accounts():
     """API to get all accounts for the authenticated user"""
     try:
-        accounts = AccountService.get_user_accounts(current_user.user_id)
-
-        logger.info(f"Retrieved accounts for user {current_user.user_id}")
-        
         if request.is_json or request.headers.get('Accept') == 'application/json':
-            return jsonify([{
-                'account_id': str(acc.account_id),
-                'account_number': acc.account_number,
-                'balance': float(acc.balance),
-                'status': acc.status,
-                'created_at': acc.created_at.isoformat()
-            } for acc in accounts]), 200
+            rows = ReadModelService.account_rows(current_user.user_id)
+            logger.info(f"Retrieved accounts for user {current_user.user_id}")
+            return jsonify([row.to_json() for row in rows]), 200
         else:
+            accounts = AccountService.get_user_accounts(current_user.user_id)
+            logger.info(f"Retrieved accounts for user {current_user.user_id}")
             return render_template('accounts.html', accounts=accounts)
 
     except Exception as e:
@@ -67,7 +145,7 @@ def get_account_details(account_id):
             return jsonify({
                 'account_id': str(account.account_id),
                 'account_number': account.account_number,
-                'balance': float(account.balance),
+                'balance': to_major(account.total_balance_cents),
                 'status': account.status,
                 'created_at': account.created_at.isoformat(),
                 'cards': [{
@@ -139,12 +217,12 @@ def get_balance(account_id):
         if request.is_json or request.headers.get('Accept') == 'application/json':
             return jsonify({
                 'account_id': str(account_id),
-                'balance': float(balance)
+                'balance': to_major(balance)
             }), 200
         else:
             return render_template('account_balance.html', 
                                  account_id=account_id, 
-                                 balance=balance)
+                                 balance=to_decimal(balance))
 
     except NotFound as e:
         if request.is_json or request.headers.get('Accept') == 'application/json':
@@ -169,6 +247,7 @@ def get_balance(account_id):
 
 @accounts_bp.route('/<account_id>/transfer', methods=['GET', 'POST'])
 @login_required
+@idempotent
 def transfer_funds(account_id):
     """Transfer funds from an account"""
     
@@ -200,6 +279,7 @@ def transfer_funds(account_id):
             
         # Process transfer
         transaction = AccountService.transfer_funds(
+            user_id=current_user.user_id,
             source_account_id=account_id,
             target_account_id=data['to_account'],
             amount=amount,
@@ -211,7 +291,7 @@ def transfer_funds(account_id):
         if request.is_json or request.headers.get('Accept') == 'application/json':
             return jsonify({
                 'transaction_id': str(transaction.transaction_id),
-                'amount': float(transaction.amount),
+                'amount': to_major(transaction.amount_cents),
                 'status': transaction.status,
                 'reference': transaction.reference
             }), 200
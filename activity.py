@@ -0,0 +1,201 @@
+"""
+Account activity rollups
+
+Every transaction adds its amount to an AccountActivity row per account and
+UTC day, in the same database transaction, so the activity chart reads at
+most one row per account, day and shard however many transactions there
+are. Hot accounts spread their daily row over balance_shards rows like
+their balance. Weekly series are summed from the daily rows.
+
+    python -m app.services.activity backfill   # rebuild rollups from history
+"""
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import Account, AccountActivity, Transaction
+from app.services.balance_shards import pick_shard
+
+logger = logging.getLogger(__name__)
+
+# Longest range served by the activity endpoint, in days
+MAX_ACTIVITY_DAYS = 366
+
+BUCKETS = ('day', 'week')
+
+
+def activity_deltas(from_account, to_account, amount, created_at, key):
+    """
+    Rollup increments for one movement of amount cents
+    Args:
+        from_account: Source Account, or None for deposits
+        to_account: Target Account
+        key: UUID picking the shard for hot accounts, normally the transaction id
+    Returns:
+        List[Tuple]: (account_id, day, shard, inflow_cents, outflow_cents)
+    """
+    day = created_at.date()
+    deltas = []
+    if from_account is not None:
+        deltas.append((from_account.account_id, day, _shard(from_account, key), 0, amount))
+    deltas.append((to_account.account_id, day, _shard(to_account, key), amount, 0))
+    return deltas
+
+
+def _shard(account, key):
+    return pick_shard(key, account.balance_shards) if account.balance_shards else 0
+
+
+class ActivityService:
+
+    @staticmethod
+    def record(deltas):
+        """
+        Add deltas from activity_deltas() to the rollup in the caller's
+        database transaction, one upsert row per (account, day, shard)
+        """
+        if not deltas:
+            return
+        merged = {}
+        for account_id, day, shard, inflow, outflow in deltas:
+            totals = merged.setdefault((account_id, day, shard), [0, 0, 0])
+            totals[0] += inflow
+            totals[1] += outflow
+            totals[2] += 1
+
+        # Sorted so concurrent writers take the rollup row locks in the same order
+        rows = [{'account_id': account_id, 'day': day, 'shard': shard,
+                 'inflow_cents': inflow, 'outflow_cents': outflow, 'txn_count': count}
+                for (account_id, day, shard), (inflow, outflow, count) in sorted(merged.items())]
+
+        table = AccountActivity.__table__
+        dialect_insert = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+        statement = dialect_insert(table)
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.account_id, table.c.day, table.c.shard],
+                set_={
+                    'inflow_cents': table.c.inflow_cents + statement.excluded.inflow_cents,
+                    'outflow_cents': table.c.outflow_cents + statement.excluded.outflow_cents,
+                    'txn_count': table.c.txn_count + statement.excluded.txn_count,
+                }
+            ),
+            rows
+        )
+
+    @staticmethod
+    def get_activity(user_id, days=30, bucket='day', account_id=None, today=None):
+        """
+        Inflow/outflow series for a user's accounts
+        Args:
+            user_id: UUID of user
+            days: Number of days back from today, inclusive of today
+            bucket: 'day' or 'week' (weeks start on Monday)
+            account_id: Optional single account UUID
+            today: UTC date the range ends on, defaults to today
+        Returns:
+            Dict: bucket, start, end, and per-account series plus a total series, each a list of
+                {'start', 'inflow_cents', 'outflow_cents', 'count'} covering every bucket in range
+        Raises:
+            ValueError: If days or bucket is out of range
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Bucket must be one of {BUCKETS}")
+        if not 1 <= days <= MAX_ACTIVITY_DAYS:
+            raise ValueError(f"Days must be between 1 and {MAX_ACTIVITY_DAYS}")
+
+        end = today or datetime.utcnow().date()
+        start = end - timedelta(days=days - 1)
+        if bucket == 'week':
+            start -= timedelta(days=start.weekday())
+
+        accounts = select(Account.account_id).where(Account.user_id == user_id)
+        if account_id:
+            accounts = accounts.where(Account.account_id == account_id)
+
+        rows = db.session.execute(
+            select(AccountActivity.account_id, AccountActivity.day,
+                   func.sum(AccountActivity.inflow_cents), func.sum(AccountActivity.outflow_cents),
+                   func.sum(AccountActivity.txn_count))
+            .where(AccountActivity.account_id.in_(accounts.scalar_subquery()),
+                   AccountActivity.day >= start, AccountActivity.day <= end)
+            .group_by(AccountActivity.account_id, AccountActivity.day)
+        ).all()
+        account_ids = db.session.execute(accounts).scalars().all()
+
+        step = 7 if bucket == 'week' else 1
+        starts = [start + timedelta(days=offset) for offset in range(0, (end - start).days + 1, step)]
+        series = {acc_id: {bucket_start: [0, 0, 0] for bucket_start in starts} for acc_id in account_ids}
+        total = {bucket_start: [0, 0, 0] for bucket_start in starts}
+        for acc_id, day, inflow, outflow, count in rows:
+            bucket_start = day - timedelta(days=day.weekday()) if bucket == 'week' else day
+            for values in (series[acc_id][bucket_start], total[bucket_start]):
+                values[0] += int(inflow)
+                values[1] += int(outflow)
+                values[2] += int(count)
+
+        def points(buckets):
+            return [{'start': bucket_start, 'inflow_cents': inflow, 'outflow_cents': outflow, 'count': count}
+                    for bucket_start, (inflow, outflow, count) in buckets.items()]
+
+        return {
+            'bucket': bucket,
+            'start': start,
+            'end': end,
+            'accounts': {acc_id: points(buckets) for acc_id, buckets in series.items()},
+            'total': points(total),
+        }
+
+    @staticmethod
+    def backfill():
+        """
+        Rebuild every rollup row from completed transactions with one
+        INSERT ... SELECT. Run with writers stopped.
+        Returns:
+            int: Number of rollup rows written
+        """
+        completed = Transaction.status == 'completed'
+        day = func.date(Transaction.created_at)
+        legs = union_all(
+            select(Transaction.to_account_id.label('account_id'), day.label('day'),
+                   Transaction.amount_cents.label('inflow'), literal(0).label('outflow'))
+            .where(completed),
+            select(Transaction.from_account_id, day, literal(0), Transaction.amount_cents)
+            .where(completed, Transaction.from_account_id.isnot(None)),
+        ).subquery()
+
+        db.session.execute(delete(AccountActivity))
+        written = db.session.execute(
+            insert(AccountActivity.__table__).from_select(
+                ['account_id', 'day', 'shard', 'inflow_cents', 'outflow_cents', 'txn_count'],
+                select(legs.c.account_id, legs.c.day, literal(0), func.sum(legs.c.inflow),
+                       func.sum(legs.c.outflow), func.count())
+                .group_by(legs.c.account_id, legs.c.day)
+            )
+        ).rowcount
+        db.session.commit()
+
+        logger.info(f"Backfilled {written} activity rollup rows")
+        return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain account activity rollups")
+    parser.add_argument('command', choices=['backfill'])
+    parser.parse_args()
+
+    from create_app import create_app
+    app = create_app(config_class=os.getenv('FLASK_CONFIG', 'config.DevelopmentConfig'))
+
+    with app.app_context():
+        ActivityService.backfill()
+
+
+if __name__ == '__main__':
+    main()
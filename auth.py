@@ -2,6 +2,7 @@ import logging
 from datetime import datetime
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, session, flash
 from flask_login import login_user, logout_user, login_required, current_user
+from werkzeug.exceptions import TooManyRequests
 
 from app.services.auth_service import AuthService
 from app.utils.validators import validate_mobile_number, validate_pin, validate_request, validate_email, validate_cnic
@@ -65,7 +66,7 @@ def register():
             return render_template('login.html', action='register', error=e.message)
             
     except ValueError as e:
-        # This catches specific validation errors like duplicate email/mobile
+        # Other validation errors raised by the service layer
         logger.error(f"Registration error: {str(e)}")
         if request.is_json:
             return jsonify({
@@ -102,7 +103,8 @@ def login():
         # Login logic
         user = AuthService.login_user(
             mobile_number=data['mobile_number'],
-            pin=data['pin']
+            pin=data['pin'],
+            client_ip=request.remote_addr
         )
         
         # Use Flask-Login to log in the user
@@ -128,6 +130,17 @@ def login():
             flash(e.message, 'danger')
             return render_template('login.html', action='login', error=e.message)
             
+    except TooManyRequests as e:
+        logger.warning(f"Login throttled for {request.remote_addr}")
+        if request.is_json:
+            return jsonify({
+                'error': e.description,
+                'code': 'RATE_LIMITED'
+            }), 429
+        else:
+            flash(e.description, 'danger')
+            return render_template('login.html', action='login', error=e.description), 429
+            
     except ValueError as e:
         # Handle specific user-facing errors
         logger.warning(f"Login error: {str(e)}")
@@ -1,12 +1,40 @@
 from flask import current_app, session
-from werkzeug.exceptions import Forbidden, Unauthorized
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import Forbidden, TooManyRequests, Unauthorized
 from werkzeug.security import check_password_hash, generate_password_hash
 import uuid
 from datetime import datetime, timedelta
 import logging
 
 from app import db
-from app.models import User, OTP
+from app.models import User
+from app.services.login_manager import mark_users_stale
+from app.services.login_throttle import get_login_throttle
+from app.services.otp_store import EXPIRED, MISMATCH, MISSING, get_otp_store
+from app.utils.error_handlers import InvalidInputError
+from app.utils.pin_hashing import needs_rehash
+
+# Unique users columns and the error reported when a registration collides on one
+UNIQUE_USER_FIELDS = {
+    'mobile_number': "A user with this mobile number already exists",
+    'email': "A user with this email already exists",
+    'cnic_number': "A user with this CNIC number already exists",
+}
+
+
+def duplicate_user_field(error):
+    """
+    Unique users column an IntegrityError was raised for, or None. Postgres
+    reports the constraint name (users_<column>_key), SQLite "users.<column>".
+    """
+    diag = getattr(error.orig, 'diag', None)
+    message = getattr(diag, 'constraint_name', None) or str(error.orig)
+    for field in UNIQUE_USER_FIELDS:
+        if field in message:
+            return field
+    return None
+
 
 class AuthService:
     """Service class for authentication related operations"""
@@ -27,20 +55,8 @@ class AuthService:
             User: The newly created user object
             
         Raises:
-            ValueError: If mobile number, email, or CNIC already exists
+            InvalidInputError: If mobile number, email, or CNIC already exists
         """
-        # Check if user with given mobile already exists
-        if User.query.filter_by(mobile_number=mobile_number).first():
-            raise ValueError("A user with this mobile number already exists")
-            
-        # Check if user with given email already exists
-        if User.query.filter_by(email=email).first():
-            raise ValueError("A user with this email already exists")
-            
-        # Check if user with given CNIC already exists
-        if User.query.filter_by(cnic_number=cnic_number).first():
-            raise ValueError("A user with this CNIC number already exists")
-        
         # Create new user
         user = User(
             mobile_number=mobile_number,
@@ -50,21 +66,29 @@ class AuthService:
         )
         user.set_pin(pin)
         
-        # Save to database
+        # Save to database; the unique constraints catch duplicates, race-free
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            field = duplicate_user_field(e)
+            if field is None:
+                raise
+            raise InvalidInputError(UNIQUE_USER_FIELDS[field], field=field)
         
         logging.info(f"New user registered: {user.user_id}")
         return user
     
     @staticmethod
-    def login_user(mobile_number, pin):
+    def login_user(mobile_number, pin, client_ip=None):
         """
         Authenticate user with brute force protection
         
         Args:
             mobile_number (str): User's mobile number
             pin (str): User's PIN
+            client_ip (str): Address the attempt came from, throttled separately
             
         Returns:
             User: The authenticated user
@@ -72,12 +96,19 @@ class AuthService:
         Raises:
             Unauthorized: If credentials are invalid
             Forbidden: If account is locked
+            TooManyRequests: If the mobile number or IP has too many recent failures
         """
+        # Reject throttled attempts before touching the database or hashing
+        throttle = get_login_throttle()
+        if not throttle.allowed(mobile_number, client_ip):
+            raise TooManyRequests("Too many failed login attempts, try again later")
+        
         # Find user by mobile number
         user = User.query.filter_by(mobile_number=mobile_number).first()
         
         # Check if user exists
         if not user:
+            throttle.failed(mobile_number, client_ip)
             raise Unauthorized("Invalid mobile number or PIN")
             
         # Check if account is locked
@@ -86,18 +117,28 @@ class AuthService:
         
         # Verify PIN
         if not user.check_pin(pin):
-            # Increment failed attempts
-            user.failed_login_attempts += 1
+            failures = throttle.failed(mobile_number, client_ip)
             
-            # Lock account if too many failed attempts
-            if user.failed_login_attempts >= 5:
-                user.account_locked = True
+            # Only the failure that crosses the threshold writes to the users table
+            if failures >= current_app.config['LOGIN_MAX_FAILURES']:
+                db.session.execute(
+                    update(User).where(User.user_id == user.user_id)
+                    .values(account_locked=True, failed_login_attempts=failures)
+                )
+                mark_users_stale(user.user_id)
                 db.session.commit()
+                logging.warning(f"Account locked after {failures} failed logins: {user.user_id}")
                 raise Forbidden("Account has been locked due to too many failed attempts")
                 
-            db.session.commit()
             raise Unauthorized("Invalid mobile number or PIN")
         
+        throttle.succeeded(mobile_number)
+        
+        # Upgrade hashes made with older KDF settings while the PIN is at hand
+        if needs_rehash(user.pin_hash):
+            user.set_pin(pin)
+            logging.info(f"Rehashed PIN for user: {user.user_id}")
+        
         # Reset failed attempts on successful login
         user.failed_login_attempts = 0
         user.last_login = datetime.utcnow()
@@ -146,6 +187,7 @@ class AuthService:
         
         # Set new PIN
         user.set_pin(new_pin)
+        mark_users_stale(user.user_id)
         db.session.commit()
         
         logging.info(f"PIN reset for user: {user.user_id}")
@@ -172,15 +214,8 @@ class AuthService:
         # Calculate expiry time
         expiry_time = datetime.utcnow() + timedelta(minutes=expiry_minutes)
         
-        # Create OTP record
-        otp = OTP(
-            user_id=user_id,
-            otp_code=otp_code,
-            purpose=purpose,
-            expires_at=expiry_time
-        )
-        
-        db.session.add(otp)
+        # Store the OTP with the configured backend
+        get_otp_store().issue(user_id, purpose, otp_code, expiry_time)
         db.session.commit()
         
         logging.info(f"OTP generated for user: {user_id}, purpose: {purpose}")
@@ -202,31 +237,25 @@ class AuthService:
         Raises:
             Unauthorized: If OTP is invalid, expired, or used
         """
-        # Find the latest OTP for this user and purpose
-        otp = OTP.query.filter_by(
-            user_id=user_id,
-            purpose=purpose,
-            is_used=False
-        ).order_by(OTP.created_at.desc()).first()
-        
-        if not otp:
+        # Check the newest unused OTP for this user and purpose, consuming it on a match
+        result = get_otp_store().consume(user_id, purpose, otp_code)
+        
+        if result == MISSING:
             raise Unauthorized("No valid OTP found")
             
         # Check if OTP has expired
-        if datetime.utcnow() > otp.expires_at:
+        if result == EXPIRED:
             raise Unauthorized("OTP has expired")
             
         # Check if OTP matches
-        if otp.otp_code != otp_code:
+        if result == MISMATCH:
             raise Unauthorized("Invalid OTP code")
-            
-        # Mark OTP as used
-        otp.is_used = True
         
         # Mark user as verified if purpose is verification
         if purpose == "verification":
             user = User.query.get(user_id)
             user.is_verified = True
+            mark_users_stale(user_id)
             
         db.session.commit()
         
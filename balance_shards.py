@@ -0,0 +1,228 @@
+"""
+Sharded balances for hot accounts
+
+Collection accounts that take a stream of deposits are flagged with
+Account.balance_shards = N. Their deposits credit one of N BalanceShard rows,
+picked by hashing the transaction id, instead of updating the account row,
+so concurrent deposits no longer queue on a single row lock. The balance is
+balance_cents plus the shard rows; the compactor periodically folds the
+shards back into balance_cents.
+
+Lock order is always account row, then shard rows.
+
+    python -m app.services.balance_shards configure <account_id> 8
+    python -m app.services.balance_shards compact --loop
+"""
+import argparse
+import logging
+import os
+import time
+import uuid
+import zlib
+
+from flask import current_app
+from sqlalchemy import bindparam, delete, func, insert, select, update
+
+from app import db
+from app.models import Account, BalanceShard
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on shards per account
+MAX_BALANCE_SHARDS = 256
+
+# Hot accounts compacted per database transaction
+COMPACT_CHUNK_SIZE = 100
+
+
+def pick_shard(key, shards):
+    """Shard index for a credit keyed by a UUID"""
+    return zlib.crc32(key.bytes) % shards
+
+
+def shard_total(account_id):
+    """Scalar subquery summing an account's shard rows, usable inside UPDATE ... WHERE"""
+    return select(func.coalesce(func.sum(BalanceShard.balance_cents), 0)).where(
+        BalanceShard.account_id == account_id
+    ).scalar_subquery()
+
+
+class BalanceShardService:
+
+    @staticmethod
+    def credit(account_id, shards, amount, key):
+        """
+        Add amount cents to one of the account's shard rows
+        Args:
+            account_id: UUID of a hot account
+            shards: The account's balance_shards
+            amount: Integer amount in cents
+            key: UUID the shard is picked from, normally the transaction id
+        """
+        credited = db.session.execute(
+            update(BalanceShard)
+            .where(BalanceShard.account_id == account_id,
+                   BalanceShard.shard == pick_shard(key, shards))
+            .values(balance_cents=BalanceShard.balance_cents + amount)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not credited:
+            # The shard was removed by a concurrent configure(); credit the account row
+            db.session.execute(
+                update(Account)
+                .where(Account.account_id == account_id)
+                .values(balance_cents=Account.balance_cents + amount)
+                .execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    def totals(account_ids):
+        """
+        Sum of the shard rows per account
+        Returns:
+            Dict[UUID, int]: Shard total in cents, only for accounts with shard rows
+        """
+        if not account_ids:
+            return {}
+        rows = db.session.execute(
+            select(BalanceShard.account_id, func.sum(BalanceShard.balance_cents))
+            .where(BalanceShard.account_id.in_(account_ids))
+            .group_by(BalanceShard.account_id)
+        ).all()
+        return {account_id: int(total) for account_id, total in rows}
+
+    @staticmethod
+    def configure(account_id, shards):
+        """
+        Set the number of balance shards for an account; 0 turns sharding off
+        Raises:
+            ValueError: If shards is out of range
+        """
+        if not 0 <= shards <= MAX_BALANCE_SHARDS:
+            raise ValueError(f"Shards must be between 0 and {MAX_BALANCE_SHARDS}")
+
+        BalanceShardService.lock_and_compact([account_id])
+        db.session.execute(
+            delete(BalanceShard).where(BalanceShard.account_id == account_id, BalanceShard.shard >= shards)
+        )
+        existing = set(db.session.execute(
+            select(BalanceShard.shard).where(BalanceShard.account_id == account_id)
+        ).scalars())
+        missing = [{'account_id': account_id, 'shard': shard, 'balance_cents': 0}
+                   for shard in range(shards) if shard not in existing]
+        if missing:
+            db.session.execute(insert(BalanceShard.__table__), missing)
+        db.session.execute(
+            update(Account).where(Account.account_id == account_id)
+            .values(balance_shards=shards)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        logger.info(f"Account {account_id} now has {shards} balance shards")
+
+    @staticmethod
+    def compact(account_ids=None, chunk_size=COMPACT_CHUNK_SIZE):
+        """
+        Fold shard rows back into Account.balance_cents
+        Args:
+            account_ids: Accounts to compact, all hot accounts if None
+            chunk_size: Accounts compacted per database transaction
+        Returns:
+            int: Cents moved out of shards
+        """
+        if account_ids is None:
+            account_ids = db.session.execute(
+                select(Account.account_id).where(Account.balance_shards > 0)
+            ).scalars().all()
+        account_ids = sorted(account_ids)
+
+        moved = 0
+        for start in range(0, len(account_ids), chunk_size):
+            moved += BalanceShardService.lock_and_compact(account_ids[start:start + chunk_size])
+            db.session.commit()
+        return moved
+
+    @staticmethod
+    def lock_and_compact(account_ids):
+        """
+        Lock the accounts and their shards and move shard balances into the
+        accounts, leaving the locks held for the caller's transaction
+        Returns:
+            int: Cents moved out of shards
+        """
+        db.session.execute(
+            select(Account.account_id)
+            .where(Account.account_id.in_(account_ids))
+            .order_by(Account.account_id)
+            .with_for_update(key_share=True)
+        ).all()
+        shards = db.session.execute(
+            select(BalanceShard.account_id, BalanceShard.shard, BalanceShard.balance_cents)
+            .where(BalanceShard.account_id.in_(account_ids))
+            .order_by(BalanceShard.account_id, BalanceShard.shard)
+            .with_for_update()
+        ).all()
+        shards = [row for row in shards if row.balance_cents]
+
+        totals = {}
+        for account_id, _, balance in shards:
+            totals[account_id] = totals.get(account_id, 0) + balance
+
+        if shards:
+            shard_table = BalanceShard.__table__
+            db.session.execute(
+                shard_table.update()
+                .where(shard_table.c.account_id == bindparam('b_account_id'),
+                       shard_table.c.shard == bindparam('b_shard'))
+                .values(balance_cents=0),
+                [{'b_account_id': account_id, 'b_shard': shard} for account_id, shard, _ in shards]
+            )
+            account_table = Account.__table__
+            db.session.execute(
+                account_table.update()
+                .where(account_table.c.account_id == bindparam('b_account_id'))
+                .values(balance_cents=account_table.c.balance_cents + bindparam('b_total')),
+                [{'b_account_id': account_id, 'b_total': total} for account_id, total in totals.items()]
+            )
+
+        return sum(totals.values())
+
+    @staticmethod
+    def run_compactor(interval):
+        """Compact hot accounts every interval seconds until interrupted"""
+        logger.info(f"Balance compactor started, interval {interval}s")
+        while True:
+            try:
+                moved = BalanceShardService.compact()
+                if moved:
+                    logger.info(f"Compacted {moved} cents out of balance shards")
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Balance compaction failed: {str(e)}")
+            time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage sharded balances for hot accounts")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    configure = subparsers.add_parser('configure', help='set the number of shards for an account')
+    configure.add_argument('account_id', type=uuid.UUID)
+    configure.add_argument('shards', type=int)
+    compact = subparsers.add_parser('compact', help='fold shard rows back into account balances')
+    compact.add_argument('--loop', action='store_true', help='keep compacting every BALANCE_COMPACT_INTERVAL')
+    args = parser.parse_args()
+
+    from create_app import create_app
+    app = create_app(config_class=os.getenv('FLASK_CONFIG', 'config.DevelopmentConfig'))
+
+    with app.app_context():
+        if args.command == 'configure':
+            BalanceShardService.configure(args.account_id, args.shards)
+        elif args.loop:
+            BalanceShardService.run_compactor(current_app.config['BALANCE_COMPACT_INTERVAL'])
+        else:
+            BalanceShardService.compact()
+
+
+if __name__ == '__main__':
+    main()
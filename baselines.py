@@ -0,0 +1,260 @@
+"""
+Per-account behavioural baselines
+
+Each account keeps two fixed-width AccountBaseline rows, one for outflows
+and one for inflows, holding an exponentially weighted mean and variance of
+the amount, the typical hour of day and a hashed set of counterparties.
+The fraud worker updates them in O(1) per transaction, so the amount
+z-score, new-counterparty and unusual-hour signals need no history scan.
+
+    python -m app.services.baselines backfill   # rebuild from existing history
+"""
+import argparse
+import logging
+import math
+import os
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import AccountBaseline, FraudCheckJob, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Width of the hashed counterparty set, kept below 63 bits so it fits a signed BIGINT
+COUNTERPARTY_BITS = 62
+# Hour statistics whose resultant length is below this are too spread out to have a typical hour
+MIN_HOUR_CONCENTRATION = 0.5
+
+Signals = namedtuple('Signals', ['zscore', 'new_counterparty', 'hour_distance'])
+
+
+class Baseline:
+    """Running statistics for one account and direction"""
+
+    __slots__ = ('txn_count', 'amount_mean', 'amount_var', 'hour_sin', 'hour_cos', 'counterparty_bits')
+
+    def __init__(self, txn_count=0, amount_mean=0.0, amount_var=0.0,
+                 hour_sin=0.0, hour_cos=0.0, counterparty_bits=0):
+        self.txn_count = txn_count
+        self.amount_mean = amount_mean
+        self.amount_var = amount_var
+        self.hour_sin = hour_sin
+        self.hour_cos = hour_cos
+        self.counterparty_bits = counterparty_bits
+
+    def zscore(self, amount, min_count):
+        """Standard score of amount against the baseline, 0 until it has enough history"""
+        if self.txn_count < min_count or self.amount_var <= 0:
+            return 0.0
+        return (amount - self.amount_mean) / math.sqrt(self.amount_var)
+
+    def knows(self, counterparty):
+        """Whether counterparty has (probably) been seen before"""
+        return bool(self.counterparty_bits & _counterparty_bit(counterparty))
+
+    def is_new_counterparty(self, counterparty, min_count):
+        """Whether counterparty is missing from an established baseline's set"""
+        if counterparty is None or self.txn_count < min_count:
+            return False
+        return not self.knows(counterparty)
+
+    def hour_distance(self, hour, min_count):
+        """Hours between hour and the typical hour, 0 until the baseline has a clear one"""
+        if self.txn_count < min_count or math.hypot(self.hour_sin, self.hour_cos) < MIN_HOUR_CONCENTRATION:
+            return 0.0
+        distance = abs(hour - self.typical_hour)
+        return min(distance, 24 - distance)
+
+    def update(self, amount, hour, counterparty, alpha):
+        """Fold one transaction into the running statistics"""
+        angle = 2 * math.pi * hour / 24
+        if self.txn_count == 0:
+            self.amount_mean = amount
+            self.amount_var = 0.0
+            self.hour_sin = math.sin(angle)
+            self.hour_cos = math.cos(angle)
+        else:
+            diff = amount - self.amount_mean
+            increment = alpha * diff
+            self.amount_mean += increment
+            self.amount_var = (1 - alpha) * (self.amount_var + diff * increment)
+            self.hour_sin += alpha * (math.sin(angle) - self.hour_sin)
+            self.hour_cos += alpha * (math.cos(angle) - self.hour_cos)
+
+        if counterparty is not None:
+            self.counterparty_bits |= _counterparty_bit(counterparty)
+        self.txn_count += 1
+
+    @property
+    def typical_hour(self):
+        """Circular mean of the hour of day"""
+        return (math.degrees(math.atan2(self.hour_sin, self.hour_cos)) / 15) % 24
+
+    def as_row(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _counterparty_bit(counterparty):
+    return 1 << (counterparty.int % COUNTERPARTY_BITS)
+
+
+class BaselineService:
+
+    @staticmethod
+    def observe(transactions):
+        """
+        Score transactions against their baselines, then fold them in
+        Args:
+            transactions: Rows with from_account_id, to_account_id, amount_cents, created_at,
+                sorted by created_at
+        Returns:
+            Signals: Per-transaction lists of amount z-score, whether the counterparty is new
+                and hours from the typical hour, against the source account's outflows for
+                transfers and the target account's inflows for deposits
+        """
+        alpha = current_app.config['BASELINE_ALPHA']
+        min_count = current_app.config['BASELINE_MIN_COUNT']
+
+        keys = {(txn.to_account_id, 'in') for txn in transactions}
+        keys.update((txn.from_account_id, 'out') for txn in transactions if txn.from_account_id)
+        baselines = BaselineService._load(keys)
+
+        signals = Signals([], [], [])
+        for txn in transactions:
+            amount = float(txn.amount_cents)
+            hour = txn.created_at.hour
+            inflow = baselines[(txn.to_account_id, 'in')]
+            if txn.from_account_id:
+                baseline = baselines[(txn.from_account_id, 'out')]
+                counterparty = txn.to_account_id
+            else:
+                baseline = inflow
+                counterparty = txn.from_account_id
+            signals.zscore.append(baseline.zscore(amount, min_count))
+            signals.new_counterparty.append(baseline.is_new_counterparty(counterparty, min_count))
+            signals.hour_distance.append(baseline.hour_distance(hour, min_count))
+
+            if txn.from_account_id:
+                baseline.update(amount, hour, txn.to_account_id, alpha)
+            inflow.update(amount, hour, txn.from_account_id, alpha)
+
+        BaselineService._save(baselines)
+        return signals
+
+    @staticmethod
+    def backfill(chunk_size=10000):
+        """
+        Rebuild every baseline from transaction history in one streaming pass.
+        Transactions with a queued fraud check are left for the fraud worker to fold in.
+        Args:
+            chunk_size: Rows fetched per round trip and written per INSERT
+        Returns:
+            int: Number of transactions folded in
+        """
+        alpha = current_app.config['BASELINE_ALPHA']
+        baselines = {}
+        processed = 0
+
+        rows = db.session.execute(
+            select(Transaction.from_account_id, Transaction.to_account_id,
+                   Transaction.amount_cents, Transaction.created_at)
+            .where(Transaction.status == 'completed',
+                   Transaction.transaction_id.notin_(select(FraudCheckJob.transaction_id)))
+            .order_by(Transaction.created_at)
+            .execution_options(yield_per=chunk_size)
+        )
+        for from_account_id, to_account_id, amount, created_at in rows:
+            amount = float(amount)
+            if from_account_id:
+                baselines.setdefault((from_account_id, 'out'), Baseline()).update(
+                    amount, created_at.hour, to_account_id, alpha)
+            baselines.setdefault((to_account_id, 'in'), Baseline()).update(
+                amount, created_at.hour, from_account_id, alpha)
+            processed += 1
+
+        now = datetime.utcnow()
+        db.session.execute(delete(AccountBaseline))
+        items = list(baselines.items())
+        for start in range(0, len(items), chunk_size):
+            db.session.execute(insert(AccountBaseline.__table__), [
+                dict(baseline.as_row(), account_id=account_id, direction=direction, updated_at=now)
+                for (account_id, direction), baseline in items[start:start + chunk_size]
+            ])
+        db.session.commit()
+
+        logger.info(f"Backfilled {len(baselines)} baselines from {processed} transactions")
+        return processed
+
+    @staticmethod
+    def _load(keys):
+        """
+        Lock and load baselines for the given (account_id, direction) keys
+
+        Missing rows are created empty first, then every row is locked in key
+        order, so fraud workers sharing an account wait for each other instead
+        of overwriting each other's updates.
+        """
+        if not keys:
+            return {}
+        keys = sorted(keys)
+        db.session.execute(_dialect_insert()(AccountBaseline.__table__).values([
+            dict(Baseline().as_row(), account_id=account_id, direction=direction)
+            for account_id, direction in keys
+        ]).on_conflict_do_nothing())
+
+        rows = db.session.execute(
+            select(AccountBaseline)
+            .where(tuple_(AccountBaseline.account_id, AccountBaseline.direction).in_(keys))
+            .order_by(AccountBaseline.account_id, AccountBaseline.direction)
+            .with_for_update()
+        ).scalars().all()
+        baselines = {key: Baseline() for key in keys}
+        baselines.update({
+            (row.account_id, row.direction): Baseline(
+                row.txn_count, row.amount_mean, row.amount_var,
+                row.hour_sin, row.hour_cos, row.counterparty_bits
+            ) for row in rows
+        })
+        return baselines
+
+    @staticmethod
+    def _save(baselines):
+        """Write baselines back with one INSERT ... ON CONFLICT DO UPDATE"""
+        if not baselines:
+            return
+        now = datetime.utcnow()
+        stmt = _dialect_insert()(AccountBaseline.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['account_id', 'direction'],
+            set_={name: stmt.excluded[name] for name in Baseline.__slots__ + ('updated_at',)}
+        )
+        db.session.execute(stmt, [
+            dict(baseline.as_row(), account_id=account_id, direction=direction, updated_at=now)
+            for (account_id, direction), baseline in sorted(baselines.items())
+        ])
+
+
+def _dialect_insert():
+    return pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain per-account behavioural baselines")
+    parser.add_argument('command', choices=['backfill'])
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    from create_app import create_app
+    app = create_app(config_class=os.getenv('FLASK_CONFIG', 'config.DevelopmentConfig'))
+
+    with app.app_context():
+        BaselineService.backfill(args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
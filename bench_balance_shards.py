@@ -0,0 +1,108 @@
+"""
+Contention benchmark for deposits into one hot collection account
+
+Runs concurrent TransactionService.create_deposit calls against a single
+account with 1, 8 and 32 balance shards and reports deposits/sec. Row-lock
+contention only shows on Postgres; SQLite serializes all writers:
+
+    python bench_balance_shards.py postgresql://localhost/bank_bench --threads 32
+"""
+import argparse
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+from app.models import User, Account, db
+from app.services.balance_shards import BalanceShardService
+from app.services.transaction_service import TransactionService
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('database_uri', nargs='?', default='sqlite:///bench.db')
+parser.add_argument('--shards', type=int, nargs='+', default=[1, 8, 32])
+parser.add_argument('--threads', type=int, default=16)
+parser.add_argument('--deposits', type=int, default=200, help='deposits per thread')
+args = parser.parse_args()
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db.init_app(app)
+
+
+def setup_account(shards):
+    """Create one user owning a collection account with the given number of shards"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        user = User(
+            user_id=uuid.uuid4(),
+            mobile_number="+923000000000",
+            email="bench@example.com",
+            full_name="Bench User",
+            pin_hash=generate_password_hash("123456"),
+            cnic_number="00000-0000000-0",
+            is_verified=True
+        )
+        account = Account(
+            account_id=uuid.uuid4(),
+            user_id=user.user_id,
+            account_number="SA0000000000",
+            created_at=datetime.utcnow()
+        )
+        db.session.add_all([user, account])
+        db.session.commit()
+        BalanceShardService.configure(account.account_id, shards)
+        return user.user_id, account.account_id
+
+
+def worker(user_id, account_id, results):
+    """Deposit 1.00 repeatedly into the collection account"""
+    ok = failed = 0
+    with app.app_context():
+        for _ in range(args.deposits):
+            try:
+                TransactionService.create_deposit(user_id, account_id, 100)
+                ok += 1
+            except ValueError:
+                failed += 1
+    results.append((ok, failed))
+
+
+def run(shards):
+    user_id, account_id = setup_account(shards)
+    results = []
+    threads = [
+        threading.Thread(target=worker, args=(user_id, account_id, results))
+        for _ in range(args.threads)
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    completed = sum(ok for ok, _ in results)
+    failed = sum(failed for _, failed in results)
+    with app.app_context():
+        BalanceShardService.compact()
+        balance = db.session.get(Account, account_id).balance_cents
+    check = 'OK' if balance == completed * 100 else f'DRIFT {balance - completed * 100}'
+    print(f"{shards:>3} shards: {completed / elapsed:8.1f} deposits/sec, "
+          f"{failed} failed, balance check {check}")
+
+
+def main():
+    print(f"Database: {args.database_uri}, threads: {args.threads}")
+    for shards in args.shards:
+        run(shards)
+
+
+if __name__ == "__main__":
+    main()
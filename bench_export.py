@@ -0,0 +1,86 @@
+"""
+Memory benchmark for the streaming transaction export
+
+Seeds one account with many transactions, drains the CSV/NDJSON export
+generators and reports throughput and peak RSS, which should stay flat as
+--rows grows:
+
+    python bench_export.py postgresql://localhost/bank_bench --rows 5000000
+"""
+import argparse
+import resource
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app.models import User, Account, Transaction, db
+from app.routes.transactions import _export_csv, _export_ndjson, _gzip_stream
+from app.services.transaction_service import TransactionService
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('database_uri', nargs='?', default='sqlite:///bench_export.db')
+parser.add_argument('--rows', type=int, default=1000000)
+parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+parser.add_argument('--gzip', action='store_true')
+args = parser.parse_args()
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db.init_app(app)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    user = User(user_id=uuid.uuid4(), mobile_number="+923000000000", email="bench@example.com",
+                full_name="Bench User", pin_hash=generate_password_hash("123456"),
+                cnic_number="00000-0000000-0")
+    db.session.add(user)
+    account = Account(account_id=uuid.uuid4(), user_id=user.user_id,
+                      account_number="SA0000000000", balance_cents=0)
+    db.session.add(account)
+    db.session.commit()
+
+    start = datetime.utcnow() - timedelta(days=365)
+    for offset in range(0, args.rows, 50000):
+        db.session.execute(insert(Transaction.__table__), [{
+            'transaction_id': uuid.uuid4(), 'from_account_id': None, 'to_account_id': account.account_id,
+            'amount_cents': 1000, 'transaction_type': 'deposit', 'status': 'completed',
+            'reference': 'bench', 'is_fraudulent': False,
+            'created_at': start + timedelta(seconds=offset + i), 'completed_at': start
+        } for i in range(min(50000, args.rows - offset))])
+        db.session.commit()
+    return user.user_id
+
+
+def main():
+    with app.app_context():
+        user_id = seed()
+        db.session.expunge_all()
+        baseline = peak_rss_mb()
+
+        rows = TransactionService.stream_transactions(user_id)
+        body = _export_csv(rows) if args.format == 'csv' else _export_ndjson(rows)
+        if args.gzip:
+            body = _gzip_stream(body)
+
+        started = time.perf_counter()
+        size = sum(len(chunk) for chunk in body)
+        elapsed = time.perf_counter() - started
+
+        print(f"Rows:      {args.rows} ({args.format}{', gzip' if args.gzip else ''})")
+        print(f"Output:    {size / 1e6:.1f} MB in {elapsed:.1f}s ({args.rows / elapsed:.0f} rows/sec)")
+        print(f"Peak RSS:  {baseline:.0f} MB before export, {peak_rss_mb():.0f} MB after")
+
+
+if __name__ == "__main__":
+    main()
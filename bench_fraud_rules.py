@@ -0,0 +1,53 @@
+"""
+Benchmark for the fraud rules engine
+
+Scores synthetic batches with the default FRAUD_RULES and reports the time
+per batch and per transaction:
+
+    python bench_fraud_rules.py --batch 100000
+"""
+import argparse
+import random
+import time
+import uuid
+
+from config import Config
+from app.services.fraud_rules import RulesEngine, TransactionBatch
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--batch', type=int, default=100000)
+parser.add_argument('--rounds', type=int, default=10)
+args = parser.parse_args()
+
+
+def make_batch(size):
+    return TransactionBatch(
+        transaction_ids=[uuid.uuid4() for _ in range(size)],
+        amounts=[random.choice((int(random.lognormvariate(7, 1.5) * 100), random.randint(1, 100) * 100000))
+                 for _ in range(size)],
+        hours=[random.randint(0, 23) for _ in range(size)],
+        velocity=[random.randint(1, 6) for _ in range(size)],
+        new_recipient=[random.random() < 0.1 for _ in range(size)]
+    )
+
+
+def main():
+    started = time.perf_counter()
+    engine = RulesEngine(Config.FRAUD_RULES)
+    print(f"Compiled {len(engine.rules)} rules in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    batch = make_batch(args.batch)
+    timings = []
+    for _ in range(args.rounds):
+        started = time.perf_counter()
+        hits = engine.evaluate(batch)
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    print(f"Batch size:  {args.batch}")
+    print(f"Hits:        {len(hits)} ({sum(1 for hit in hits if not hit.shadow)} alerting)")
+    print(f"Best:        {best * 1000:.1f} ms/batch, {best / args.batch * 1e9:.0f} ns/transaction")
+
+
+if __name__ == "__main__":
+    main()
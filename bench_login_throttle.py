@@ -0,0 +1,97 @@
+"""
+Load test for the login throttle under a credential-stuffing wave
+
+--processes workers share one SQLite throttle file, like gunicorn workers
+on a host. Together they offer --rate bad logins/sec spread over
+--mobiles numbers from --ips addresses for --seconds. The report shows
+the achieved rate, throttle latency, how many attempts would still have
+reached the database and PIN hashing, and how many lock writes the wave
+caused. Before the throttle every one of those attempts was a users write:
+
+    python bench_login_throttle.py --rate 10000 --processes 8
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from app.services.login_throttle import create_login_throttle
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--rate', type=int, default=10000, help='bad logins/sec offered in total')
+parser.add_argument('--seconds', type=int, default=10)
+parser.add_argument('--processes', type=int, default=8)
+parser.add_argument('--mobiles', type=int, default=100000)
+parser.add_argument('--ips', type=int, default=500)
+parser.add_argument('--backend', choices=['sqlite', 'memory'], default='sqlite')
+args = parser.parse_args()
+
+CONFIG = {
+    'LOGIN_THROTTLE_BACKEND': args.backend,
+    'LOGIN_THROTTLE_PATH': os.path.join(tempfile.mkdtemp(), 'login_throttle.db'),
+    'LOGIN_THROTTLE_WINDOW': 900,
+    'LOGIN_THROTTLE_BUCKET_SECONDS': 30,
+    'LOGIN_MAX_FAILURES': 5,
+    'LOGIN_MAX_IP_FAILURES': 100,
+}
+
+
+def attack(seed, results):
+    throttle = create_login_throttle(CONFIG)
+    rng = random.Random(seed)
+    interval = args.processes / args.rate
+    latencies = []
+    rejected = passed = locks = 0
+
+    deadline = time.perf_counter() + args.seconds
+    next_at = time.perf_counter()
+    while next_at < deadline:
+        mobile = f"+92300{rng.randrange(args.mobiles):07d}"
+        client_ip = f"10.0.{rng.randrange(args.ips) // 256}.{rng.randrange(args.ips) % 256}"
+        started = time.perf_counter()
+        if not throttle.allowed(mobile, client_ip):
+            rejected += 1
+        else:
+            passed += 1
+            if throttle.failed(mobile, client_ip) == CONFIG['LOGIN_MAX_FAILURES']:
+                locks += 1
+        latencies.append(time.perf_counter() - started)
+
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    results.put((latencies, rejected, passed, locks))
+
+
+def main():
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=attack, args=(seed, results)) for seed in range(args.processes)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    collected = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for batch in collected for latency in batch[0])
+    rejected = sum(batch[1] for batch in collected)
+    passed = sum(batch[2] for batch in collected)
+    locks = sum(batch[3] for batch in collected)
+    total = rejected + passed
+
+    print(f"Backend:    {args.backend}, {args.processes} processes")
+    print(f"Attempts:   {total} in {elapsed:.1f}s ({total / elapsed:.0f}/sec, offered {args.rate}/sec)")
+    print(f"Throttle:   p50 {latencies[len(latencies) // 2] * 1e6:.0f} us, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us")
+    print(f"Rejected:   {rejected} before any database access or hashing")
+    print(f"Passed:     {passed} reached user lookup and PIN check")
+    print(f"DB writes:  {locks} account locks (previously {passed + rejected} failure writes)")
+
+
+if __name__ == "__main__":
+    main()
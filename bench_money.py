@@ -0,0 +1,84 @@
+"""
+Microbenchmark for the money representation on the transfer path
+
+Times the per-transfer parse, balance arithmetic and JSON serialization
+with the old float/Decimal representation against integer cents:
+
+    python bench_money.py --iterations 1000000
+"""
+import argparse
+import json
+import random
+import timeit
+from decimal import Decimal
+
+from app.utils.money import parse_cents, to_major
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--iterations', type=int, default=1000000)
+args = parser.parse_args()
+
+AMOUNTS = [f"{random.randint(1, 99999)}.{random.randint(0, 99):02d}" for _ in range(1000)]
+
+
+def before():
+    """float validation, Decimal balances, float() on the way out"""
+    balance = Decimal('100000.00')
+    for raw in AMOUNTS:
+        amount = round(float(raw), 2)
+        balance -= Decimal(str(amount))
+        balance += Decimal(str(amount))
+        json.dumps({'amount': amount, 'balance': float(balance)})
+
+
+def after():
+    """exact string-to-cents parse, integer balances, cents / 100 on the way out"""
+    balance = 10000000
+    for raw in AMOUNTS:
+        amount = parse_cents(raw)
+        balance -= amount
+        balance += amount
+        json.dumps({'amount': to_major(amount), 'balance': to_major(balance)})
+
+
+def stage_timings(label, parse, debit, serialize):
+    number = max(1, args.iterations // len(AMOUNTS))
+    total = number * len(AMOUNTS)
+    for stage, func in (('parse', parse), ('arith', debit), ('serialize', serialize)):
+        elapsed = timeit.timeit(func, number=number)
+        print(f"{label:<8} {stage:<10} {elapsed / total * 1e9:8.0f} ns/transfer")
+
+
+def main():
+    number = max(1, args.iterations // len(AMOUNTS))
+    total = number * len(AMOUNTS)
+
+    decimals = [Decimal(str(round(float(raw), 2))) for raw in AMOUNTS]
+    cents = [parse_cents(raw) for raw in AMOUNTS]
+
+    def decimal_arith():
+        balance = Decimal('100000.00')
+        for amount in decimals:
+            balance = balance - amount + amount
+
+    def cents_arith():
+        balance = 10000000
+        for amount in cents:
+            balance = balance - amount + amount
+
+    stage_timings('before',
+                  lambda: [Decimal(str(round(float(raw), 2))) for raw in AMOUNTS],
+                  decimal_arith,
+                  lambda: [json.dumps({'amount': float(amount)}) for amount in decimals])
+    stage_timings('after',
+                  lambda: [parse_cents(raw) for raw in AMOUNTS],
+                  cents_arith,
+                  lambda: [json.dumps({'amount': to_major(amount)}) for amount in cents])
+
+    for label, func in (('before', before), ('after', after)):
+        elapsed = timeit.timeit(func, number=number)
+        print(f"{label:<8} {'total':<10} {elapsed / total * 1e9:8.0f} ns/transfer")
+
+
+if __name__ == "__main__":
+    main()
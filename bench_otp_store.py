@@ -0,0 +1,96 @@
+"""
+Verify latency benchmark for the database OTP store as history grows
+
+Grows the otps table through --sizes rows of used and expired history
+spread over --users users. At each size it times issuing and verifying
+fresh OTPs for random users. With the composite index, verify latency
+should stay flat from thousands to tens of millions of rows:
+
+    python bench_otp_store.py postgresql://localhost/bank_bench --sizes 100000 1000000 10000000
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import insert
+
+from app.models import OTP, User, db
+from app.services.otp_store import VERIFIED, DatabaseOTPStore
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('database_uri', nargs='?', default='sqlite:///bench_otp_store.db')
+parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+parser.add_argument('--users', type=int, default=10000)
+parser.add_argument('--verifies', type=int, default=2000)
+args = parser.parse_args()
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db.init_app(app)
+
+BATCH = 50000
+
+
+def seed_users():
+    db.drop_all()
+    db.create_all()
+    user_ids = [uuid.uuid4() for _ in range(args.users)]
+    db.session.execute(insert(User.__table__), [{
+        'user_id': user_id, 'mobile_number': f"+92300{i:07d}", 'email': f"bench{i}@example.com",
+        'full_name': "Bench User", 'pin_hash': "x", 'cnic_number': f"{i:05d}-0000000-0"
+    } for i, user_id in enumerate(user_ids)])
+    db.session.commit()
+    return user_ids
+
+
+def add_history(user_ids, count):
+    """Used and expired OTPs, as left behind before purging existed"""
+    past = datetime.utcnow() - timedelta(days=30)
+    for offset in range(0, count, BATCH):
+        db.session.execute(insert(OTP.__table__), [{
+            'otp_id': uuid.uuid4(), 'user_id': random.choice(user_ids), 'otp_code': '000000',
+            'purpose': 'verification', 'is_used': i % 2 == 0,
+            'created_at': past + timedelta(seconds=i), 'expires_at': past + timedelta(seconds=i + 300)
+        } for i in range(offset, min(count, offset + BATCH))])
+        db.session.commit()
+
+
+def verify_latencies(store, user_ids):
+    latencies = []
+    for _ in range(args.verifies):
+        user_id = random.choice(user_ids)
+        code = f"{random.randrange(1000000):06d}"
+        store.issue(user_id, 'verification', code, datetime.utcnow() + timedelta(minutes=5))
+        db.session.commit()
+
+        started = time.perf_counter()
+        assert store.consume(user_id, 'verification', code) == VERIFIED
+        db.session.commit()
+        latencies.append(time.perf_counter() - started)
+    return sorted(latencies)
+
+
+def main():
+    store = DatabaseOTPStore()
+    with app.app_context():
+        user_ids = seed_users()
+        rows = 0
+        for size in sorted(args.sizes):
+            add_history(user_ids, size - rows)
+            rows = size
+            latencies = verify_latencies(store, user_ids)
+            print(f"{rows:>10} historical OTPs  verify p50 {statistics.median(latencies) * 1000:6.2f} ms  "
+                  f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms")
+
+        started = time.perf_counter()
+        deleted = store.purge()
+        print(f"Purged {deleted} OTPs in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Login benchmark for PIN hashing cost and the hashing pool
+
+Runs concurrent AuthService.login_user calls for each --methods KDF
+setting, inline (0 pool workers) and with --workers pool processes, and
+reports logins/sec with p50/p99 latency. Alongside the logins a probe
+thread times a trivial request-sized job to show how much logins slow
+the rest of the worker:
+
+    python bench_pin_hashing.py --threads 16 --logins 20 --workers 4
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+
+from flask import Flask
+
+from app.models import User, db
+from app.services.auth_service import AuthService
+from app.utils.pin_hashing import shutdown_pin_hashing
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('database_uri', nargs='?', default='sqlite:///bench_pin_hashing.db')
+parser.add_argument('--methods', nargs='+',
+                    default=['pbkdf2:sha256:100000', 'pbkdf2:sha256:600000', 'scrypt:16384:8:1', 'scrypt:32768:8:1'])
+parser.add_argument('--threads', type=int, default=16)
+parser.add_argument('--logins', type=int, default=20, help='logins per thread')
+parser.add_argument('--workers', type=int, default=4, help='pool processes')
+args = parser.parse_args()
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SECRET_KEY"] = "bench"
+app.config["PIN_HASH_TIMEOUT"] = 60
+db.init_app(app)
+
+PIN = "135790"
+
+
+def seed(method):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        app.config["PIN_HASH_METHOD"] = method
+        mobiles = []
+        for i in range(args.threads):
+            user = User(user_id=uuid.uuid4(), mobile_number=f"+92300{i:07d}", email=f"bench{i}@example.com",
+                        full_name="Bench User", cnic_number=f"{i:05d}-0000000-0", is_verified=True)
+            user.set_pin(PIN)
+            db.session.add(user)
+            mobiles.append(user.mobile_number)
+        db.session.commit()
+        return mobiles
+
+
+def run(method, workers, mobiles):
+    app.config["PIN_HASH_WORKERS"] = workers
+    latencies = []
+    probes = []
+    done = threading.Event()
+
+    def login(mobile):
+        for _ in range(args.logins):
+            with app.test_request_context():
+                started = time.perf_counter()
+                AuthService.login_user(mobile, PIN)
+                latencies.append(time.perf_counter() - started)
+                db.session.remove()
+
+    def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            sum(range(10000))
+            probes.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    # Warm the pool so process start-up isn't timed
+    with app.app_context():
+        User.query.first().check_pin(PIN)
+
+    threads = [threading.Thread(target=login, args=(mobile,)) for mobile in mobiles]
+    prober = threading.Thread(target=probe)
+    prober.start()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    prober.join()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{method:<22} workers={workers:<3} {len(latencies) / elapsed:8.1f} logins/sec  "
+          f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  "
+          f"probe p50 {statistics.median(probes) * 1000:6.2f} ms")
+
+
+def main():
+    for method in args.methods:
+        mobiles = seed(method)
+        for workers in (0, args.workers):
+            run(method, workers, mobiles)
+    shutdown_pin_hashing()
+
+
+if __name__ == "__main__":
+    main()
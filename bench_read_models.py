@@ -0,0 +1,132 @@
+"""
+Benchmark for the JSON list endpoints' read path
+
+Serializes a 100-row page of accounts, transactions and cards through ORM
+entities (before) and through the column-projected read models (after),
+reporting latency and peak traced allocation per page:
+
+    python bench_read_models.py postgresql://localhost/bank_bench --rows 100
+"""
+import argparse
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app.models import User, Account, Card, Transaction, db
+from app.services.account_service import AccountService
+from app.services.card_service import CardService
+from app.services.read_models import ReadModelService
+from app.services.transaction_service import TransactionService
+from app.utils.money import to_major
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('database_uri', nargs='?', default='sqlite:///bench_read_models.db')
+parser.add_argument('--rows', type=int, default=100)
+parser.add_argument('--iterations', type=int, default=200)
+args = parser.parse_args()
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db.init_app(app)
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    user = User(user_id=uuid.uuid4(), mobile_number="+923000000000", email="bench@example.com",
+                full_name="Bench User", pin_hash=generate_password_hash("123456"),
+                cnic_number="00000-0000000-0")
+    db.session.add(user)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    accounts = [{
+        'account_id': uuid.uuid4(), 'user_id': user.user_id, 'account_number': f"SA{i:010d}",
+        'balance_cents': 100000, 'status': 'active', 'balance_shards': 0,
+        'created_at': now - timedelta(minutes=i)
+    } for i in range(args.rows)]
+    db.session.execute(insert(Account.__table__), accounts)
+    db.session.execute(insert(Card.__table__), [{
+        'card_id': uuid.uuid4(), 'account_id': acc['account_id'], 'card_number': f"4{i:015d}",
+        'expiry_date': '12/30', 'cvv_hash': 'x', 'is_virtual': True, 'is_active': True,
+        'created_at': now - timedelta(minutes=i)
+    } for i, acc in enumerate(accounts)])
+    db.session.execute(insert(Transaction.__table__), [{
+        'transaction_id': uuid.uuid4(), 'from_account_id': accounts[i % args.rows]['account_id'],
+        'to_account_id': accounts[(i + 1) % args.rows]['account_id'], 'amount_cents': 1000,
+        'transaction_type': 'transfer', 'status': 'completed', 'reference': 'bench',
+        'is_fraudulent': False, 'created_at': now - timedelta(seconds=i), 'completed_at': now
+    } for i in range(args.rows * 10)])
+    db.session.commit()
+    return user.user_id
+
+
+def orm_pages(user_id):
+    """The JSON branches as they were: entities, then a dict per entity"""
+    accounts = [{
+        'account_id': str(acc.account_id),
+        'account_number': acc.account_number,
+        'balance': to_major(acc.total_balance_cents),
+        'status': acc.status,
+        'created_at': acc.created_at.isoformat()
+    } for acc in AccountService.get_user_accounts(user_id)]
+    transactions = [{
+        'transaction_id': str(txn.transaction_id),
+        'amount': to_major(txn.amount_cents),
+        'type': txn.transaction_type,
+        'status': txn.status,
+        'reference': txn.reference,
+        'timestamp': txn.created_at.isoformat(),
+        'from_account': str(txn.from_account_id) if txn.from_account_id else None,
+        'to_account': str(txn.to_account_id)
+    } for txn in TransactionService.get_transaction_history(user_id, limit=args.rows)]
+    cards = CardService.get_user_cards(user_id)
+    return json.dumps([accounts, transactions, cards])
+
+
+def row_pages(user_id):
+    return json.dumps([
+        [row.to_json() for row in ReadModelService.account_rows(user_id)],
+        [row.to_json() for row in ReadModelService.transaction_rows(user_id, limit=args.rows)],
+        [row.to_json() for row in ReadModelService.card_rows(user_id)],
+    ])
+
+
+def measure(label, func, user_id):
+    # Session cleared per page like a fresh request, so the identity map never serves hits
+    func(user_id)
+    db.session.remove()
+
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        func(user_id)
+        db.session.remove()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    func(user_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.remove()
+
+    print(f"{label:<8} {elapsed / args.iterations * 1000:8.2f} ms/page {peak / 1024:8.0f} KiB peak allocated")
+
+
+def main():
+    with app.app_context():
+        user_id = seed()
+        db.session.remove()
+        print(f"{args.rows} accounts, {args.rows} transactions and {args.rows} cards per page")
+        measure('before', orm_pages, user_id)
+        measure('after', row_pages, user_id)
+
+
+if __name__ == "__main__":
+    main()
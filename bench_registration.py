@@ -0,0 +1,72 @@
+"""
+Registration throughput, one at a time and in bulk
+
+Registers --users users through AuthService.register_user, one INSERT
+and commit each, then another --users through
+OnboardingService.register_users in batches with PINs hashed across
+--workers processes. Reports registrations/sec for both. Use a cheap
+--method to measure the database side alone:
+
+    python bench_registration.py postgresql://localhost/bank_bench --users 5000 --workers 8
+"""
+import argparse
+import os
+import time
+
+from flask import Flask
+
+from app.models import db
+from app.services.auth_service import AuthService
+from app.services.onboarding import OnboardingService
+from app.utils.pin_hashing import shutdown_pin_hashing
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('database_uri', nargs='?', default='sqlite:///bench_registration.db')
+parser.add_argument('--users', type=int, default=2000)
+parser.add_argument('--batch-size', type=int, default=1000)
+parser.add_argument('--workers', type=int, default=os.cpu_count())
+parser.add_argument('--method', default='scrypt:32768:8:1', help='PIN_HASH_METHOD')
+args = parser.parse_args()
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["PIN_HASH_METHOD"] = args.method
+db.init_app(app)
+
+
+def users(start):
+    return [{
+        'mobile_number': f"+9230{i:08d}",
+        'pin': "135790",
+        'full_name': "Bench User",
+        'email': f"bench{i}@example.com",
+        'cnic_number': f"{i // 10000000:05d}-{i % 10000000:07d}-0",
+    } for i in range(start, start + args.users)]
+
+
+def main():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        app.config["PIN_HASH_WORKERS"] = 0
+        started = time.perf_counter()
+        for user in users(0):
+            AuthService.register_user(**user)
+        single = time.perf_counter() - started
+
+        app.config["PIN_HASH_WORKERS"] = args.workers
+        rows = users(args.users)
+        started = time.perf_counter()
+        result = OnboardingService.register_users(rows, batch_size=args.batch_size)
+        bulk = time.perf_counter() - started
+        shutdown_pin_hashing()
+
+        print(f"Single: {args.users} users in {single:.1f}s ({args.users / single:.0f}/sec)")
+        print(f"Bulk:   {result['registered']} users in {bulk:.1f}s ({result['registered'] / bulk:.0f}/sec, "
+              f"{args.workers} hashing processes, {len(result['rejected'])} rejected)")
+
+
+if __name__ == "__main__":
+    main()
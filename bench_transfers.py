@@ -0,0 +1,113 @@
+"""
+Contention benchmark for TransactionService.transfer_funds
+
+Spreads concurrent transfers over a handful of hot accounts and reports
+transfers/sec. Run against SQLite (default) or Postgres:
+
+    python bench_transfers.py sqlite:///bench.db
+    python bench_transfers.py postgresql://localhost/bank_bench --threads 16
+"""
+import argparse
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+from app.models import User, Account, db
+from app.services.transaction_service import TransactionService
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('database_uri', nargs='?', default='sqlite:///bench.db')
+parser.add_argument('--accounts', type=int, default=4, help='number of hot accounts')
+parser.add_argument('--threads', type=int, default=8)
+parser.add_argument('--transfers', type=int, default=500, help='transfers per thread')
+args = parser.parse_args()
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db.init_app(app)
+
+OPENING_BALANCE_CENTS = 100000000000
+
+
+def setup_accounts():
+    """Create one user owning the hot accounts, each with a large opening balance"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        user = User(
+            user_id=uuid.uuid4(),
+            mobile_number="+923000000000",
+            email="bench@example.com",
+            full_name="Bench User",
+            pin_hash=generate_password_hash("123456"),
+            cnic_number="00000-0000000-0",
+            is_verified=True
+        )
+        db.session.add(user)
+
+        accounts = [
+            Account(
+                account_id=uuid.uuid4(),
+                user_id=user.user_id,
+                account_number=f"SA{i:010d}",
+                balance_cents=OPENING_BALANCE_CENTS,
+                created_at=datetime.utcnow()
+            )
+            for i in range(args.accounts)
+        ]
+        db.session.add_all(accounts)
+        db.session.commit()
+        return user.user_id, [acc.account_id for acc in accounts]
+
+
+def worker(user_id, account_ids, results):
+    """Fire random transfers between the hot accounts"""
+    ok = failed = 0
+    with app.app_context():
+        for _ in range(args.transfers):
+            source, target = random.sample(account_ids, 2)
+            try:
+                TransactionService.transfer_funds(user_id, source, target, 100)
+                ok += 1
+            except ValueError:
+                failed += 1
+    results.append((ok, failed))
+
+
+def main():
+    user_id, account_ids = setup_accounts()
+    results = []
+    threads = [
+        threading.Thread(target=worker, args=(user_id, account_ids, results))
+        for _ in range(args.threads)
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    completed = sum(ok for ok, _ in results)
+    failed = sum(failed for _, failed in results)
+    print(f"Database:      {args.database_uri}")
+    print(f"Hot accounts:  {args.accounts}, threads: {args.threads}")
+    print(f"Completed:     {completed}, failed: {failed}")
+    print(f"Throughput:    {completed / elapsed:.1f} transfers/sec")
+
+    with app.app_context():
+        total = sum(acc.balance_cents for acc in Account.query.all())
+        expected = OPENING_BALANCE_CENTS * args.accounts
+        print(f"Balance check: {'OK' if total == expected else f'DRIFT {total - expected}'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Insert benchmark for random (uuid4) against time-ordered (uuid7) primary keys
+
+Fills one table per key type with --rows rows in batches and reports the
+insert rate per million rows, so the slowdown as the index outgrows
+memory is visible, and the final primary key index size. Index sizes are
+only reported on Postgres:
+
+    python bench_uuid7.py postgresql://localhost/bank_bench --rows 10000000
+"""
+import argparse
+import time
+import uuid
+
+from sqlalchemy import BigInteger, Column, DateTime, MetaData, Table, create_engine, func, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.utils.ids import uuid7
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('database_uri', nargs='?', default='sqlite:///bench_uuid7.db')
+parser.add_argument('--rows', type=int, default=10000000)
+parser.add_argument('--batch', type=int, default=10000)
+args = parser.parse_args()
+
+engine = create_engine(args.database_uri)
+metadata = MetaData()
+tables = {
+    name: Table(f"bench_keys_{name}", metadata,
+                Column('id', UUID(as_uuid=True), primary_key=True),
+                Column('amount_cents', BigInteger, nullable=False),
+                Column('created_at', DateTime, server_default=func.now()))
+    for name in ('uuid4', 'uuid7')
+}
+
+
+def index_size_mb(table):
+    if engine.dialect.name != 'postgresql':
+        return None
+    with engine.connect() as conn:
+        size = conn.execute(text(f"SELECT pg_relation_size('{table.name}_pkey')")).scalar()
+    return size / 1e6
+
+
+def fill(name, generate):
+    table = tables[name]
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+
+    started = lap = time.perf_counter()
+    for offset in range(0, args.rows, args.batch):
+        count = min(args.batch, args.rows - offset)
+        with engine.begin() as conn:
+            conn.execute(table.insert(), [{'id': generate(), 'amount_cents': 1000} for _ in range(count)])
+        done = offset + count
+        if done % 1000000 == 0 or done == args.rows:
+            now = time.perf_counter()
+            rows = done % 1000000 or 1000000
+            print(f"{name}  {done:>10} rows  {rows / (now - lap):8.0f} rows/sec")
+            lap = now
+
+    elapsed = time.perf_counter() - started
+    size = index_size_mb(table)
+    print(f"{name}  total {args.rows / elapsed:8.0f} rows/sec"
+          + (f", primary key index {size:.0f} MB" if size is not None else ""))
+
+
+def main():
+    fill('uuid4', uuid.uuid4)
+    fill('uuid7', uuid7)
+
+
+if __name__ == "__main__":
+    main()
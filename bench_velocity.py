@@ -0,0 +1,115 @@
+"""
+Benchmark for the high-frequency fraud rule
+
+Compares the original per-transfer COUNT query over the last five minutes
+with the bucketed velocity counters, on a table of 1M transactions:
+
+    python bench_velocity.py sqlite:///bench_velocity.db
+    python bench_velocity.py postgresql://localhost/bank_bench --rows 1000000
+"""
+import argparse
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+
+from app.models import User, Account, Transaction, db
+from app.services.velocity import VelocityTracker, SharedVelocityTracker
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('database_uri', nargs='?', default='sqlite:///bench_velocity.db')
+parser.add_argument('--rows', type=int, default=1000000)
+parser.add_argument('--accounts', type=int, default=1000)
+parser.add_argument('--lookups', type=int, default=5000)
+args = parser.parse_args()
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db.init_app(app)
+
+WINDOW = timedelta(minutes=5)
+
+
+def seed():
+    """Spread args.rows transfers over the last day between args.accounts accounts"""
+    db.drop_all()
+    db.create_all()
+
+    user = User(
+        user_id=uuid.uuid4(),
+        mobile_number="+923000000000",
+        email="bench@example.com",
+        full_name="Bench User",
+        pin_hash=generate_password_hash("123456"),
+        cnic_number="00000-0000000-0"
+    )
+    db.session.add(user)
+    accounts = [Account(account_id=uuid.uuid4(), user_id=user.user_id,
+                        account_number=f"SA{i:010d}", balance_cents=0)
+                for i in range(args.accounts)]
+    db.session.add_all(accounts)
+    db.session.commit()
+
+    account_ids = [acc.account_id for acc in accounts]
+    now = datetime.utcnow()
+    for start in range(0, args.rows, 50000):
+        rows = []
+        for _ in range(min(50000, args.rows - start)):
+            source, target = random.sample(account_ids, 2)
+            created_at = now - timedelta(seconds=random.uniform(0, 86400))
+            rows.append({
+                'transaction_id': uuid.uuid4(), 'from_account_id': source, 'to_account_id': target,
+                'amount_cents': 100, 'transaction_type': 'transfer', 'status': 'completed',
+                'is_fraudulent': False, 'created_at': created_at, 'completed_at': created_at
+            })
+        db.session.execute(insert(Transaction.__table__), rows)
+        db.session.commit()
+    return account_ids, now
+
+
+def time_lookups(label, lookup, account_ids, now):
+    samples = [random.choice(account_ids) for _ in range(args.lookups)]
+    started = time.perf_counter()
+    for account_id in samples:
+        lookup(account_id, now)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed / args.lookups * 1e6:10.1f} us/lookup")
+
+
+def main():
+    with app.app_context():
+        account_ids, now = seed()
+        print(f"Seeded {args.rows} transactions over {args.accounts} accounts")
+
+        def count_query(account_id, timestamp):
+            return Transaction.query.filter(
+                Transaction.from_account_id == account_id,
+                Transaction.created_at > timestamp - WINDOW
+            ).count()
+
+        recent = db.session.execute(
+            select(Transaction.transaction_id, Transaction.from_account_id, Transaction.created_at)
+            .where(Transaction.created_at > now - WINDOW)
+        ).all()
+
+        memory = VelocityTracker(window=WINDOW)
+        started = time.perf_counter()
+        memory.seed(recent)
+        print(f"Seeded in-memory tracker from {len(recent)} rows in {time.perf_counter() - started:.3f}s")
+
+        shared = SharedVelocityTracker(tempfile.mktemp(suffix='.db'), window=WINDOW)
+        shared.seed(recent)
+
+        time_lookups("COUNT query", count_query, account_ids, now)
+        time_lookups("VelocityTracker", memory.count, account_ids, now)
+        time_lookups("SharedVelocityTracker", shared.count, account_ids, now)
+
+
+if __name__ == "__main__":
+    main()
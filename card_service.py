@@ -1,6 +1,5 @@
 import logging
 import random
-import uuid
 from datetime import datetime, timedelta
 
 from sqlalchemy.exc import SQLAlchemyError
@@ -8,6 +7,7 @@ from werkzeug.exceptions import NotFound, Forbidden
 
 from app import db
 from app.models import Card, Account
+from app.utils.ids import uuid7
 from app.utils.validators import validate_card_expiry
 
 logger = logging.getLogger(__name__)
@@ -44,7 +44,7 @@ class CardService:
             cvv = f"{random.randint(0, 999):03d}"
 
             card = Card(
-                card_id=uuid.uuid4(),
+                card_id=uuid7(),
                 account_id=account_id,
                 card_number=card_number,
                 expiry_date=expiry_date,
@@ -100,7 +100,7 @@ class CardService:
             cvv = f"{random.randint(0, 999):03d}"
 
             card = Card(
-                card_id=uuid.uuid4(),
+                card_id=uuid7(),
                 account_id=account_id,
                 card_number=card_number,
                 expiry_date=expiry_date,
@@ -138,7 +138,11 @@ class CardService:
             List[Dict]: List of card details
         """
         try:
-            query = db.session.query(Card).join(Account).filter(Account.user_id == user_id)
+            # Project only the listed columns; no Card entities, hashes or JSON are loaded
+            query = db.session.query(
+                Card.card_id, Card.card_number, Card.expiry_date, Card.is_virtual,
+                Card.is_active, Card.created_at
+            ).join(Account).filter(Account.user_id == user_id)
 
             if account_id:
                 # Verify account ownership
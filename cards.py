@@ -5,6 +5,7 @@ from werkzeug.exceptions import BadRequest, NotFound, Forbidden
 from flask_login import login_required, current_user
 
 from app.services.card_service import CardService
+from app.services.read_models import ReadModelService
 
 cards_bp = Blueprint('cards', __name__)
 logger = logging.getLogger(__name__)
@@ -17,20 +18,13 @@ def get_cards():
     try:
         account_id = request.args.get('account_id')
 
-        cards = CardService.get_user_cards(current_user.user_id, account_id)
-
-        logger.info(f"Retrieved cards for user {current_user.user_id}")
-        
         if request.is_json or request.headers.get('Accept') == 'application/json':
-            return jsonify([{
-                'card_id': card['card_id'],
-                'last_four': card['last_four'],
-                'expiry_date': card['expiry_date'],
-                'is_virtual': card['is_virtual'],
-                'is_active': card['is_active'],
-                'created_at': card['created_at']
-            } for card in cards]), 200
+            rows = ReadModelService.card_rows(current_user.user_id, account_id)
+            logger.info(f"Retrieved cards for user {current_user.user_id}")
+            return jsonify([row.to_json() for row in rows]), 200
         else:
+            cards = CardService.get_user_cards(current_user.user_id, account_id)
+            logger.info(f"Retrieved cards for user {current_user.user_id}")
             return render_template('cards.html', cards=cards, account_id=account_id)
 
     except Forbidden as e:
@@ -25,6 +25,98 @@ class Config:
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = 3600
+    
+    # Background fraud worker
+    FRAUD_WORKER_BATCH_SIZE = int(os.getenv('FRAUD_WORKER_BATCH_SIZE', 500))
+    FRAUD_WORKER_POLL_INTERVAL = float(os.getenv('FRAUD_WORKER_POLL_INTERVAL', 1.0))  # seconds
+    
+    # Velocity counters for the high-frequency fraud rule ('memory' or 'sqlite')
+    VELOCITY_BACKEND = os.getenv('VELOCITY_BACKEND', 'memory')
+    VELOCITY_STORE_PATH = os.getenv('VELOCITY_STORE_PATH', '/tmp/banking_velocity.db')
+    VELOCITY_BUCKET_SECONDS = int(os.getenv('VELOCITY_BUCKET_SECONDS', 10))
+    
+    # Fraud rules evaluated by the fraud worker; shadow rules only log matches
+    FRAUD_RULES = [
+        {'id': 'large_amount', 'type': 'threshold', 'amount': 50000,
+         'score': 0.8, 'reason': 'Large transaction amount'},
+        {'id': 'high_frequency', 'type': 'velocity', 'max_count': 3,
+         'score': 0.6, 'reason': 'High frequency transactions'},
+        {'id': 'new_recipient', 'type': 'new_recipient', 'min_amount': 10000,
+         'score': 0.4, 'reason': 'Large transfer to new recipient', 'shadow': True},
+        {'id': 'round_amount', 'type': 'round_amount', 'multiple': 1000, 'min_amount': 10000,
+         'score': 0.2, 'reason': 'Round amount transfer', 'shadow': True},
+        {'id': 'night_time', 'type': 'time_of_day', 'start_hour': 0, 'end_hour': 5, 'min_amount': 5000,
+         'score': 0.3, 'reason': 'Transfer at unusual hour', 'shadow': True},
+        {'id': 'amount_anomaly', 'type': 'amount_zscore', 'max_z': 4.0, 'min_amount': 1000,
+         'score': 0.5, 'reason': 'Amount unusual for account', 'shadow': True},
+        {'id': 'new_counterparty', 'type': 'new_counterparty', 'min_amount': 10000,
+         'score': 0.3, 'reason': 'Counterparty new to account', 'shadow': True},
+        {'id': 'unusual_hour', 'type': 'unusual_hour', 'max_hours': 6, 'min_amount': 5000,
+         'score': 0.3, 'reason': 'Hour unusual for account', 'shadow': True},
+    ]
+    
+    # Idempotency keys for money-moving endpoints
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 86400))  # seconds a key is honoured
+    IDEMPOTENCY_CACHE_SIZE = 10000  # completed responses kept in each worker's LRU
+    IDEMPOTENCY_WAIT_TIMEOUT = 10  # seconds a duplicate waits for the in-flight request
+    IDEMPOTENCY_LEASE = int(os.getenv('IDEMPOTENCY_LEASE', 60))  # seconds before a stuck claim can be taken over
+    IDEMPOTENCY_SWEEP_INTERVAL = 300  # seconds between expired key sweeps
+    
+    # Group commit: share one database commit between deposits/transfers arriving
+    # within GROUP_COMMIT_WINDOW_MS of each other in the same worker (Postgres only)
+    GROUP_COMMIT_ENABLED = os.getenv('GROUP_COMMIT_ENABLED', 'false').lower() == 'true'
+    GROUP_COMMIT_WINDOW_MS = float(os.getenv('GROUP_COMMIT_WINDOW_MS', 2))
+    GROUP_COMMIT_MAX_OPS = int(os.getenv('GROUP_COMMIT_MAX_OPS', 64))
+    GROUP_COMMIT_WAIT_TIMEOUT = float(os.getenv('GROUP_COMMIT_WAIT_TIMEOUT', 5))  # seconds before committing directly
+    
+    # Dashboard summary cache, per worker; TTL bounds staleness from other workers' writes
+    SUMMARY_CACHE_TTL = int(os.getenv('SUMMARY_CACHE_TTL', 10))  # seconds
+    SUMMARY_CACHE_SIZE = 10000
+    SUMMARY_RECENT_LIMIT = 5  # recent transactions shown on the dashboard
+    
+    # Bearer token for GET /metrics; the endpoint is disabled when unset
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    
+    # Per-request SQL statement budget; logs requests over budget or with repeated statements
+    QUERY_BUDGET_ENABLED = os.getenv('QUERY_BUDGET_ENABLED', 'false').lower() == 'true'
+    QUERY_BUDGET_MAX_STATEMENTS = int(os.getenv('QUERY_BUDGET_MAX_STATEMENTS', 20))
+    QUERY_BUDGET_REPEAT_THRESHOLD = int(os.getenv('QUERY_BUDGET_REPEAT_THRESHOLD', 5))
+    
+    # Seconds between compactions of hot accounts' balance shards into the account row
+    BALANCE_COMPACT_INTERVAL = int(os.getenv('BALANCE_COMPACT_INTERVAL', 60))
+    
+    # PIN hashing: Werkzeug method string and the per-worker process pool running it
+    # (0 workers hashes inline); logins rehash PINs stored with another method
+    PIN_HASH_METHOD = os.getenv('PIN_HASH_METHOD', 'scrypt:32768:8:1')
+    PIN_HASH_WORKERS = int(os.getenv('PIN_HASH_WORKERS', 2))
+    PIN_HASH_TIMEOUT = float(os.getenv('PIN_HASH_TIMEOUT', 10))  # seconds
+    
+    # Reverse proxies in front of the app whose X-Forwarded-For entries are trusted;
+    # 0 when clients connect directly, or anyone could spoof their throttle IP
+    PROXY_COUNT = int(os.getenv('PROXY_COUNT', 1))
+    
+    # Login throttle: failed logins per mobile number (which locks the account) and per
+    # client IP within the window; 'sqlite' shares the counts between workers on a host
+    LOGIN_THROTTLE_BACKEND = os.getenv('LOGIN_THROTTLE_BACKEND', 'sqlite')
+    LOGIN_THROTTLE_PATH = os.getenv('LOGIN_THROTTLE_PATH', '/tmp/banking_login_throttle.db')
+    LOGIN_THROTTLE_WINDOW = int(os.getenv('LOGIN_THROTTLE_WINDOW', 900))  # seconds
+    LOGIN_THROTTLE_BUCKET_SECONDS = 30
+    LOGIN_MAX_FAILURES = 5
+    LOGIN_MAX_IP_FAILURES = int(os.getenv('LOGIN_MAX_IP_FAILURES', 100))
+    
+    # Flask-Login user snapshots cached per worker; the TTL bounds how long a lockout
+    # or other change committed by another worker takes to apply
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 30))  # seconds
+    USER_CACHE_SIZE = 10000
+    
+    # OTP storage: 'database', 'sqlite' (file shared by the workers on one host) or 'memory'
+    OTP_BACKEND = os.getenv('OTP_BACKEND', 'database')
+    OTP_STORE_PATH = os.getenv('OTP_STORE_PATH', '/tmp/banking_otps.db')
+    OTP_PURGE_INTERVAL = 300  # seconds between purges of expired and used OTPs
+    
+    # Behavioural baselines: EWMA smoothing factor and history needed before scoring
+    BASELINE_ALPHA = 0.1
+    BASELINE_MIN_COUNT = 10
 
 
 class DevelopmentConfig(Config):
@@ -32,6 +124,7 @@ class DevelopmentConfig(Config):
     DEBUG = True
     TESTING = False
     SESSION_COOKIE_SECURE = False  # Allow HTTP in development
+    QUERY_BUDGET_ENABLED = True
     
 
 class ProductionConfig(Config):
@@ -44,4 +137,8 @@ class TestingConfig(Config):
     """Testing environment configuration."""
     TESTING = True
     DEBUG = True
+    QUERY_BUDGET_ENABLED = True
+    PIN_HASH_METHOD = 'pbkdf2:sha256:1000'  # cheap hashes keep tests fast
+    PIN_HASH_WORKERS = 0
+    LOGIN_THROTTLE_BACKEND = 'memory'
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory database for testing
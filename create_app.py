@@ -27,13 +27,19 @@ def create_app(config_class='config.DevelopmentConfig'):
     # Load configuration
     app.config.from_object(config_class)
     
-    # Configure for proxy use if behind one
-    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    # Configure for proxy use if behind one; trusting X-Forwarded-For from
+    # PROXY_COUNT proxies makes remote_addr the client, which the login throttle keys on
+    proxies = app.config['PROXY_COUNT']
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=1, x_host=1)
     
     # Initialize extensions
     from app import db
     db.init_app(app)
     
+    # Count SQL statements per request when QUERY_BUDGET_ENABLED
+    from app.utils.query_budget import init_query_budget
+    init_query_budget(app)
+    
     # Setup login manager
     from app.services.login_manager import setup_login_manager
     setup_login_manager(app)
@@ -61,4 +67,16 @@ def create_app(config_class='config.DevelopmentConfig'):
         db.create_all()
         logging.info("Database tables created or verified")
     
+    # Share commits between concurrent money-moving writes when enabled
+    from app.services.group_commit import start_group_commit
+    start_group_commit(app)
+    
+    # Expire stale idempotency keys in the background
+    from app.utils.idempotency import start_idempotency_sweeper
+    start_idempotency_sweeper(app)
+    
+    # Purge expired and used OTPs in the background
+    from app.services.otp_store import start_otp_sweeper
+    start_otp_sweeper(app)
+    
     return app
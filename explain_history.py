@@ -0,0 +1,132 @@
+"""
+EXPLAIN regression check for the transaction history queries
+
+Seeds a Postgres database, captures the SQL issued by
+TransactionService.get_transaction_history / get_transaction_details and
+fails if the planner falls back to a sequential scan of transactions:
+
+    python explain_history.py postgresql://localhost/bank_explain
+"""
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event, insert
+from werkzeug.security import generate_password_hash
+
+from app.models import User, Account, Transaction, db
+from app.services.transaction_service import TransactionService
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = sys.argv[1] if len(sys.argv) > 1 else "postgresql://localhost/bank_explain"
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db.init_app(app)
+
+USERS = 200
+ACCOUNTS_PER_USER = 2
+TRANSACTIONS = 200000
+
+
+def seed():
+    """Create users, accounts and a realistic volume of transactions"""
+    db.drop_all()
+    db.create_all()
+
+    users = [User(
+        user_id=uuid.uuid4(),
+        mobile_number=f"+92300{i:07d}",
+        email=f"user{i}@example.com",
+        full_name=f"User {i}",
+        pin_hash=generate_password_hash("123456"),
+        cnic_number=f"{i:05d}-0000000-0"
+    ) for i in range(USERS)]
+    db.session.add_all(users)
+
+    accounts = [Account(
+        account_id=uuid.uuid4(),
+        user_id=user.user_id,
+        account_number=f"SA{n:05d}{i:05d}",
+        balance_cents=0
+    ) for n, user in enumerate(users) for i in range(ACCOUNTS_PER_USER)]
+    db.session.add_all(accounts)
+    db.session.commit()
+
+    account_ids = [acc.account_id for acc in accounts]
+    start = datetime.utcnow() - timedelta(days=365)
+    rows = []
+    for _ in range(TRANSACTIONS):
+        source, target = random.sample(account_ids, 2)
+        created_at = start + timedelta(seconds=random.randint(0, 365 * 86400))
+        rows.append({
+            'transaction_id': uuid.uuid4(),
+            'from_account_id': source,
+            'to_account_id': target,
+            'amount_cents': 100,
+            'transaction_type': 'transfer',
+            'status': 'completed',
+            'is_fraudulent': False,
+            'created_at': created_at,
+            'completed_at': created_at
+        })
+    db.session.execute(insert(Transaction.__table__), rows)
+    db.session.commit()
+    db.session.execute(db.text("ANALYZE"))
+    return users[0].user_id, account_ids[0]
+
+
+def capture(func, *args, **kwargs):
+    """Run func and return every (statement, parameters) touching transactions"""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if 'transactions' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        func(*args, **kwargs)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return statements
+
+
+def explain(statement, parameters):
+    """Return the EXPLAIN plan text for a raw statement"""
+    connection = db.session.connection().connection
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN " + statement, parameters)
+        return "\n".join(row[0] for row in cursor.fetchall())
+
+
+def main():
+    with app.app_context():
+        user_id, account_id = seed()
+        page = TransactionService.get_transaction_history(user_id, limit=50)
+        cursor = TransactionService.encode_cursor(page[-1])
+
+        checks = {
+            'history (all accounts)': capture(
+                TransactionService.get_transaction_history, user_id, limit=50),
+            'history (one account)': capture(
+                TransactionService.get_transaction_history, user_id, account_id=account_id, limit=50),
+            'history (cursor page)': capture(
+                TransactionService.get_transaction_history, user_id, limit=50, cursor=cursor),
+            'details': capture(
+                TransactionService.get_transaction_details, user_id, page[0].transaction_id),
+        }
+
+        failed = False
+        for name, statements in checks.items():
+            for statement, parameters in statements:
+                plan = explain(statement, parameters)
+                ok = 'Seq Scan on transactions' not in plan
+                failed = failed or not ok
+                print(f"== {name}: {'OK' if ok else 'SEQ SCAN'}\n{plan}\n")
+
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Declarative fraud rules engine
+
+Rules are declared in config (FRAUD_RULES), compiled once into NumPy mask
+functions and evaluated over whole batches of transactions at a time.
+Rules marked shadow are evaluated and logged but never raise alerts.
+Amount parameters are declared in major units and compiled to cents, so
+rules compare plain integers against the batch's amount_cents column.
+
+Rule types:
+    threshold         amount > amount
+    velocity          transfers from the source account in the window > max_count
+    new_recipient     first transfer between the two accounts, amount >= min_amount
+    round_amount      amount is a multiple of `multiple`, amount >= min_amount
+    time_of_day       created between start_hour and end_hour (UTC), amount >= min_amount
+    amount_zscore     amount z-score against the account baseline > max_z, amount >= min_amount
+    new_counterparty  counterparty missing from the account baseline, amount >= min_amount
+    unusual_hour      hours from the account baseline's typical hour > max_hours, amount >= min_amount
+"""
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from app.utils.money import parse_cents
+
+logger = logging.getLogger(__name__)
+
+Hit = namedtuple('Hit', ['index', 'rule_id', 'score', 'reason', 'shadow'])
+
+
+class TransactionBatch:
+    """Column arrays describing a batch of transactions, aligned by index"""
+
+    def __init__(self, transaction_ids, amounts, hours, velocity, new_recipient,
+                 zscore=None, new_counterparty=None, hour_distance=None):
+        self.transaction_ids = transaction_ids
+        self.amount = np.asarray(amounts, dtype=np.int64)  # cents
+        self.hour = np.asarray(hours, dtype=np.int8)
+        self.velocity = np.asarray(velocity, dtype=np.int32)
+        self.new_recipient = np.asarray(new_recipient, dtype=bool)
+        self.zscore = np.zeros(len(transaction_ids)) if zscore is None else np.asarray(zscore, dtype=np.float64)
+        self.new_counterparty = (np.zeros(len(transaction_ids), dtype=bool) if new_counterparty is None
+                                 else np.asarray(new_counterparty, dtype=bool))
+        self.hour_distance = (np.zeros(len(transaction_ids)) if hour_distance is None
+                              else np.asarray(hour_distance, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.transaction_ids)
+
+
+def _threshold(rule):
+    threshold = parse_cents(rule['amount'])
+    return lambda batch: batch.amount > threshold
+
+
+def _velocity(rule):
+    max_count = int(rule['max_count'])
+    return lambda batch: batch.velocity > max_count
+
+
+def _new_recipient(rule):
+    min_amount = parse_cents(rule.get('min_amount', 0))
+    return lambda batch: batch.new_recipient & (batch.amount >= min_amount)
+
+
+def _round_amount(rule):
+    multiple = parse_cents(rule['multiple'])
+    min_amount = parse_cents(rule.get('min_amount', 0))
+    return lambda batch: (np.mod(batch.amount, multiple) == 0) & (batch.amount >= min_amount)
+
+
+def _time_of_day(rule):
+    start, end = int(rule['start_hour']), int(rule['end_hour'])
+    min_amount = parse_cents(rule.get('min_amount', 0))
+    if start <= end:
+        return lambda batch: (batch.hour >= start) & (batch.hour < end) & (batch.amount >= min_amount)
+    # Window wraps past midnight, e.g. 22 -> 5
+    return lambda batch: ((batch.hour >= start) | (batch.hour < end)) & (batch.amount >= min_amount)
+
+
+def _amount_zscore(rule):
+    max_z = float(rule['max_z'])
+    min_amount = parse_cents(rule.get('min_amount', 0))
+    return lambda batch: (batch.zscore > max_z) & (batch.amount >= min_amount)
+
+
+def _new_counterparty(rule):
+    min_amount = parse_cents(rule.get('min_amount', 0))
+    return lambda batch: batch.new_counterparty & (batch.amount >= min_amount)
+
+
+def _unusual_hour(rule):
+    max_hours = float(rule['max_hours'])
+    min_amount = parse_cents(rule.get('min_amount', 0))
+    return lambda batch: (batch.hour_distance > max_hours) & (batch.amount >= min_amount)
+
+
+RULE_TYPES = {
+    'threshold': _threshold,
+    'velocity': _velocity,
+    'new_recipient': _new_recipient,
+    'round_amount': _round_amount,
+    'time_of_day': _time_of_day,
+    'amount_zscore': _amount_zscore,
+    'new_counterparty': _new_counterparty,
+    'unusual_hour': _unusual_hour,
+}
+
+
+class RulesEngine:
+    """Compiled set of fraud rules"""
+
+    def __init__(self, rules):
+        """
+        Compile rule declarations
+        Args:
+            rules: List of rule dicts with id, type, score, reason, shadow and type parameters
+        Raises:
+            ValueError: If a rule has an unknown type or missing parameters
+        """
+        self.rules = []
+        for rule in rules:
+            if rule.get('type') not in RULE_TYPES:
+                raise ValueError(f"Unknown fraud rule type for {rule.get('id')}: {rule.get('type')}")
+            try:
+                mask = RULE_TYPES[rule['type']](rule)
+            except KeyError as e:
+                raise ValueError(f"Fraud rule {rule.get('id')} is missing parameter {e}")
+            self.rules.append((
+                rule['id'],
+                rule['type'],
+                mask,
+                float(rule.get('score', 1.0)),
+                rule.get('reason', rule['id']),
+                bool(rule.get('shadow', False))
+            ))
+
+    @property
+    def needs_new_recipient(self):
+        """Whether any rule reads the new_recipient column"""
+        return any(rule_type == 'new_recipient' for _, rule_type, *_ in self.rules)
+
+    def evaluate(self, batch):
+        """
+        Score a batch against every rule
+        Args:
+            batch: TransactionBatch
+        Returns:
+            List[Hit]: One hit per (transaction, rule) match; shadow hits are logged
+        """
+        hits = []
+        if not len(batch):
+            return hits
+
+        for rule_id, _, mask, score, reason, shadow in self.rules:
+            matched = np.flatnonzero(mask(batch))
+            if shadow and len(matched):
+                logger.info(f"Shadow fraud rule {rule_id} matched {len(matched)} of {len(batch)} transactions")
+            hits.extend(Hit(int(index), rule_id, score, reason, shadow) for index in matched)
+        return hits
@@ -0,0 +1,237 @@
+"""
+Background fraud worker
+
+Transfers enqueue a FraudCheckJob in the same database transaction as the
+transfer itself. This worker drains that queue in batches, evaluates the
+fraud rules over the whole batch and writes FraudAlert rows in bulk.
+
+    python -m app.services.fraud_worker            # run until interrupted
+    python -m app.services.fraud_worker --once     # drain one batch
+    python -m app.services.fraud_worker --stats    # print queue depth/lag
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import Transaction, FraudAlert, FraudCheckJob
+from app.services.baselines import BaselineService
+from app.services.fraud_rules import RulesEngine, TransactionBatch
+from app.services.velocity import create_tracker
+from app.utils.ids import uuid7
+
+logger = logging.getLogger(__name__)
+
+# Window for the velocity column fed to the rules engine
+VELOCITY_WINDOW = timedelta(minutes=5)
+
+# Rules engine and velocity tracker for this worker process, built on first use
+_engine = None
+_tracker = None
+
+
+class FraudWorker:
+
+    @staticmethod
+    def run_once(batch_size=500):
+        """
+        Claim and process one batch of queued fraud checks
+        Args:
+            batch_size: Max jobs to claim
+        Returns:
+            int: Number of jobs processed
+        """
+        try:
+            # SKIP LOCKED lets several workers drain the queue side by side
+            jobs = db.session.execute(
+                select(FraudCheckJob.job_id, FraudCheckJob.transaction_id)
+                .order_by(FraudCheckJob.job_id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+
+            if not jobs:
+                db.session.commit()
+                return 0
+
+            transactions = db.session.execute(
+                select(
+                    Transaction.transaction_id,
+                    Transaction.from_account_id,
+                    Transaction.to_account_id,
+                    Transaction.amount_cents,
+                    Transaction.created_at
+                ).where(Transaction.transaction_id.in_([job.transaction_id for job in jobs]))
+            ).all()
+
+            alerts = FraudWorker.evaluate(transactions)
+            if alerts:
+                db.session.execute(insert(FraudAlert.__table__), alerts)
+
+            db.session.execute(
+                delete(FraudCheckJob).where(FraudCheckJob.job_id.in_([job.job_id for job in jobs]))
+            )
+            db.session.commit()
+
+            logger.info(f"Processed {len(jobs)} fraud checks, raised {len(alerts)} alerts")
+            return len(jobs)
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            # The batch will be retried; the tracker counts each transaction_id once
+            logger.error(f"Fraud check batch failed: {str(e)}")
+            return 0
+
+    @staticmethod
+    def evaluate(transactions):
+        """
+        Score a batch of transactions with the configured fraud rules
+        Args:
+            transactions: Rows with transaction_id, from_account_id, to_account_id, amount_cents, created_at
+        Returns:
+            List[Dict]: FraudAlert rows for non-shadow rule hits, ready for a bulk insert
+        """
+        engine = FraudWorker.get_engine()
+        tracker = FraudWorker.get_tracker()
+        transactions = sorted(transactions, key=lambda txn: txn.created_at)
+
+        known_pairs = FraudWorker._known_pairs(transactions) if engine.needs_new_recipient else set()
+        velocity = []
+        new_recipient = []
+        for txn in transactions:
+            if txn.from_account_id:
+                tracker.record(txn.from_account_id, txn.created_at, event_id=txn.transaction_id)
+                velocity.append(tracker.count(txn.from_account_id, txn.created_at))
+                pair = (txn.from_account_id, txn.to_account_id)
+                new_recipient.append(pair not in known_pairs)
+                known_pairs.add(pair)
+            else:
+                velocity.append(0)
+                new_recipient.append(False)
+
+        signals = BaselineService.observe(transactions)
+        batch = TransactionBatch(
+            transaction_ids=[txn.transaction_id for txn in transactions],
+            amounts=[txn.amount_cents for txn in transactions],
+            hours=[txn.created_at.hour for txn in transactions],
+            velocity=velocity,
+            new_recipient=new_recipient,
+            zscore=signals.zscore,
+            new_counterparty=signals.new_counterparty,
+            hour_distance=signals.hour_distance
+        )
+
+        now = datetime.utcnow()
+        return [{
+            'alert_id': uuid7(),
+            'transaction_id': batch.transaction_ids[hit.index],
+            'reason': hit.reason,
+            'rule_id': hit.rule_id,
+            'score': hit.score,
+            'action_taken': 'flagged',
+            'created_at': now
+        } for hit in engine.evaluate(batch) if not hit.shadow]
+
+    @staticmethod
+    def queue_stats():
+        """
+        Report fraud queue depth and lag
+        Returns:
+            Dict: depth (queued jobs) and lag_seconds (age of the oldest job)
+        """
+        depth, oldest = db.session.execute(
+            select(func.count(FraudCheckJob.job_id), func.min(FraudCheckJob.created_at))
+        ).one()
+        lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+        return {'depth': depth, 'lag_seconds': round(lag, 3)}
+
+    @staticmethod
+    def run_forever(batch_size=500, poll_interval=1.0):
+        """Drain the queue continuously, sleeping only when it is empty"""
+        logger.info(f"Fraud worker started (batch_size={batch_size})")
+        last_report = 0.0
+        while True:
+            processed = FraudWorker.run_once(batch_size)
+
+            if time.monotonic() - last_report >= 10:
+                stats = FraudWorker.queue_stats()
+                logger.info(f"Fraud queue depth={stats['depth']} lag={stats['lag_seconds']}s")
+                last_report = time.monotonic()
+
+            if processed < batch_size:
+                time.sleep(poll_interval)
+
+    @staticmethod
+    def get_tracker():
+        """Return the velocity tracker, seeding it from the database on first use"""
+        global _tracker
+        if _tracker is None:
+            tracker = create_tracker(current_app.config, VELOCITY_WINDOW)
+            # Transfers still queued are recorded when their job is processed
+            queued = select(FraudCheckJob.transaction_id)
+            rows = db.session.execute(
+                select(
+                    Transaction.transaction_id, Transaction.from_account_id, Transaction.created_at
+                ).where(
+                    Transaction.from_account_id.isnot(None),
+                    Transaction.created_at > datetime.utcnow() - VELOCITY_WINDOW,
+                    Transaction.transaction_id.notin_(queued)
+                )
+            ).all()
+            tracker.seed(rows)
+            logger.info(f"Velocity tracker seeded with {len(rows)} recent transfers")
+            _tracker = tracker
+        return _tracker
+
+    @staticmethod
+    def get_engine():
+        """Return the rules engine, compiling FRAUD_RULES on first use"""
+        global _engine
+        if _engine is None:
+            _engine = RulesEngine(current_app.config['FRAUD_RULES'])
+        return _engine
+
+    @staticmethod
+    def _known_pairs(transactions):
+        """(from, to) account pairs that already transacted before this batch"""
+        transfers = [txn for txn in transactions if txn.from_account_id]
+        if not transfers:
+            return set()
+        rows = db.session.execute(
+            select(Transaction.from_account_id, Transaction.to_account_id).where(
+                Transaction.from_account_id.in_({txn.from_account_id for txn in transfers}),
+                Transaction.to_account_id.in_({txn.to_account_id for txn in transfers}),
+                Transaction.created_at < transfers[0].created_at
+            ).distinct()
+        ).all()
+        return {(row.from_account_id, row.to_account_id) for row in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain the fraud check queue")
+    parser.add_argument('--once', action='store_true', help='process a single batch and exit')
+    parser.add_argument('--stats', action='store_true', help='print queue depth and lag and exit')
+    args = parser.parse_args()
+
+    from create_app import create_app
+    app = create_app(config_class=os.getenv('FLASK_CONFIG', 'config.DevelopmentConfig'))
+
+    with app.app_context():
+        batch_size = app.config['FRAUD_WORKER_BATCH_SIZE']
+        if args.stats:
+            print(json.dumps(FraudWorker.queue_stats()))
+        elif args.once:
+            FraudWorker.run_once(batch_size)
+        else:
+            FraudWorker.run_forever(batch_size, app.config['FRAUD_WORKER_POLL_INTERVAL'])
+
+
+if __name__ == '__main__':
+    main()
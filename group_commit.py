@@ -0,0 +1,234 @@
+"""
+Group commit for money-moving writes
+
+With GROUP_COMMIT_ENABLED, deposits and transfers from every request thread
+in a worker are handed to a single committer thread. It collects them for up
+to GROUP_COMMIT_WINDOW_MS or GROUP_COMMIT_MAX_OPS, runs each inside its own
+SAVEPOINT and commits them together, so one WAL flush covers the whole
+group. A failing item only rolls back its savepoint; each caller gets its own
+result or exception.
+
+Row locks taken by an item are held until the group commits, i.e. for up to
+one window longer than without grouping. Items therefore lock accounts
+outside the global account_id order, and two groups can deadlock; when any
+item or the commit hits a deadlock or serialization failure the whole group
+is rolled back and run again.
+
+A caller waits at most GROUP_COMMIT_WAIT_TIMEOUT for the committer to pick
+its write up. If the committer thread has died, or the write is still
+queued when the wait runs out, submit() withdraws it and raises
+GroupCommitUnavailable, and the caller commits on its own thread instead.
+"""
+import logging
+import queue
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.utils.metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+batch_sizes = histogram('group_commit_batch_size', (1, 2, 4, 8, 16, 32, 64, 128, 256))
+window_ms = histogram('group_commit_window_ms', (0.25, 0.5, 1, 2, 4, 8, 16, 32))
+commit_ms = histogram('group_commit_commit_ms', (0.5, 1, 2, 4, 8, 16, 32, 64, 128))
+
+# Attempts at a group that keeps hitting deadlocks or serialization failures
+MAX_GROUP_RETRIES = 5
+GROUP_RETRY_BACKOFF = 0.01  # seconds, doubled on each attempt
+
+# The worker's committer, set by start_group_commit()
+_committer = None
+
+
+class GroupCommitUnavailable(RuntimeError):
+    """The write was not applied by the committer and should be committed directly"""
+
+
+class _Pending:
+    """One submitted write and its outcome"""
+
+    __slots__ = ('apply', 'args', 'result', 'error', 'done', 'state')
+
+    def __init__(self, apply, args):
+        self.apply = apply
+        self.args = args
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        self.state = 'queued'  # queued, running, withdrawn
+
+
+class GroupCommitter:
+    """Single thread that applies submitted writes in shared transactions"""
+
+    def __init__(self, app, window, max_ops, wait_timeout):
+        self.app = app
+        self.window = window
+        self.max_ops = max_ops
+        self.wait_timeout = wait_timeout
+        self._queue = queue.Queue()
+        self._state_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, apply, *args):
+        """
+        Run apply(*args) in the next group transaction and wait for the commit
+        Args:
+            apply: Callable that writes through db.session without committing
+        Returns:
+            The return value of apply
+        Raises:
+            GroupCommitUnavailable: If the committer is dead or did not pick the write
+                up within wait_timeout; apply was not run and nothing was committed
+            Whatever apply raised, or the commit error if the group failed
+        """
+        if not self._thread.is_alive():
+            raise GroupCommitUnavailable("Group committer thread is not running")
+        pending = _Pending(apply, args)
+        self._queue.put(pending)
+        while not pending.done.wait(self.wait_timeout):
+            # A dead committer never commits a write it did not finish, so the caller may retry it
+            if not self._thread.is_alive():
+                raise GroupCommitUnavailable("Group committer thread died")
+            if self._withdraw(pending):
+                raise GroupCommitUnavailable(f"Group committer did not start the write in {self.wait_timeout}s")
+            # Already running in the current group; its outcome is on the way
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _withdraw(self, pending):
+        """Take a write back if the committer has not started it"""
+        with self._state_lock:
+            if pending.state != 'queued':
+                return False
+            pending.state = 'withdrawn'
+            return True
+
+    def _take(self, pending):
+        """Mark a write as started, unless its caller withdrew it"""
+        with self._state_lock:
+            if pending.state != 'queued':
+                return False
+            pending.state = 'running'
+            return True
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                group = []
+                try:
+                    self._collect(group)
+                    if group:
+                        self._apply(group)
+                except Exception as e:
+                    # Writes not yet marked done were never applied; their callers commit directly
+                    logger.error(f"Group committer failed: {str(e)}")
+                    for pending in group:
+                        if not pending.done.is_set():
+                            pending.result = None
+                            pending.error = GroupCommitUnavailable(f"Group committer failed: {str(e)}")
+                            pending.done.set()
+
+    def _collect(self, group):
+        """Fill group with writes arriving within one window"""
+        pending = self._queue.get()
+        if self._take(pending):
+            group.append(pending)
+        started = time.monotonic()
+        deadline = started + self.window
+        while len(group) < self.max_ops:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if self._take(pending):
+                group.append(pending)
+        window_ms.observe((time.monotonic() - started) * 1000)
+        batch_sizes.observe(len(group))
+
+    def _apply(self, group):
+        from app.services.transaction_service import TransactionService
+
+        try:
+            for attempt in range(1, MAX_GROUP_RETRIES + 1):
+                try:
+                    self._attempt(group)
+                    return
+                except OperationalError as e:
+                    db.session.rollback()
+                    if not TransactionService._is_retryable(e) or attempt == MAX_GROUP_RETRIES:
+                        raise
+                    logger.warning(f"Group of {len(group)} writes conflicted, retrying (attempt {attempt})")
+                    time.sleep(GROUP_RETRY_BACKOFF * (2 ** (attempt - 1)))
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Group commit of {len(group)} writes failed: {str(e)}")
+            for pending in group:
+                if pending.error is None:
+                    pending.result, pending.error = None, e
+        finally:
+            for pending in group:
+                pending.done.set()
+
+    def _attempt(self, group):
+        """
+        Apply every item in its own savepoint and commit
+        Raises:
+            OperationalError: From an item or the commit if it is a retryable
+                conflict, which invalidates the whole group
+        """
+        from app.services.transaction_service import TransactionService
+
+        for pending in group:
+            pending.result = pending.error = None
+            try:
+                with db.session.begin_nested():
+                    pending.result = pending.apply(*pending.args)
+            except OperationalError as e:
+                if TransactionService._is_retryable(e):
+                    raise
+                pending.error = e
+            except Exception as e:
+                pending.error = e
+
+        # Detach returned rows so callers on other threads can read them
+        # after the commit without touching this thread's session
+        for pending in group:
+            if isinstance(pending.result, db.Model):
+                db.session.expunge(pending.result)
+
+        started = time.monotonic()
+        db.session.commit()
+        commit_ms.observe((time.monotonic() - started) * 1000)
+
+
+def start_group_commit(app):
+    """Start the worker's committer if GROUP_COMMIT_ENABLED; SQLite is not supported"""
+    global _committer
+    if not app.config['GROUP_COMMIT_ENABLED']:
+        return None
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            logger.warning("Group commit needs SAVEPOINT support; disabled on SQLite")
+            return None
+    _committer = GroupCommitter(
+        app, app.config['GROUP_COMMIT_WINDOW_MS'] / 1000, app.config['GROUP_COMMIT_MAX_OPS'],
+        app.config['GROUP_COMMIT_WAIT_TIMEOUT']
+    ).start()
+    return _committer
+
+
+def get_group_committer():
+    """The running committer, or None when group commit is off"""
+    return _committer
@@ -1,6 +1,10 @@
-from flask import Blueprint, render_template, redirect, url_for
+import hmac
+
+from flask import Blueprint, current_app, render_template, redirect, url_for, jsonify, request, abort
 from flask_login import current_user
 
+from app.utils import metrics
+
 # Create blueprint
 home_bp = Blueprint('home', __name__)
 
@@ -9,4 +13,14 @@ def index():
     """Handle the root URL - redirect to dashboard if logged in, otherwise show landing page"""
     if current_user.is_authenticated:
         return redirect(url_for('accounts.dashboard'))
-    return render_template('home/index.html')
\ No newline at end of file
+    return render_template('home/index.html')
+
+
+@home_bp.route('/metrics')
+def get_metrics():
+    """In-process metrics for this worker as JSON; needs 'Authorization: Bearer <METRICS_TOKEN>'"""
+    token = current_app.config.get('METRICS_TOKEN')
+    # Unconfigured means disabled, and either way the endpoint's existence isn't revealed
+    if not token or not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        abort(404)
+    return jsonify(metrics.snapshot())
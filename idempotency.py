@@ -0,0 +1,291 @@
+"""
+Idempotency-Key support for money-moving endpoints
+
+The first request with a given key runs normally and its response is stored;
+retries with the same key get the stored response back instead of moving
+money twice. Duplicates that arrive while the first request is still running
+wait for it: in-process via an event, across workers by polling the row.
+
+A claim is a lease of IDEMPOTENCY_LEASE seconds. If its owner dies without
+completing or releasing it, a later request with the key takes the row over
+once the lease has lapsed, so the lease must outlast the slowest request.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from flask_login import current_user
+from sqlalchemy import delete, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Headers replayed with a stored response
+REPLAYED_HEADERS = ('Content-Type', 'Location')
+
+# Rows deleted per statement by the expiry sweep
+SWEEP_CHUNK_SIZE = 1000
+
+# Completed responses by (user_id, key): (expires_at, request_hash, code, body, headers)
+_responses = OrderedDict()
+# Requests running in this process by (user_id, key)
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def idempotent(f):
+    """Honour the Idempotency-Key header on POST requests"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if request.method != 'POST' or not key:
+            return f(*args, **kwargs)
+
+        if len(key) > 255:
+            return jsonify({'error': 'Idempotency-Key is too long', 'code': 'VALIDATION_ERROR'}), 400
+
+        cache_key = (str(current_user.user_id), key)
+        request_hash = hashlib.sha256(
+            request.method.encode() + request.path.encode() + request.get_data()
+        ).hexdigest()
+
+        # Coalesce duplicates within this worker process
+        while True:
+            with _lock:
+                stored = _cached_response(cache_key)
+                if stored is not None:
+                    return _replay(stored, request_hash)
+                event = _in_flight.get(cache_key)
+                if event is None:
+                    event = _in_flight[cache_key] = threading.Event()
+                    break
+            if not event.wait(current_app.config['IDEMPOTENCY_WAIT_TIMEOUT']):
+                return _conflict()
+
+        try:
+            return _execute(f, args, kwargs, cache_key, request_hash)
+        finally:
+            with _lock:
+                _in_flight.pop(cache_key, None)
+            event.set()
+
+    return decorated_function
+
+
+def _execute(f, args, kwargs, cache_key, request_hash):
+    """Claim the key in the database, run the view once and store its response"""
+    expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['IDEMPOTENCY_TTL'])
+    claim = _claim(cache_key, request_hash, expires_at)
+    if claim is None:
+        # Another request owns this key; wait for its outcome or for its lease to lapse
+        stored, claim = _wait_for_completion(cache_key, request_hash, expires_at)
+        if stored:
+            return _replay(stored, request_hash)
+        if claim is None:
+            return _conflict()
+
+    try:
+        response = make_response(f(*args, **kwargs))
+    except Exception:
+        _release(claim)
+        raise
+
+    if response.status_code >= 500:
+        # Let the client retry server errors with the same key
+        _release(claim)
+        return response
+
+    body = response.get_data()
+    headers = {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers}
+    completed = db.session.execute(
+        _owned(claim).values(status='completed', response_code=response.status_code,
+                             response_body=body, response_headers=headers)
+    ).rowcount
+    db.session.commit()
+    if not completed:
+        logger.warning(f"Idempotency key {cache_key[1]} was taken over before its request completed")
+
+    _remember(cache_key, (expires_at, request_hash, response.status_code, body, headers))
+    return response
+
+
+def _claim(cache_key, request_hash, expires_at):
+    """
+    Insert an in-progress row for the key
+    Returns:
+        Tuple: (record id, claimed_at) identifying the lease, or None if the key is taken
+    """
+    now = datetime.utcnow()
+    record = IdempotencyKey(
+        user_id=current_user.user_id,
+        key=cache_key[1],
+        request_hash=request_hash,
+        status='in_progress',
+        claimed_at=now,
+        expires_at=expires_at
+    )
+    db.session.add(record)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return _take_over(cache_key, request_hash, expires_at)
+    return record.id, now
+
+
+def _take_over(cache_key, request_hash, expires_at):
+    """Claim the key's row if it is in progress under a lapsed lease, else return None"""
+    now = datetime.utcnow()
+    lapsed = now - timedelta(seconds=current_app.config['IDEMPOTENCY_LEASE'])
+    table = IdempotencyKey.__table__
+    record_id = db.session.execute(
+        table.update()
+        .where(table.c.user_id == current_user.user_id, table.c.key == cache_key[1],
+               table.c.status == 'in_progress',
+               or_(table.c.claimed_at.is_(None), table.c.claimed_at <= lapsed))
+        .values(claimed_at=now, request_hash=request_hash, expires_at=expires_at)
+        .returning(table.c.id)
+    ).scalar()
+    db.session.commit()
+    if record_id is None:
+        return None
+    logger.warning(f"Took over idempotency key {cache_key[1]} from a request whose lease lapsed")
+    return record_id, now
+
+
+def _owned(claim):
+    """UPDATE of the key's row, matching only while this request still holds the lease"""
+    record_id, claimed_at = claim
+    table = IdempotencyKey.__table__
+    return table.update().where(table.c.id == record_id, table.c.claimed_at == claimed_at)
+
+
+def _wait_for_completion(cache_key, request_hash, expires_at):
+    """
+    Poll the key's row until the owning request completes, its lease lapses or the wait times out
+    Returns:
+        Tuple: (stored response, None) once completed, (None, claim) if this request
+            took the key over, or (None, None) otherwise
+    """
+    deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT_TIMEOUT']
+    lease = timedelta(seconds=current_app.config['IDEMPOTENCY_LEASE'])
+    delay = 0.05
+    while time.monotonic() < deadline:
+        row = db.session.execute(
+            select(IdempotencyKey.status, IdempotencyKey.claimed_at, IdempotencyKey.expires_at,
+                   IdempotencyKey.request_hash, IdempotencyKey.response_code,
+                   IdempotencyKey.response_body, IdempotencyKey.response_headers)
+            .where(IdempotencyKey.user_id == current_user.user_id, IdempotencyKey.key == cache_key[1])
+        ).first()
+        db.session.rollback()
+        if row is None:
+            return None, None
+        if row.status == 'completed':
+            stored = (row.expires_at, row.request_hash, row.response_code,
+                      row.response_body, row.response_headers or {})
+            _remember(cache_key, stored)
+            return stored, None
+        if row.claimed_at is None or row.claimed_at <= datetime.utcnow() - lease:
+            claim = _take_over(cache_key, request_hash, expires_at)
+            if claim:
+                return None, claim
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+    return None, None
+
+
+def _release(claim):
+    """Drop an in-progress claim so the key can be retried, unless it was taken over"""
+    record_id, claimed_at = claim
+    db.session.rollback()
+    db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.id == record_id, IdempotencyKey.claimed_at == claimed_at)
+    )
+    db.session.commit()
+
+
+def _replay(stored, request_hash):
+    expires_at, stored_hash, code, body, headers = stored
+    if stored_hash != request_hash:
+        return jsonify({
+            'error': 'Idempotency-Key was already used with a different request',
+            'code': 'IDEMPOTENCY_KEY_REUSED'
+        }), 422
+    response = current_app.response_class(body, status=code, headers=headers)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _conflict():
+    return jsonify({
+        'error': 'A request with this Idempotency-Key is still in progress',
+        'code': 'IDEMPOTENCY_KEY_IN_PROGRESS'
+    }), 409
+
+
+def _cached_response(cache_key):
+    """Completed response from the LRU, if present and unexpired; caller holds _lock"""
+    stored = _responses.get(cache_key)
+    if stored is None:
+        return None
+    if stored[0] <= datetime.utcnow():
+        del _responses[cache_key]
+        return None
+    _responses.move_to_end(cache_key)
+    return stored
+
+
+def _remember(cache_key, stored):
+    with _lock:
+        _responses[cache_key] = stored
+        _responses.move_to_end(cache_key)
+        while len(_responses) > current_app.config['IDEMPOTENCY_CACHE_SIZE']:
+            _responses.popitem(last=False)
+
+
+def purge_expired_keys():
+    """
+    Delete expired idempotency keys in chunks
+    Returns:
+        int: Number of keys deleted
+    """
+    now = datetime.utcnow()
+    deleted = 0
+    while True:
+        expired = select(IdempotencyKey.id).where(
+            IdempotencyKey.expires_at <= now
+        ).limit(SWEEP_CHUNK_SIZE).scalar_subquery()
+        count = db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired))
+        ).rowcount
+        db.session.commit()
+        deleted += count
+        if count < SWEEP_CHUNK_SIZE:
+            return deleted
+
+
+def start_idempotency_sweeper(app):
+    """Start a daemon thread that purges expired keys every IDEMPOTENCY_SWEEP_INTERVAL seconds"""
+    def sweep():
+        while True:
+            time.sleep(app.config['IDEMPOTENCY_SWEEP_INTERVAL'])
+            with app.app_context():
+                try:
+                    deleted = purge_expired_keys()
+                    if deleted:
+                        logger.info(f"Purged {deleted} expired idempotency keys")
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning(f"Idempotency key sweep failed: {str(e)}")
+
+    thread = threading.Thread(target=sweep, name='idempotency-sweeper', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,59 @@
+"""
+Time-ordered primary keys
+
+uuid7() returns RFC 9562 version 7 UUIDs: a 48-bit Unix millisecond
+timestamp, then a 42-bit counter and 32 random bits. New keys sort after
+older ones, so inserts append to the right edge of the primary key index
+instead of landing on random pages. Within a process keys are strictly
+increasing: the counter is reseeded randomly each millisecond and
+incremented for further keys in the same millisecond, borrowing the next
+millisecond if it overflows or the clock steps back.
+
+Keys remain unguessable enough for URLs (at least 32 random bits each)
+but reveal their creation time; don't use them where that matters.
+"""
+import os
+import threading
+import time
+import uuid
+
+_COUNTER_BITS = 42
+_COUNTER_MAX = (1 << _COUNTER_BITS) - 1
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    """Generate a UUIDv7, monotonic within this process"""
+    global _last_ms, _counter
+
+    now_ms = time.time_ns() // 1_000_000
+    with _lock:
+        if now_ms > _last_ms:
+            # Top counter bit left clear so a busy millisecond has room to count
+            _counter = int.from_bytes(os.urandom(6), 'big') >> (48 - _COUNTER_BITS + 1)
+            _last_ms = now_ms
+        else:
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                _counter = 0
+                _last_ms += 1
+        timestamp_ms, counter = _last_ms, _counter
+
+    tail = int.from_bytes(os.urandom(4), 'big')
+    value = (
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                           # version
+        | (counter >> 30) << 64               # counter high 12 bits (rand_a)
+        | 0b10 << 62                          # variant
+        | (counter & 0x3FFF_FFFF) << 32       # counter low 30 bits
+        | tail
+    )
+    return uuid.UUID(int=value)
+
+
+def uuid7_time(value):
+    """Creation time of a UUIDv7 as Unix milliseconds"""
+    return value.int >> 80
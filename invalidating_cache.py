@@ -0,0 +1,109 @@
+"""
+Per-worker caches dropped by committed writes
+
+An InvalidatingCache holds values per owner (a user_id, say) in an LRU.
+Writes call mark_stale() for the owners they touch, and once the database
+transaction commits every cached value for those owners is dropped. Each
+owner also has an invalidation count: a value loaded while its owner was
+invalidated may predate the write, so it is returned but not cached.
+Writes committed by other workers are picked up when the entry's TTL runs
+out.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.utils.metrics import counter
+
+# Invalidation counts kept per cache; past this many owners they are cleared and
+# the epoch bumped, so loads in flight don't cache
+MAX_GENERATIONS = 100000
+
+
+class InvalidatingCache:
+    """LRU of values per owner, invalidated after commit"""
+
+    def __init__(self, name, ttl_setting, size_setting):
+        """
+        Args:
+            name: Prefix for the hit/miss counters and the Session.info key
+            ttl_setting: Config key holding the seconds an entry stays fresh
+            size_setting: Config key holding the max number of owners cached
+        """
+        self.ttl_setting = ttl_setting
+        self.size_setting = size_setting
+        self._stale_key = f'stale_{name}_cache'
+        self._hits = counter(f'{name}_cache_hits')
+        self._misses = counter(f'{name}_cache_misses')
+        # owner -> {key: (expires_at monotonic, value)}, least recently used first
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+        event.listen(Session, 'after_commit', self._invalidate_after_commit)
+        event.listen(Session, 'after_soft_rollback', self._forget_after_rollback)
+
+    def get(self, owner, key, load):
+        """
+        Return the cached value for (owner, key), or call load() and cache its result
+        Args:
+            owner: Owner the value belongs to, e.g. a user_id
+            key: Distinguishes values of one owner, e.g. query parameters
+            load: Zero-argument function producing the value
+        Returns:
+            The cached or freshly loaded value
+        """
+        owner = str(owner)
+        with self._lock:
+            cached = self._entries.get(owner, {}).get(key)
+            if cached and cached[0] > time.monotonic():
+                self._entries.move_to_end(owner)
+                self._hits.inc()
+                return cached[1]
+            generation = (self._epoch, self._generations.get(owner, 0))
+
+        self._misses.inc()
+        value = load()
+
+        with self._lock:
+            # A write committed while loading may not be in this value; serve it uncached
+            if (self._epoch, self._generations.get(owner, 0)) != generation:
+                return value
+            self._entries.setdefault(owner, {})[key] = (
+                time.monotonic() + current_app.config[self.ttl_setting], value
+            )
+            self._entries.move_to_end(owner)
+            while len(self._entries) > current_app.config[self.size_setting]:
+                self._entries.popitem(last=False)
+        return value
+
+    def mark_stale(self, *owners):
+        """Drop these owners' cached values once the current database transaction commits"""
+        db.session.info.setdefault(self._stale_key, set()).update(
+            str(owner) for owner in owners if owner
+        )
+
+    def invalidate(self, owners):
+        """Drop cached values for these owners immediately"""
+        with self._lock:
+            for owner in {str(owner) for owner in owners}:
+                self._entries.pop(owner, None)
+                self._generations[owner] = self._generations.get(owner, 0) + 1
+            if len(self._generations) > MAX_GENERATIONS:
+                self._generations.clear()
+                self._epoch += 1
+
+    def _invalidate_after_commit(self, session):
+        stale = session.info.pop(self._stale_key, None)
+        if stale:
+            self.invalidate(stale)
+
+    def _forget_after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(self._stale_key, None)
@@ -0,0 +1,328 @@
+"""
+Double-entry journal
+
+Every money movement appends two immutable JournalEntry postings that sum
+to zero: a debit of the source (or of the external ledger, account_id NULL,
+for deposits) and a credit of the target. Account.balance_cents is a cached
+projection of those postings, kept current in the same database transaction
+and rebuildable from a BalanceCheckpoint plus the postings written since.
+
+    python -m app.services.ledger backfill     # journal existing history, then checkpoint
+    python -m app.services.ledger checkpoint   # advance checkpoints to the latest postings
+    python -m app.services.ledger rebuild      # recompute balance_cents from checkpoints
+    python -m app.services.ledger verify       # recompute from the full journal and report drift
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import bindparam, exists, func, insert, literal, select, union_all
+
+from app import db
+from app.models import Account, BalanceCheckpoint, BalanceShard, JournalEntry, Transaction
+from app.services.balance_shards import BalanceShardService
+
+logger = logging.getLogger(__name__)
+
+# Accounts locked and rewritten per database transaction by checkpoint/rebuild
+ACCOUNT_CHUNK_SIZE = 1000
+
+
+def postings(transaction_id, from_account_id, to_account_id, amount, created_at):
+    """
+    Balanced journal rows for one movement of amount cents
+    Args:
+        from_account_id: Source account, or None to debit the external ledger
+    """
+    return [
+        {'transaction_id': transaction_id, 'account_id': from_account_id,
+         'amount_cents': -amount, 'created_at': created_at},
+        {'transaction_id': transaction_id, 'account_id': to_account_id,
+         'amount_cents': amount, 'created_at': created_at},
+    ]
+
+
+class LedgerService:
+
+    @staticmethod
+    def post(rows):
+        """Append postings from postings() in the caller's database transaction"""
+        if rows:
+            db.session.execute(insert(JournalEntry.__table__), rows)
+
+    @staticmethod
+    def derived_balances(account_ids):
+        """
+        Balances from each account's checkpoint plus the postings after it
+        Returns:
+            Dict[UUID, int]: Balance in cents per account
+        """
+        balances, _, _ = LedgerService._fold(account_ids)
+        return balances
+
+    @staticmethod
+    def rebuild_balances(account_ids=None, chunk_size=ACCOUNT_CHUNK_SIZE):
+        """
+        Overwrite Account.balance_cents with the balance derived from the journal
+        Args:
+            account_ids: Accounts to rebuild, all accounts if None
+            chunk_size: Accounts locked and rewritten per database transaction
+        Returns:
+            int: Number of balances that changed
+        """
+        changed = 0
+        for chunk in LedgerService._chunks(account_ids, chunk_size):
+            cached = dict(LedgerService._lock(chunk))
+            balances, _, _ = LedgerService._fold(chunk)
+            updates = [{'b_account_id': account_id, 'b_balance': balance}
+                       for account_id, balance in balances.items() if cached.get(account_id) != balance]
+            if updates:
+                table = Account.__table__
+                db.session.execute(
+                    table.update()
+                    .where(table.c.account_id == bindparam('b_account_id'))
+                    .values(balance_cents=bindparam('b_balance')),
+                    updates
+                )
+            db.session.commit()
+            changed += len(updates)
+
+        logger.info(f"Rebuilt balances, {changed} changed")
+        return changed
+
+    @staticmethod
+    def checkpoint(account_ids=None, chunk_size=ACCOUNT_CHUNK_SIZE):
+        """
+        Fold postings written since each account's checkpoint into the checkpoint
+        Args:
+            account_ids: Accounts to checkpoint, all accounts if None
+            chunk_size: Accounts locked per database transaction
+        Returns:
+            int: Number of checkpoints advanced
+
+        Accounts and their balance shards are locked first, so every posting
+        for them is committed and no posting with a lower entry_id can appear
+        after the checkpoint.
+        """
+        advanced = 0
+        now = datetime.utcnow()
+        for chunk in LedgerService._chunks(account_ids, chunk_size):
+            LedgerService._lock(chunk)
+            balances, last_entries, existing = LedgerService._fold(chunk)
+
+            new_rows = []
+            updates = []
+            for account_id, entry_id in last_entries.items():
+                if account_id in existing:
+                    updates.append({'b_account_id': account_id, 'b_entry_id': entry_id,
+                                    'b_balance': balances[account_id], 'b_updated_at': now})
+                else:
+                    new_rows.append({'account_id': account_id, 'entry_id': entry_id,
+                                     'balance_cents': balances[account_id], 'updated_at': now})
+
+            if new_rows:
+                db.session.execute(insert(BalanceCheckpoint.__table__), new_rows)
+            if updates:
+                table = BalanceCheckpoint.__table__
+                db.session.execute(
+                    table.update()
+                    .where(table.c.account_id == bindparam('b_account_id'))
+                    .values(entry_id=bindparam('b_entry_id'), balance_cents=bindparam('b_balance'),
+                            updated_at=bindparam('b_updated_at')),
+                    updates
+                )
+            db.session.commit()
+            advanced += len(last_entries)
+
+        logger.info(f"Advanced {advanced} balance checkpoints")
+        return advanced
+
+    @staticmethod
+    def verify(chunk_size=10000):
+        """
+        Recompute every balance from the whole journal in one streaming pass
+        Args:
+            chunk_size: Rows fetched per round trip
+        Returns:
+            Dict: entries scanned, accounts checked, drift as [account_id, cached, derived]
+                and transaction ids whose postings do not sum to zero
+        """
+        db.session.rollback()
+        if db.engine.dialect.name == 'postgresql':
+            # Read the journal and the cached balances from one snapshot
+            db.session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+
+        rows = db.session.execute(
+            select(JournalEntry.transaction_id, JournalEntry.account_id, JournalEntry.amount_cents)
+            .order_by(JournalEntry.transaction_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        derived = defaultdict(int)
+        unbalanced = []
+        entries = 0
+        current, open_sum = None, 0
+        for transaction_id, account_id, amount in rows:
+            if transaction_id != current:
+                if open_sum:
+                    unbalanced.append(str(current))
+                current, open_sum = transaction_id, 0
+            open_sum += amount
+            if account_id is not None:
+                derived[account_id] += amount
+            entries += 1
+        if open_sum:
+            unbalanced.append(str(current))
+
+        shard_sums = select(
+            BalanceShard.account_id, func.sum(BalanceShard.balance_cents).label('total')
+        ).group_by(BalanceShard.account_id).subquery()
+        accounts = db.session.execute(
+            select(Account.account_id,
+                   Account.balance_cents + func.coalesce(shard_sums.c.total, literal(0)))
+            .outerjoin(shard_sums, shard_sums.c.account_id == Account.account_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        drift = []
+        checked = 0
+        for account_id, cached in accounts:
+            cached = int(cached)
+            expected = derived.pop(account_id, 0)
+            if cached != expected:
+                drift.append([str(account_id), cached, expected])
+            checked += 1
+        db.session.rollback()
+
+        if drift or unbalanced:
+            logger.warning(f"Ledger drift on {len(drift)} accounts, {len(unbalanced)} unbalanced transactions")
+        return {'entries': entries, 'accounts': checked, 'drift': drift, 'unbalanced': unbalanced}
+
+    @staticmethod
+    def backfill():
+        """
+        Journal completed transactions that have no postings yet, book any
+        remaining difference as an opening balance and checkpoint every account.
+        Run with writers stopped.
+        Returns:
+            int: Number of postings appended
+        """
+        BalanceShardService.compact()
+
+        journaled = exists().where(JournalEntry.transaction_id == Transaction.transaction_id)
+        pending = Transaction.status == 'completed', ~journaled
+        legs = union_all(
+            select(Transaction.transaction_id, Transaction.from_account_id,
+                   -Transaction.amount_cents, Transaction.created_at).where(*pending),
+            select(Transaction.transaction_id, Transaction.to_account_id,
+                   Transaction.amount_cents, Transaction.created_at).where(*pending),
+        )
+        appended = db.session.execute(
+            insert(JournalEntry.__table__).from_select(
+                ['transaction_id', 'account_id', 'amount_cents', 'created_at'], legs
+            )
+        ).rowcount
+
+        # Balances seeded outside the transaction history
+        journal_sums = select(
+            JournalEntry.account_id, func.sum(JournalEntry.amount_cents).label('total')
+        ).group_by(JournalEntry.account_id).subquery()
+        gaps = db.session.execute(
+            select(Account.account_id,
+                   Account.balance_cents - func.coalesce(journal_sums.c.total, literal(0)))
+            .outerjoin(journal_sums, journal_sums.c.account_id == Account.account_id)
+        ).all()
+        now = datetime.utcnow()
+        opening = [row for account_id, gap in gaps if gap
+                   for row in postings(None, None, account_id, int(gap), now)]
+        LedgerService.post(opening)
+        db.session.commit()
+        appended += len(opening)
+
+        LedgerService.checkpoint()
+        logger.info(f"Backfilled {appended} journal postings")
+        return appended
+
+    @staticmethod
+    def _chunks(account_ids, chunk_size):
+        """Account ids in lock order, split into chunks"""
+        if account_ids is None:
+            account_ids = db.session.execute(
+                select(Account.account_id).order_by(Account.account_id)
+            ).scalars().all()
+        else:
+            account_ids = sorted(account_ids)
+        for start in range(0, len(account_ids), chunk_size):
+            yield account_ids[start:start + chunk_size]
+
+    @staticmethod
+    def _lock(account_ids):
+        """
+        Lock accounts and their balance shards, fold the shards into the
+        accounts and return their (account_id, balance_cents)
+        """
+        BalanceShardService.lock_and_compact(account_ids)
+        return db.session.execute(
+            select(Account.account_id, Account.balance_cents)
+            .where(Account.account_id.in_(account_ids))
+            .order_by(Account.account_id)
+            .with_for_update()
+        ).all()
+
+    @staticmethod
+    def _fold(account_ids):
+        """
+        Fold postings after each checkpoint into it
+        Returns:
+            Tuple: balances per account, last entry_id per account with new postings,
+                and the set of accounts that already have a checkpoint
+        """
+        balances = {account_id: 0 for account_id in account_ids}
+        existing = set()
+        for account_id, balance in db.session.execute(
+            select(BalanceCheckpoint.account_id, BalanceCheckpoint.balance_cents)
+            .where(BalanceCheckpoint.account_id.in_(account_ids))
+        ):
+            balances[account_id] = balance
+            existing.add(account_id)
+
+        last_entries = {}
+        for account_id, delta, last_entry in db.session.execute(
+            select(JournalEntry.account_id, func.sum(JournalEntry.amount_cents),
+                   func.max(JournalEntry.entry_id))
+            .outerjoin(BalanceCheckpoint, BalanceCheckpoint.account_id == JournalEntry.account_id)
+            .where(JournalEntry.account_id.in_(account_ids),
+                   JournalEntry.entry_id > func.coalesce(BalanceCheckpoint.entry_id, 0))
+            .group_by(JournalEntry.account_id)
+        ):
+            balances[account_id] += int(delta)
+            last_entries[account_id] = last_entry
+        return balances, last_entries, existing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the double-entry journal and balance projection")
+    parser.add_argument('command', choices=['backfill', 'checkpoint', 'rebuild', 'verify'])
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows fetched per round trip by verify')
+    args = parser.parse_args()
+
+    from create_app import create_app
+    app = create_app(config_class=os.getenv('FLASK_CONFIG', 'config.DevelopmentConfig'))
+
+    with app.app_context():
+        if args.command == 'backfill':
+            LedgerService.backfill()
+        elif args.command == 'checkpoint':
+            LedgerService.checkpoint()
+        elif args.command == 'rebuild':
+            LedgerService.rebuild_balances()
+        else:
+            report = LedgerService.verify(args.chunk_size)
+            print(json.dumps(report))
+            sys.exit(1 if report['drift'] or report['unbalanced'] else 0)
+
+
+if __name__ == '__main__':
+    main()
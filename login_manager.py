@@ -1,8 +1,14 @@
-from flask_login import LoginManager
+from flask_login import LoginManager, UserMixin
 from flask import redirect, url_for, flash
+from sqlalchemy import select
 import logging
 
+from app import db
 from app.models import User
+from app.utils.invalidating_cache import InvalidatingCache
+
+# Snapshots by user_id, None for a missing user
+_users = InvalidatingCache('user', 'USER_CACHE_TTL', 'USER_CACHE_SIZE')
 
 # Initialize login manager
 login_manager = LoginManager()
@@ -10,32 +16,82 @@ login_manager.login_view = 'auth.login'
 login_manager.login_message = "Please log in to access this page."
 login_manager.login_message_category = "info"
 
+
+class UserSnapshot(UserMixin):
+    """
+    Read-only copy of the User columns requests need, safe to share between
+    requests and threads. Routes use current_user.user_id and full_name; code
+    that needs the full row should load User by user_id.
+    """
+
+    __slots__ = ('user_id', 'mobile_number', 'email', 'full_name', 'is_verified', 'account_locked')
+
+    def __init__(self, user_id, mobile_number, email, full_name, is_verified, account_locked):
+        self.user_id = user_id
+        self.mobile_number = mobile_number
+        self.email = email
+        self.full_name = full_name
+        self.is_verified = is_verified
+        self.account_locked = account_locked
+
+    def get_id(self):
+        return str(self.user_id)
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.mobile_number}>'
+
+
 @login_manager.user_loader
 def load_user(user_id):
     """
     LoadUser callback function for Flask-Login
-    
+
+    Serves a per-worker snapshot cached for at most USER_CACHE_TTL seconds,
+    which bounds how long a lockout or other change takes to apply. Changes
+    committed by this worker drop the snapshot, and a load that overlapped
+    the commit is not cached, so they usually apply sooner.
+
     Args:
         user_id (str): User ID to load
-        
+
     Returns:
-        User: User object or None
+        UserSnapshot: Snapshot of the user, or None if missing or locked
     """
     try:
-        return User.query.get(user_id)
+        snapshot = _users.get(user_id, None, lambda: _load_snapshot(user_id))
+        return snapshot if snapshot and not snapshot.account_locked else None
     except Exception as e:
         logging.error(f"Error loading user: {e}")
         return None
 
+
+def _load_snapshot(user_id):
+    row = db.session.execute(select(
+        User.user_id, User.mobile_number, User.email, User.full_name,
+        User.is_verified, User.account_locked
+    ).where(User.user_id == user_id)).first()
+    return UserSnapshot(*row) if row else None
+
+
+def mark_users_stale(*user_ids):
+    """Drop these users' cached snapshots once the current database transaction commits"""
+    _users.mark_stale(*user_ids)
+
+
+def invalidate_users(user_ids):
+    """Drop cached snapshots for these users immediately"""
+    _users.invalidate(user_ids)
+
+
 def setup_login_manager(app):
     """
     Initialize the login manager with the flask app
-    
+
     Args:
         app: Flask application instance
-        
+
     Returns:
         LoginManager: Configured login manager
     """
     login_manager.init_app(app)
-    return login_manager
\ No newline at end of file
+    return login_manager
@@ -0,0 +1,84 @@
+"""
+Login throttle
+
+Failed logins are counted in sliding windows keyed by mobile number and by
+client IP, outside the database. A login whose mobile number or IP is
+already over its limit is rejected before the user row is read or the PIN
+hashed, and a failure only writes to the users table when it is the one
+that crosses LOGIN_MAX_FAILURES and locks the account.
+
+Counters use the velocity trackers: LOGIN_THROTTLE_BACKEND 'sqlite' keeps
+them in a SQLite file shared by every worker on the host, 'memory' in the
+worker process.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.services.velocity import SharedVelocityTracker, VelocityTracker
+
+logger = logging.getLogger(__name__)
+
+# Throttle for this worker process, built on first use after the fork
+_throttle = None
+_throttle_pid = None
+_throttle_lock = threading.Lock()
+
+
+class LoginThrottle:
+    """Sliding-window failure counts per mobile number and per client IP"""
+
+    def __init__(self, tracker, max_failures, max_ip_failures):
+        self.tracker = tracker
+        self.max_failures = max_failures
+        self.max_ip_failures = max_ip_failures
+
+    def allowed(self, mobile_number, client_ip=None, now=None):
+        """False if the mobile number or IP has used up its failures in the window"""
+        now = now or datetime.utcnow()
+        if self.tracker.count(f"m:{mobile_number}", now) >= self.max_failures:
+            return False
+        return client_ip is None or self.tracker.count(f"ip:{client_ip}", now) < self.max_ip_failures
+
+    def failed(self, mobile_number, client_ip=None, now=None):
+        """
+        Record a failed login
+        Returns:
+            int: Failures for the mobile number in the window, including this one
+        """
+        now = now or datetime.utcnow()
+        if client_ip is not None:
+            self.tracker.record(f"ip:{client_ip}", now)
+        key = f"m:{mobile_number}"
+        self.tracker.record(key, now)
+        return self.tracker.count(key, now)
+
+    def succeeded(self, mobile_number):
+        """Clear the mobile number's failures after a successful login"""
+        self.tracker.reset(f"m:{mobile_number}")
+
+
+def create_login_throttle(config):
+    """Build the throttle selected by LOGIN_THROTTLE_BACKEND"""
+    window = timedelta(seconds=config['LOGIN_THROTTLE_WINDOW'])
+    bucket_seconds = config['LOGIN_THROTTLE_BUCKET_SECONDS']
+    if config.get('LOGIN_THROTTLE_BACKEND') == 'sqlite':
+        tracker = SharedVelocityTracker(config['LOGIN_THROTTLE_PATH'], window=window,
+                                        bucket_seconds=bucket_seconds)
+    else:
+        tracker = VelocityTracker(window=window, bucket_seconds=bucket_seconds)
+    return LoginThrottle(tracker, config['LOGIN_MAX_FAILURES'], config['LOGIN_MAX_IP_FAILURES'])
+
+
+def get_login_throttle():
+    """Return this process's throttle, creating it from the app config on first use"""
+    global _throttle, _throttle_pid
+    with _throttle_lock:
+        if _throttle is None or _throttle_pid != os.getpid():
+            _throttle = create_login_throttle(current_app.config)
+            _throttle_pid = os.getpid()
+            logger.info(f"Login throttle using {current_app.config.get('LOGIN_THROTTLE_BACKEND')} backend")
+        return _throttle
@@ -0,0 +1,82 @@
+"""
+In-process metrics
+
+Metrics live in the worker process that records them and are exposed as
+JSON on GET /metrics, so each gunicorn worker reports its own numbers.
+"""
+import bisect
+import threading
+
+# Registered metrics by name
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class Histogram:
+    """Fixed-bucket histogram; buckets are inclusive upper bounds"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """Cumulative bucket counts, Prometheus style, plus count and sum"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        return {'buckets': buckets, 'count': count, 'sum': total}
+
+
+class Counter:
+    """Monotonically increasing count"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def snapshot(self):
+        return {'value': self._value}
+
+
+def histogram(name, buckets):
+    """Get or create the histogram registered under name"""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Histogram(buckets)
+        return metric
+
+
+def counter(name):
+    """Get or create the counter registered under name"""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Counter()
+        return metric
+
+
+def snapshot():
+    """Current value of every registered metric"""
+    with _registry_lock:
+        metrics = dict(_registry)
+    return {name: metric.snapshot() for name, metric in sorted(metrics.items())}
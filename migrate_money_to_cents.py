@@ -0,0 +1,55 @@
+"""
+Script to migrate money columns from NUMERIC(12,2) to integer cents
+
+Converts accounts.balance -> accounts.balance_cents and
+transactions.amount -> transactions.amount_cents (BIGINT) in place.
+Safe to re-run: tables that are already migrated are skipped.
+
+    python migrate_money_to_cents.py postgresql://localhost/banking
+"""
+import sys
+
+from sqlalchemy import create_engine, inspect, text
+
+# (table, old numeric column, new cents column)
+MONEY_COLUMNS = [
+    ('accounts', 'balance', 'balance_cents'),
+    ('transactions', 'amount', 'amount_cents'),
+]
+
+
+def migrate_postgres(conn, table, old, new):
+    # One table rewrite: rename, then change type with the conversion inline
+    conn.execute(text(f"ALTER TABLE {table} RENAME COLUMN {old} TO {new}"))
+    conn.execute(text(
+        f"ALTER TABLE {table} ALTER COLUMN {new} TYPE BIGINT "
+        f"USING ROUND(COALESCE({new}, 0) * 100)::BIGINT"
+    ))
+    conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {new} SET DEFAULT 0"))
+    conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {new} SET NOT NULL"))
+
+
+def migrate_sqlite(conn, table, old, new):
+    # DROP COLUMN needs SQLite 3.35+
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {new} INTEGER NOT NULL DEFAULT 0"))
+    conn.execute(text(f"UPDATE {table} SET {new} = CAST(ROUND(COALESCE({old}, 0) * 100) AS INTEGER)"))
+    conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {old}"))
+
+
+def migrate(database_uri):
+    engine = create_engine(database_uri)
+    migrate_column = migrate_postgres if engine.dialect.name == 'postgresql' else migrate_sqlite
+
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table, old, new in MONEY_COLUMNS:
+            columns = {column['name'] for column in inspector.get_columns(table)}
+            if new in columns:
+                print(f"{table}.{new} already exists, skipping")
+                continue
+            migrate_column(conn, table, old, new)
+            print(f"Migrated {table}.{old} -> {table}.{new}")
+
+
+if __name__ == "__main__":
+    migrate(sys.argv[1] if len(sys.argv) > 1 else "sqlite:///banking.db")
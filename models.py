@@ -1,20 +1,21 @@
-import uuid
 from datetime import datetime
 from decimal import Decimal
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.dialects.postgresql import UUID
 from app import db
+from app.utils.ids import uuid7
+from app.utils.money import to_decimal
+from app.utils.pin_hashing import hash_pin, verify_pin
 
 # Helper function to generate UUIDs
 def generate_uuid():
-    return str(uuid.uuid4())
+    return str(uuid7())
 
 class User(db.Model, UserMixin):
     """User model for authentication and user information"""
     __tablename__ = 'users'
     
-    user_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     mobile_number = db.Column(db.String(20), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     full_name = db.Column(db.String(100), nullable=False)
@@ -38,37 +39,63 @@ class User(db.Model, UserMixin):
     
     def set_pin(self, pin):
         """Set a hashed PIN for the user"""
-        self.pin_hash = generate_password_hash(pin)
+        self.pin_hash = hash_pin(pin)
     
     def check_pin(self, pin):
         """Validate a PIN against the hash"""
-        return check_password_hash(self.pin_hash, pin)
+        return verify_pin(self.pin_hash, pin)
 
 
 class Account(db.Model):
     """Bank account model"""
     __tablename__ = 'accounts'
     
-    account_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.user_id'), nullable=False)
+    account_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.user_id'), nullable=False, index=True)
     account_number = db.Column(db.String(20), unique=True, nullable=False)
-    balance = db.Column(db.Numeric(precision=12, scale=2), default=0)
+    balance_cents = db.Column(db.BigInteger, nullable=False, default=0)  # projection of journal_entries
+    balance_shards = db.Column(db.Integer, nullable=False, default=0)  # >0 spreads credits over shard rows
     status = db.Column(db.String(20), default='active')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     user = db.relationship('User', back_populates='accounts')
-    cards = db.relationship('Card', back_populates='account', lazy='dynamic')
+    cards = db.relationship('Card', back_populates='account', order_by='Card.created_at')
+    shards = db.relationship('BalanceShard', lazy='select')
+    
+    @property
+    def total_balance_cents(self):
+        """Balance in cents including credits not yet compacted out of the shards"""
+        if not self.balance_shards:
+            return self.balance_cents or 0
+        return (self.balance_cents or 0) + sum(shard.balance_cents for shard in self.shards)
+    
+    @property
+    def balance(self):
+        """Balance in major units, for display"""
+        return to_decimal(self.total_balance_cents)
     
     def __repr__(self):
         return f'<Account {self.account_number}>'
 
 
+class BalanceShard(db.Model):
+    """Credit sub-balance of a hot account, folded back into the account by the compactor"""
+    __tablename__ = 'account_balance_shards'
+    
+    account_id = db.Column(UUID(as_uuid=True), db.ForeignKey('accounts.account_id'), primary_key=True)
+    shard = db.Column(db.SmallInteger, primary_key=True)
+    balance_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<BalanceShard {self.account_id}/{self.shard}>'
+
+
 class Card(db.Model):
     """Card model for virtual and physical cards"""
     __tablename__ = 'cards'
     
-    card_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    card_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     account_id = db.Column(UUID(as_uuid=True), db.ForeignKey('accounts.account_id'), nullable=False)
     card_number = db.Column(db.String(20), unique=True, nullable=False)
     expiry_date = db.Column(db.String(5), nullable=False)  # MM/YY format
@@ -90,11 +117,16 @@ class Card(db.Model):
 class Transaction(db.Model):
     """Transaction model for tracking all money movements"""
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Drive the sender/receiver branches of the history query
+        db.Index('ix_transactions_from_account_created', 'from_account_id', 'created_at', 'transaction_id'),
+        db.Index('ix_transactions_to_account_created', 'to_account_id', 'created_at', 'transaction_id'),
+    )
     
-    transaction_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    transaction_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     from_account_id = db.Column(UUID(as_uuid=True), db.ForeignKey('accounts.account_id'), nullable=True)
     to_account_id = db.Column(UUID(as_uuid=True), db.ForeignKey('accounts.account_id'), nullable=False)
-    amount = db.Column(db.Numeric(precision=12, scale=2), nullable=False)
+    amount_cents = db.Column(db.BigInteger, nullable=False)
     transaction_type = db.Column(db.String(20), nullable=False)  # transfer, deposit, withdrawal
     reference = db.Column(db.String(100), nullable=True)
     status = db.Column(db.String(20), default='pending')  # pending, completed, failed
@@ -106,17 +138,70 @@ class Transaction(db.Model):
     sender_account = db.relationship('Account', foreign_keys=[from_account_id], backref='sent_transactions')
     receiver_account = db.relationship('Account', foreign_keys=[to_account_id], backref='received_transactions')
     
+    @property
+    def amount(self):
+        """Amount in major units, for display"""
+        return to_decimal(self.amount_cents)
+    
     def __repr__(self):
         return f'<Transaction {self.transaction_id} {self.amount}>'
 
 
+class JournalEntry(db.Model):
+    """Immutable ledger posting; an account's balance is the sum of its postings"""
+    __tablename__ = 'journal_entries'
+    __table_args__ = (
+        # Drive incremental rebuilds: postings for an account after a checkpoint
+        db.Index('ix_journal_entries_account_entry', 'account_id', 'entry_id'),
+    )
+    
+    entry_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    transaction_id = db.Column(UUID(as_uuid=True), db.ForeignKey('transactions.transaction_id'), nullable=True, index=True)  # NULL for opening balances
+    account_id = db.Column(UUID(as_uuid=True), db.ForeignKey('accounts.account_id'), nullable=True)  # NULL is the external ledger
+    amount_cents = db.Column(db.BigInteger, nullable=False)  # negative debit, positive credit
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<JournalEntry {self.entry_id} {self.amount_cents}>'
+
+
+class BalanceCheckpoint(db.Model):
+    """Balance of an account as of a journal entry, the starting point for rebuilds"""
+    __tablename__ = 'balance_checkpoints'
+    
+    account_id = db.Column(UUID(as_uuid=True), db.ForeignKey('accounts.account_id'), primary_key=True)
+    entry_id = db.Column(db.BigInteger, nullable=False)  # last journal entry folded in
+    balance_cents = db.Column(db.BigInteger, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<BalanceCheckpoint {self.account_id} @{self.entry_id}>'
+
+
+class AccountActivity(db.Model):
+    """Daily inflow/outflow rollup per account, maintained with each transaction"""
+    __tablename__ = 'account_activity_daily'
+    
+    account_id = db.Column(UUID(as_uuid=True), db.ForeignKey('accounts.account_id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)  # UTC
+    shard = db.Column(db.SmallInteger, primary_key=True, default=0)  # spread like balance shards for hot accounts
+    inflow_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    outflow_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<AccountActivity {self.account_id} {self.day}>'
+
+
 class FraudAlert(db.Model):
     """Model for tracking potential fraudulent activity"""
     __tablename__ = 'fraud_alerts'
     
-    alert_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    alert_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     transaction_id = db.Column(UUID(as_uuid=True), db.ForeignKey('transactions.transaction_id'), nullable=False)
     reason = db.Column(db.String(100), nullable=False)
+    rule_id = db.Column(db.String(50), nullable=True)
+    score = db.Column(db.Float, nullable=True)
     action_taken = db.Column(db.String(50), default='flagged')  # flagged, blocked, resolved
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     resolved_at = db.Column(db.DateTime, nullable=True)
@@ -128,17 +213,74 @@ class FraudAlert(db.Model):
         return f'<FraudAlert {self.alert_id}>'
 
 
+class AccountBaseline(db.Model):
+    """Running behavioural statistics per account and direction (in/out)"""
+    __tablename__ = 'account_baselines'
+    
+    account_id = db.Column(UUID(as_uuid=True), db.ForeignKey('accounts.account_id'), primary_key=True)
+    direction = db.Column(db.String(3), primary_key=True)  # in, out
+    txn_count = db.Column(db.BigInteger, nullable=False, default=0)
+    amount_mean = db.Column(db.Float, nullable=False, default=0.0)  # EWMA of amount in cents
+    amount_var = db.Column(db.Float, nullable=False, default=0.0)  # EWM variance of amount in cents
+    hour_sin = db.Column(db.Float, nullable=False, default=0.0)  # EWMA of hour-of-day on the unit circle
+    hour_cos = db.Column(db.Float, nullable=False, default=0.0)
+    counterparty_bits = db.Column(db.BigInteger, nullable=False, default=0)  # hashed counterparty set
+    updated_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<AccountBaseline {self.account_id} {self.direction}>'
+
+
+class FraudCheckJob(db.Model):
+    """Queued fraud check, written in the same DB transaction as its transfer"""
+    __tablename__ = 'fraud_check_jobs'
+    
+    job_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    transaction_id = db.Column(UUID(as_uuid=True), db.ForeignKey('transactions.transaction_id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<FraudCheckJob {self.job_id}>'
+
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a money-moving request, replayed for retries with the same key"""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+    )
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.user_id'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='in_progress')  # in_progress, completed
+    response_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    response_headers = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)  # start of the in-progress owner's lease
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key}>'
+
+
 class OTP(db.Model):
     """One-time password model for verifications"""
     __tablename__ = 'otps'
+    __table_args__ = (
+        # Newest unused OTP for a user and purpose without scanning their history
+        db.Index('ix_otps_user_purpose_used_created', 'user_id', 'purpose', 'is_used', 'created_at'),
+    )
     
-    otp_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    otp_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.user_id'), nullable=False)
     otp_code = db.Column(db.String(10), nullable=False)
     purpose = db.Column(db.String(20), nullable=False)  # verification, login, transaction
     is_used = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     
     # Relationships
     user = db.relationship('User', backref='otps')
@@ -151,7 +293,7 @@ class Notification(db.Model):
     """Notification model for user alerts and messages"""
     __tablename__ = 'notifications'
     
-    notification_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    notification_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.user_id'), nullable=False)
     message = db.Column(db.String(500), nullable=False)
     is_read = db.Column(db.Boolean, default=False)
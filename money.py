@@ -0,0 +1,72 @@
+"""
+Money helpers
+
+Amounts are carried as integer minor units (cents) from request parsing
+through the services and into BIGINT columns. Conversion to major units
+only happens at the edges: parse_cents on input, to_major for JSON and
+to_decimal for templates.
+"""
+from decimal import Decimal
+
+# Largest amount accepted for a single transaction, in cents
+MAX_AMOUNT_CENTS = 10 ** 15
+
+
+def parse_cents(value):
+    """
+    Convert a major-unit amount to integer cents without going through float
+    Args:
+        value: str, int, float or Decimal such as "12.50", 12, 12.5
+    Returns:
+        int: Amount in cents
+    Raises:
+        ValueError: If value is malformed or has more than 2 decimal places
+    """
+    if isinstance(value, bool):
+        raise ValueError("Invalid amount")
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        # repr gives the shortest string that round-trips, e.g. 10.1 -> "10.1"
+        value = repr(value)
+    elif isinstance(value, Decimal):
+        value = format(value, 'f')
+    elif not isinstance(value, str):
+        raise ValueError("Invalid amount")
+
+    text = value.strip()
+    negative = text.startswith('-')
+    if negative:
+        text = text[1:]
+
+    whole, _, fraction = text.partition('.')
+    if not (whole or fraction) or len(fraction) > 2:
+        raise ValueError("Invalid amount")
+    if not (whole.isascii() and whole.isdigit() or not whole):
+        raise ValueError("Invalid amount")
+    if fraction and not (fraction.isascii() and fraction.isdigit()):
+        raise ValueError("Invalid amount")
+
+    cents = int(whole or '0') * 100 + int(fraction.ljust(2, '0'))
+    return -cents if negative else cents
+
+
+def require_cents(amount):
+    """
+    Check that a service-level amount is a positive integer number of cents
+    Raises:
+        ValueError: If it is not
+    """
+    if isinstance(amount, bool) or not isinstance(amount, int) or amount <= 0:
+        raise ValueError("Amount must be a positive number of cents")
+    return amount
+
+
+def to_major(cents):
+    """Cents as a major-unit number for JSON responses"""
+    return cents / 100
+
+
+def to_decimal(cents):
+    """Cents as an exact major-unit Decimal for display"""
+    return Decimal(cents).scaleb(-2)
@@ -0,0 +1,137 @@
+"""
+Bulk user onboarding from CSV
+
+Registers users in batches: each batch is validated, its PINs hashed
+across the PIN hashing pool's processes, and inserted with one multi-row
+INSERT that skips rows colliding with existing users on any unique
+column. Rows that fail validation or collide are reported, not fatal.
+
+    python -m app.services.onboarding users.csv --workers 8
+
+The CSV needs a header with mobile_number, pin, full_name, email and
+cnic_number columns.
+"""
+import argparse
+import csv
+import logging
+import os
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import User
+from app.services.auth_service import UNIQUE_USER_FIELDS
+from app.utils.error_handlers import InvalidInputError
+from app.utils.ids import uuid7
+from app.utils.pin_hashing import hash_pins
+from app.utils.validators import validate_cnic, validate_email, validate_mobile_number, validate_pin
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ('mobile_number', 'pin', 'full_name', 'email', 'cnic_number')
+
+
+class OnboardingService:
+
+    @staticmethod
+    def register_users(rows, batch_size=1000):
+        """
+        Register users from dicts with the CSV_COLUMNS keys
+        Args:
+            rows: Iterable of dicts, e.g. a csv.DictReader
+            batch_size: Users hashed and inserted per batch
+        Returns:
+            Dict: registered count, plus rejected as a list of (row number, field, message)
+                for invalid rows and rows that duplicate an earlier row or an existing user
+        """
+        result = {'registered': 0, 'rejected': []}
+        # Unique values claimed by earlier rows of this file
+        seen = {field: set() for field in UNIQUE_USER_FIELDS}
+        batch = []
+        for number, row in enumerate(rows, start=1):
+            try:
+                user = OnboardingService._validate(row)
+            except InvalidInputError as e:
+                result['rejected'].append((number, e.field, e.message))
+                continue
+
+            duplicate = next((field for field in UNIQUE_USER_FIELDS if user[field] in seen[field]), None)
+            if duplicate:
+                result['rejected'].append((number, duplicate, UNIQUE_USER_FIELDS[duplicate]))
+                continue
+            for field in UNIQUE_USER_FIELDS:
+                seen[field].add(user[field])
+
+            batch.append((number, user))
+            if len(batch) >= batch_size:
+                OnboardingService._insert(batch, result)
+                batch = []
+        if batch:
+            OnboardingService._insert(batch, result)
+
+        logger.info(f"Onboarded {result['registered']} users, rejected {len(result['rejected'])}")
+        return result
+
+    @staticmethod
+    def _validate(row):
+        missing = next((column for column in CSV_COLUMNS if not (row.get(column) or '').strip()), None)
+        if missing:
+            raise InvalidInputError(f"Missing required field: {missing}", field=missing)
+        return {
+            'mobile_number': validate_mobile_number(row['mobile_number'].strip()),
+            'pin': validate_pin(row['pin'].strip()),
+            'full_name': row['full_name'].strip(),
+            'email': validate_email(row['email'].strip()),
+            'cnic_number': validate_cnic(row['cnic_number'].strip()),
+        }
+
+    @staticmethod
+    def _insert(batch, result):
+        """Hash and insert one batch, recording rows that hit an existing user"""
+        pin_hashes = hash_pins([user['pin'] for _, user in batch])
+        values = [{
+            'user_id': uuid7(),
+            'mobile_number': user['mobile_number'],
+            'email': user['email'],
+            'full_name': user['full_name'],
+            'cnic_number': user['cnic_number'],
+            'pin_hash': pin_hash,
+            'is_verified': False,
+            'account_locked': False,
+            'failed_login_attempts': 0,
+        } for (_, user), pin_hash in zip(batch, pin_hashes)]
+
+        dialect_insert = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+        inserted = set(db.session.execute(
+            dialect_insert(User.__table__).values(values).on_conflict_do_nothing()
+            .returning(User.__table__.c.mobile_number)
+        ).scalars())
+        db.session.commit()
+
+        result['registered'] += len(inserted)
+        for number, user in batch:
+            if user['mobile_number'] not in inserted:
+                result['rejected'].append((number, None, "A user with these details already exists"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register users in bulk from a CSV file")
+    parser.add_argument('path')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='PIN hashing processes')
+    args = parser.parse_args()
+
+    from create_app import create_app
+    app = create_app(config_class=os.getenv('FLASK_CONFIG', 'config.DevelopmentConfig'))
+    app.config['PIN_HASH_WORKERS'] = args.workers
+
+    with app.app_context(), open(args.path, newline='') as csv_file:
+        result = OnboardingService.register_users(csv.DictReader(csv_file), batch_size=args.batch_size)
+
+    for number, field, message in result['rejected']:
+        logger.warning(f"Row {number}: {message}" + (f" ({field})" if field else ""))
+
+
+if __name__ == '__main__':
+    main()
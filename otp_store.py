@@ -0,0 +1,250 @@
+"""
+One-time password storage
+
+AuthService issues and verifies OTPs through the store selected by
+OTP_BACKEND:
+
+    database  OTP rows in the main database, found through a composite
+              (user_id, purpose, is_used, created_at) index; a sweeper
+              deletes expired rows, used or not, in chunks
+    sqlite    one row per user and purpose in a SQLite file shared by
+              every worker on the host, for single-node deployments
+    memory    a dict in the worker process; only for a single worker
+
+The database store keeps every unused OTP and verifies against the
+newest, as before. The sqlite and memory stores keep only the newest OTP
+per user and purpose, so issuing a new code revokes the previous one.
+
+    python -m app.services.otp_store purge   # delete expired OTPs now
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+from app import db
+from app.models import OTP
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of OTPStore.consume()
+VERIFIED = 'verified'
+MISSING = 'missing'
+EXPIRED = 'expired'
+MISMATCH = 'mismatch'
+
+# Rows deleted per statement by the purge
+PURGE_CHUNK_SIZE = 1000
+
+EPOCH = datetime(1970, 1, 1)
+
+# Store for this worker process, built on first use after the fork
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+class DatabaseOTPStore:
+    """OTP rows in the application database"""
+
+    def issue(self, user_id, purpose, otp_code, expires_at):
+        """Store a new OTP in the caller's database transaction"""
+        db.session.add(OTP(user_id=user_id, otp_code=otp_code, purpose=purpose, expires_at=expires_at))
+
+    def consume(self, user_id, purpose, otp_code, now=None):
+        """
+        Check otp_code against the newest unused OTP and mark it used if it
+        matches, in the caller's database transaction
+        Returns:
+            str: VERIFIED, MISSING, EXPIRED or MISMATCH
+        """
+        now = now or datetime.utcnow()
+        otp = db.session.execute(
+            select(OTP.otp_id, OTP.otp_code, OTP.expires_at).where(
+                OTP.user_id == user_id,
+                OTP.purpose == purpose,
+                OTP.is_used.is_(False)
+            ).order_by(OTP.created_at.desc()).limit(1)
+        ).first()
+
+        if otp is None:
+            return MISSING
+        if now > otp.expires_at:
+            return EXPIRED
+        if otp.otp_code != otp_code:
+            return MISMATCH
+
+        # A concurrent verify of the same code loses here
+        used = db.session.execute(
+            update(OTP).where(OTP.otp_id == otp.otp_id, OTP.is_used.is_(False)).values(is_used=True)
+        ).rowcount
+        return VERIFIED if used else MISSING
+
+    def purge(self, now=None):
+        """
+        Delete expired OTPs in chunks, committing each chunk. Used OTPs
+        go once they expire, so the scan stays on the expires_at index.
+        Returns:
+            int: Number of OTPs deleted
+        """
+        now = now or datetime.utcnow()
+        deleted = 0
+        while True:
+            stale = select(OTP.otp_id).where(OTP.expires_at <= now).limit(PURGE_CHUNK_SIZE).scalar_subquery()
+            count = db.session.execute(delete(OTP).where(OTP.otp_id.in_(stale))).rowcount
+            db.session.commit()
+            deleted += count
+            if count < PURGE_CHUNK_SIZE:
+                return deleted
+
+
+class MemoryOTPStore:
+    """Newest OTP per user and purpose in this process"""
+
+    def __init__(self):
+        # (user_id, purpose) -> (otp_code, expires_at)
+        self._otps = {}
+        self._lock = threading.Lock()
+
+    def issue(self, user_id, purpose, otp_code, expires_at):
+        with self._lock:
+            self._otps[(str(user_id), purpose)] = (otp_code, expires_at)
+
+    def consume(self, user_id, purpose, otp_code, now=None):
+        now = now or datetime.utcnow()
+        key = (str(user_id), purpose)
+        with self._lock:
+            stored = self._otps.get(key)
+            if stored is None:
+                return MISSING
+            if now > stored[1]:
+                return EXPIRED
+            if stored[0] != otp_code:
+                return MISMATCH
+            del self._otps[key]
+            return VERIFIED
+
+    def purge(self, now=None):
+        now = now or datetime.utcnow()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._otps.items() if expires_at <= now]
+            for key in expired:
+                del self._otps[key]
+        return len(expired)
+
+
+class SharedOTPStore(MemoryOTPStore):
+    """Newest OTP per user and purpose in a SQLite file shared across processes"""
+
+    def __init__(self, path):
+        super().__init__()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS otps ("
+            "user_id TEXT NOT NULL, purpose TEXT NOT NULL, otp_code TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, PRIMARY KEY (user_id, purpose)) WITHOUT ROWID"
+        )
+
+    def issue(self, user_id, purpose, otp_code, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO otps (user_id, purpose, otp_code, expires_at) VALUES (?, ?, ?, ?)",
+                (str(user_id), purpose, otp_code, _seconds(expires_at))
+            )
+
+    def consume(self, user_id, purpose, otp_code, now=None):
+        now = _seconds(now or datetime.utcnow())
+        key = (str(user_id), purpose)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT otp_code, expires_at FROM otps WHERE user_id = ? AND purpose = ?", key
+                ).fetchone()
+                if row is None:
+                    result = MISSING
+                elif now > row[1]:
+                    result = EXPIRED
+                elif row[0] != otp_code:
+                    result = MISMATCH
+                else:
+                    self._conn.execute("DELETE FROM otps WHERE user_id = ? AND purpose = ?", key)
+                    result = VERIFIED
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def purge(self, now=None):
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM otps WHERE expires_at <= ?", (_seconds(now or datetime.utcnow()),)
+            ).rowcount
+
+
+def _seconds(timestamp):
+    return (timestamp - EPOCH).total_seconds()
+
+
+def create_otp_store(config):
+    """Build the OTP store selected by OTP_BACKEND"""
+    backend = config.get('OTP_BACKEND', 'database')
+    if backend == 'sqlite':
+        return SharedOTPStore(config['OTP_STORE_PATH'])
+    if backend == 'memory':
+        return MemoryOTPStore()
+    return DatabaseOTPStore()
+
+
+def get_otp_store():
+    """Return this process's OTP store, creating it from the app config on first use"""
+    global _store, _store_pid
+    with _store_lock:
+        if _store is None or _store_pid != os.getpid():
+            _store = create_otp_store(current_app.config)
+            _store_pid = os.getpid()
+        return _store
+
+
+def start_otp_sweeper(app):
+    """Start a daemon thread that purges expired OTPs every OTP_PURGE_INTERVAL seconds"""
+    def sweep():
+        while True:
+            time.sleep(app.config['OTP_PURGE_INTERVAL'])
+            with app.app_context():
+                try:
+                    deleted = get_otp_store().purge()
+                    if deleted:
+                        logger.info(f"Purged {deleted} expired OTPs")
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning(f"OTP purge failed: {str(e)}")
+
+    thread = threading.Thread(target=sweep, name='otp-sweeper', daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the OTP store")
+    parser.add_argument('command', choices=['purge'])
+    parser.parse_args()
+
+    from create_app import create_app
+    app = create_app(config_class=os.getenv('FLASK_CONFIG', 'config.DevelopmentConfig'))
+
+    with app.app_context():
+        deleted = get_otp_store().purge()
+        logger.info(f"Purged {deleted} expired OTPs")
+
+
+if __name__ == "__main__":
+    main()
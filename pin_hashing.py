@@ -0,0 +1,115 @@
+"""
+PIN hashing off the request threads
+
+Hashing and verifying PINs is deliberately slow, so it runs in a process
+pool of PIN_HASH_WORKERS processes shared by all threads of a web worker.
+A login burst then queues for the pool instead of holding the GIL and
+every core, and other endpoints keep being served. PIN_HASH_WORKERS = 0
+hashes inline on the calling thread.
+
+PIN_HASH_METHOD is a full Werkzeug method string such as
+'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'. A stored hash made with any
+other method still verifies, and needs_rehash() reports it so logins can
+upgrade it.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.utils.metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+# Method used outside an app context, e.g. by scripts
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+pin_hash_ms = histogram('pin_hash_ms', (5, 10, 25, 50, 100, 250, 500, 1000, 2500))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _config(name, default):
+    return current_app.config.get(name, default) if has_app_context() else default
+
+
+def _get_pool(workers):
+    """This process's pool, recreated after a fork so children never share one"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn, not fork: forking a threaded web worker can copy held locks
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _reset_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(func, *args):
+    """Run a Werkzeug hash function in the pool, or inline when the pool is off"""
+    workers = _config('PIN_HASH_WORKERS', 0)
+    started = time.perf_counter()
+    try:
+        if workers <= 0:
+            return func(*args)
+
+        pool = _get_pool(workers)
+        try:
+            return pool.submit(func, *args).result(timeout=_config('PIN_HASH_TIMEOUT', None))
+        except BrokenProcessPool:
+            logger.error("PIN hashing pool died, hashing inline and restarting it")
+            _reset_pool(pool)
+            return func(*args)
+    finally:
+        pin_hash_ms.observe((time.perf_counter() - started) * 1000)
+
+
+def hash_pin(pin):
+    """Hash a PIN with the configured PIN_HASH_METHOD"""
+    return _run(generate_password_hash, pin, _config('PIN_HASH_METHOD', DEFAULT_METHOD))
+
+
+def hash_pins(pins):
+    """Hash many PINs with the configured method, spread over the pool's processes"""
+    method = _config('PIN_HASH_METHOD', DEFAULT_METHOD)
+    workers = _config('PIN_HASH_WORKERS', 0)
+    if workers <= 0:
+        return [generate_password_hash(pin, method) for pin in pins]
+
+    chunksize = max(1, len(pins) // (workers * 4))
+    return list(_get_pool(workers).map(generate_password_hash, pins, repeat(method), chunksize=chunksize))
+
+
+def verify_pin(pin_hash, pin):
+    """Check a PIN against a stored hash made with any method"""
+    return _run(check_password_hash, pin_hash, pin)
+
+
+def needs_rehash(pin_hash):
+    """True if pin_hash was not made with the configured PIN_HASH_METHOD"""
+    return pin_hash.split('$', 1)[0] != _config('PIN_HASH_METHOD', DEFAULT_METHOD)
+
+
+def shutdown_pin_hashing():
+    """Stop this process's pool, e.g. from a gunicorn worker_exit hook"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,160 @@
+"""
+Per-request SQL statement budget
+
+When QUERY_BUDGET_ENABLED is set, every statement executed during a request
+is counted and timed, and identical statement texts are tallied. A request
+that issues more than QUERY_BUDGET_MAX_STATEMENTS statements, or repeats one
+statement QUERY_BUDGET_REPEAT_THRESHOLD times or more (the usual N+1
+signature), is logged with its worst offenders. When disabled no listeners
+or request hooks are installed at all.
+
+capture_queries() and assert_max_queries() count statements without the
+request hooks, for use in tests and scripts.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from app import db
+from app.utils.metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+# Characters of SQL shown per statement in budget warnings
+STATEMENT_PREVIEW = 200
+
+statement_counts = histogram('request_statement_count', (1, 2, 5, 10, 20, 50, 100, 200))
+db_time_ms = histogram('request_db_time_ms', (1, 5, 10, 25, 50, 100, 250, 1000))
+
+
+class QueryStats:
+    """Statements seen during one request or capture block"""
+
+    __slots__ = ('count', 'seconds', 'shapes', '_started')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        self._started = []
+
+    def before(self, statement):
+        self.count += 1
+        self.shapes[statement] += 1
+        self._started.append(time.perf_counter())
+
+    def after(self):
+        if self._started:
+            self.seconds += time.perf_counter() - self._started.pop()
+
+    def repeated(self, threshold):
+        """Statement texts executed at least threshold times, most frequent first"""
+        return [(statement, count) for statement, count in self.shapes.most_common() if count >= threshold]
+
+    def report(self, limit=5):
+        """Human-readable summary of the most repeated statements"""
+        lines = [f"{self.count} statements, {self.seconds * 1000:.1f} ms"]
+        for statement, count in self.shapes.most_common(limit):
+            lines.append(f"  {count}x {' '.join(statement.split())[:STATEMENT_PREVIEW]}")
+        return "\n".join(lines)
+
+
+def init_query_budget(app):
+    """Install the statement listeners and request hooks if QUERY_BUDGET_ENABLED"""
+    if not app.config['QUERY_BUDGET_ENABLED']:
+        return
+
+    max_statements = app.config['QUERY_BUDGET_MAX_STATEMENTS']
+    repeat_threshold = app.config['QUERY_BUDGET_REPEAT_THRESHOLD']
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            stats = g.get('query_stats')
+            if stats is not None:
+                stats.before(statement)
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            stats = g.get('query_stats')
+            if stats is not None:
+                stats.after()
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def check_query_budget(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+
+        statement_counts.observe(stats.count)
+        db_time_ms.observe(stats.seconds * 1000)
+        response.headers['X-Query-Count'] = str(stats.count)
+
+        repeated = stats.repeated(repeat_threshold)
+        if stats.count > max_statements:
+            logger.warning(
+                f"{request.method} {request.path} exceeded query budget "
+                f"({stats.count} > {max_statements}): {stats.report()}"
+            )
+        elif repeated:
+            logger.warning(
+                f"{request.method} {request.path} suspected N+1, "
+                f"{repeated[0][1]} identical statements: {stats.report()}"
+            )
+        return response
+
+
+@contextmanager
+def capture_queries():
+    """
+    Count statements executed on db.engine inside the block; needs an app context
+
+        with capture_queries() as stats:
+            client.get('/accounts/')
+        assert stats.count <= 5, stats.report()
+    """
+    stats = QueryStats()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats.before(statement)
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats.after()
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        event.remove(engine, 'after_cursor_execute', after_cursor_execute)
+
+
+def assert_max_queries(client, max_statements, path, method='GET', **kwargs):
+    """
+    Request path through a Flask test client and fail if it issues more than
+    max_statements SQL statements
+    Returns:
+        The test client response
+    Raises:
+        AssertionError: With the most repeated statements if over budget
+    """
+    with client.application.app_context():
+        with capture_queries() as stats:
+            response = client.open(path, method=method, **kwargs)
+    assert stats.count <= max_statements, (
+        f"{method} {path} issued {stats.count} statements, budget {max_statements}\n{stats.report()}"
+    )
+    return response
@@ -0,0 +1,176 @@
+"""
+Read models for the JSON list endpoints
+
+Plain __slots__ rows built straight from Core result tuples: no ORM
+entities, identity map or change tracking. to_json() returns the same
+shape the endpoints have always returned. The HTML pages keep using the
+ORM models, which they need for relationships and properties.
+"""
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.exceptions import Forbidden
+
+from app import db
+from app.models import Account, Card, Transaction
+from app.services.balance_shards import shard_total
+from app.services.transaction_service import TransactionService
+from app.utils.money import to_major
+
+logger = logging.getLogger(__name__)
+
+
+class AccountRow:
+    __slots__ = ('account_id', 'account_number', 'balance_cents', 'status', 'created_at')
+
+    def __init__(self, account_id, account_number, balance_cents, status, created_at):
+        self.account_id = account_id
+        self.account_number = account_number
+        self.balance_cents = balance_cents
+        self.status = status
+        self.created_at = created_at
+
+    def to_json(self):
+        return {
+            'account_id': str(self.account_id),
+            'account_number': self.account_number,
+            'balance': to_major(self.balance_cents),
+            'status': self.status,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class TransactionRow:
+    __slots__ = ('transaction_id', 'amount_cents', 'transaction_type', 'status', 'reference',
+                 'created_at', 'from_account_id', 'to_account_id')
+
+    def __init__(self, transaction_id, amount_cents, transaction_type, status, reference,
+                 created_at, from_account_id, to_account_id):
+        self.transaction_id = transaction_id
+        self.amount_cents = amount_cents
+        self.transaction_type = transaction_type
+        self.status = status
+        self.reference = reference
+        self.created_at = created_at
+        self.from_account_id = from_account_id
+        self.to_account_id = to_account_id
+
+    def to_json(self):
+        return {
+            'transaction_id': str(self.transaction_id),
+            'amount': to_major(self.amount_cents),
+            'type': self.transaction_type,
+            'status': self.status,
+            'reference': self.reference,
+            'timestamp': self.created_at.isoformat(),
+            'from_account': str(self.from_account_id) if self.from_account_id else None,
+            'to_account': str(self.to_account_id)
+        }
+
+
+class CardRow:
+    __slots__ = ('card_id', 'last_four', 'expiry_date', 'is_virtual', 'is_active', 'created_at')
+
+    def __init__(self, card_id, card_number, expiry_date, is_virtual, is_active, created_at):
+        self.card_id = card_id
+        self.last_four = card_number[-4:]
+        self.expiry_date = expiry_date
+        self.is_virtual = is_virtual
+        self.is_active = is_active
+        self.created_at = created_at
+
+    def to_json(self):
+        return {
+            'card_id': str(self.card_id),
+            'last_four': self.last_four,
+            'expiry_date': self.expiry_date,
+            'is_virtual': self.is_virtual,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class ReadModelService:
+
+    @staticmethod
+    def account_rows(user_id):
+        """
+        Get a user's accounts as AccountRow, balances including shard totals
+        Args:
+            user_id: UUID of the user
+        Returns:
+            List[AccountRow]
+        """
+        try:
+            result = db.session.execute(select(
+                Account.account_id, Account.account_number,
+                Account.balance_cents + shard_total(Account.account_id),
+                Account.status, Account.created_at
+            ).where(Account.user_id == user_id))
+            return [AccountRow(account_id, number, int(balance), status, created_at)
+                    for account_id, number, balance, status, created_at in result]
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to fetch account rows for user {user_id}: {str(e)}")
+            raise ValueError("Failed to retrieve accounts")
+
+    @staticmethod
+    def transaction_rows(user_id, account_id=None, limit=50, offset=0, cursor=None):
+        """
+        Get one page of transaction history as TransactionRow; same paging and
+        arguments as TransactionService.get_transaction_history
+        Returns:
+            List[TransactionRow]: Newest first
+        Raises:
+            Forbidden: If account_id is not the user's
+            InvalidInputError: If the cursor is malformed
+        """
+        try:
+            page = TransactionService._history_page(user_id, account_id, limit, offset, cursor)
+            result = db.session.execute(select(
+                Transaction.transaction_id, Transaction.amount_cents, Transaction.transaction_type,
+                Transaction.status, Transaction.reference, Transaction.created_at,
+                Transaction.from_account_id, Transaction.to_account_id
+            ).join(page, Transaction.transaction_id == page.c.transaction_id).order_by(
+                Transaction.created_at.desc(),
+                Transaction.transaction_id.desc()
+            ))
+            return [TransactionRow(*row) for row in result]
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get transaction rows for user {user_id}: {str(e)}")
+            raise ValueError("Failed to retrieve transaction history")
+
+    @staticmethod
+    def card_rows(user_id, account_id=None):
+        """
+        Get a user's cards as CardRow, newest first
+        Args:
+            user_id: UUID of the user
+            account_id: Optional specific account UUID
+        Returns:
+            List[CardRow]
+        Raises:
+            Forbidden: If account_id is not the user's
+        """
+        try:
+            query = select(
+                Card.card_id, Card.card_number, Card.expiry_date, Card.is_virtual,
+                Card.is_active, Card.created_at
+            ).join(Account).where(Account.user_id == user_id)
+
+            if account_id:
+                # Verify account ownership
+                owned = db.session.execute(select(Account.account_id).where(
+                    Account.account_id == account_id,
+                    Account.user_id == user_id
+                )).first()
+                if not owned:
+                    raise Forbidden(description="Unauthorized access to account")
+
+                query = query.where(Card.account_id == account_id)
+
+            result = db.session.execute(query.order_by(Card.created_at.desc()))
+            return [CardRow(*row) for row in result]
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to fetch card rows for user {user_id}: {str(e)}")
+            raise ValueError("Failed to retrieve cards")
@@ -4,7 +4,8 @@ from functools import wraps
 
 import phonenumbers
 from flask import session, jsonify, current_app, redirect, url_for, request
-from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.utils import pin_hashing
 
 
 # Authentication Decorators
@@ -96,10 +97,10 @@ def validate_cnic(cnic):
 def hash_pin(pin):
     """Secure PIN hashing with app secret"""
     secret = current_app.config['SECRET_KEY']
-    return generate_password_hash(f"{pin}{secret}")
+    return pin_hashing.hash_pin(f"{pin}{secret}")
 
 
 def verify_pin(pin_hash, pin):
     """PIN verification with timing attack protection"""
     secret = current_app.config['SECRET_KEY']
-    return check_password_hash(pin_hash, f"{pin}{secret}")
+    return pin_hashing.verify_pin(pin_hash, f"{pin}{secret}")
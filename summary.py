@@ -0,0 +1,132 @@
+"""
+Dashboard summary
+
+One statement returns a user's accounts with their balances, the most recent
+transactions and this month's transaction count. Results are cached per
+user in each worker and dropped when a committed write touches one of the
+user's accounts; writes committed by other workers are picked up once the
+entry's SUMMARY_CACHE_TTL runs out.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import literal, null, or_, select, type_coerce, union_all
+
+from app import db
+from app.models import Account, Transaction
+from app.services.balance_shards import shard_total
+from app.utils.invalidating_cache import InvalidatingCache
+
+logger = logging.getLogger(__name__)
+
+# Summaries per user and recent_limit
+_summaries = InvalidatingCache('summary', 'SUMMARY_CACHE_TTL', 'SUMMARY_CACHE_SIZE')
+
+
+class SummaryService:
+
+    @staticmethod
+    def get_summary(user_id, recent_limit=5):
+        """
+        Get the dashboard summary for a user, from cache when fresh
+        Args:
+            user_id: UUID of user
+            recent_limit: Number of recent transactions to include
+        Returns:
+            Dict: accounts (account_id, account_number, balance_cents, status, created_at),
+                total_balance_cents, recent_transactions and recent_count (this month)
+        """
+        return _summaries.get(user_id, recent_limit, lambda: SummaryService._load(user_id, recent_limit))
+
+    @staticmethod
+    def _load(user_id, recent_limit):
+        """Run the single summary query and shape its rows"""
+        uuid_type = Account.account_id.type
+        user_accounts = select(Account.account_id).where(Account.user_id == user_id).cte('user_accounts')
+        owned = select(user_accounts.c.account_id)
+
+        accounts = select(
+            literal('account').label('kind'),
+            Account.account_id.label('id'),
+            Account.account_number.label('label'),
+            (Account.balance_cents + shard_total(Account.account_id)).label('amount_cents'),
+            Account.status.label('status'),
+            Account.created_at.label('created_at'),
+            type_coerce(null(), uuid_type).label('from_account_id'),
+            type_coerce(null(), uuid_type).label('to_account_id'),
+            type_coerce(null(), Transaction.reference.type).label('reference'),
+        ).where(Account.user_id == user_id)
+
+        # Same shape as the history query: one index-driven branch per side
+        branches = []
+        for column in (Transaction.from_account_id, Transaction.to_account_id):
+            recent = select(
+                Transaction.transaction_id, Transaction.transaction_type, Transaction.amount_cents,
+                Transaction.status, Transaction.created_at, Transaction.from_account_id,
+                Transaction.to_account_id, Transaction.reference
+            ).where(column.in_(owned)).order_by(
+                Transaction.created_at.desc(), Transaction.transaction_id.desc()
+            ).limit(recent_limit).subquery()
+            branches.append(select(
+                literal('transaction'), recent.c.transaction_id, recent.c.transaction_type,
+                recent.c.amount_cents, recent.c.status, recent.c.created_at,
+                recent.c.from_account_id, recent.c.to_account_id, recent.c.reference
+            ))
+
+        month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        count = select(
+            literal('count'), null(), null(), db.func.count(), null(), null(), null(), null(), null()
+        ).select_from(Transaction).where(
+            or_(Transaction.from_account_id.in_(owned), Transaction.to_account_id.in_(owned)),
+            Transaction.created_at >= month_start
+        )
+
+        rows = db.session.execute(union_all(accounts, *branches, count)).all()
+
+        summary = {'accounts': [], 'total_balance_cents': 0, 'recent_transactions': [], 'recent_count': 0}
+        seen = set()
+        for row in rows:
+            if row.kind == 'account':
+                balance = int(row.amount_cents or 0)
+                summary['accounts'].append({
+                    'account_id': row.id,
+                    'account_number': row.label,
+                    'balance_cents': balance,
+                    'status': row.status,
+                    'created_at': row.created_at,
+                })
+                summary['total_balance_cents'] += balance
+            elif row.kind == 'transaction':
+                # Own-account transfers come back from both branches
+                if row.id in seen:
+                    continue
+                seen.add(row.id)
+                summary['recent_transactions'].append({
+                    'transaction_id': row.id,
+                    'transaction_type': row.label,
+                    'amount_cents': int(row.amount_cents),
+                    'status': row.status,
+                    'created_at': row.created_at,
+                    'from_account_id': row.from_account_id,
+                    'to_account_id': row.to_account_id,
+                    'reference': row.reference,
+                })
+            else:
+                summary['recent_count'] = int(row.amount_cents)
+
+        summary['accounts'].sort(key=lambda acc: (acc['created_at'] or datetime.min, str(acc['account_id'])))
+        summary['recent_transactions'].sort(
+            key=lambda txn: (txn['created_at'], str(txn['transaction_id'])), reverse=True
+        )
+        del summary['recent_transactions'][recent_limit:]
+        return summary
+
+
+def mark_summaries_stale(*user_ids):
+    """Drop these users' cached summaries once the current database transaction commits"""
+    _summaries.mark_stale(*user_ids)
+
+
+def invalidate_summaries(user_ids):
+    """Drop cached summaries for these users immediately"""
+    _summaries.invalidate(user_ids)
@@ -1,28 +1,54 @@
+import base64
 import logging
-from datetime import datetime, timedelta
-from decimal import Decimal
-
-from sqlalchemy.exc import SQLAlchemyError
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import and_, bindparam, insert, or_, select, union_all, update
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import joinedload
 from werkzeug.exceptions import NotFound, Forbidden
 
 from app import db
-from app.models import Transaction, Account, FraudAlert
-from app.utils.validators import validate_amount
+from app.models import Transaction, Account, FraudCheckJob
+from app.services.activity import ActivityService, activity_deltas
+from app.services.balance_shards import BalanceShardService, shard_total
+from app.services.group_commit import GroupCommitUnavailable, get_group_committer
+from app.services.ledger import LedgerService, postings
+from app.services.summary import mark_summaries_stale
+from app.utils.ids import uuid7
+from app.utils.money import require_cents
+from app.utils.validators import validate_amount, InvalidInputError
 
 logger = logging.getLogger(__name__)
 
+# Retry policy for transfers that lose a lock or serialization race
+MAX_TRANSFER_RETRIES = 5
+TRANSFER_RETRY_BACKOFF = 0.02  # seconds, doubled on each attempt
+RETRYABLE_PGCODES = ('40001', '40P01')  # serialization_failure, deadlock_detected
+
+# Largest number of items accepted by a single batch request
+MAX_BATCH_SIZE = 10000
+
+# Columns written by the streaming export, in output order
+EXPORT_COLUMNS = ('transaction_id', 'created_at', 'transaction_type', 'amount_cents', 'status',
+                  'reference', 'from_account_id', 'to_account_id')
+
 
 class TransactionService:
 
     @staticmethod
     def transfer_funds(user_id, from_account_id, to_account_id, amount, reference=""):
         """
-        Transfer funds between accounts with validation and fraud checks
+        Transfer funds between accounts with validation; fraud checks are
+        queued for the background fraud worker
         Args:
             user_id: UUID of requesting user
             from_account_id: UUID of source account
             to_account_id: UUID of target account
-            amount: Decimal amount to transfer
+            amount: Integer amount to transfer, in cents
             reference: Optional transaction reference
         Returns:
             Transaction: The created transaction record
@@ -31,66 +57,144 @@ class TransactionService:
             NotFound: If accounts don't exist
             ValueError: If transfer is invalid
         """
-        try:
-            # Validate amount
-            amount = validate_amount(amount)
+        # Validate amount
+        amount = require_cents(amount)
+
+        # Check for self-transfer
+        if str(from_account_id) == str(to_account_id):
+            raise ValueError("Cannot transfer to same account")
+
+        for attempt in range(1, MAX_TRANSFER_RETRIES + 1):
+            try:
+                transaction = TransactionService._commit_write(
+                    TransactionService._apply_transfer,
+                    user_id, from_account_id, to_account_id, amount, reference
+                )
+                break
+            except OperationalError as e:
+                db.session.rollback()
+                if not TransactionService._is_retryable(e) or attempt == MAX_TRANSFER_RETRIES:
+                    logger.error(
+                        f"Transfer failed between {from_account_id} and {to_account_id}: {str(e)}"
+                    )
+                    raise ValueError("Transaction processing failed")
+                logger.warning(
+                    f"Transfer conflict between {from_account_id} and {to_account_id}, "
+                    f"retrying (attempt {attempt})"
+                )
+                time.sleep(TRANSFER_RETRY_BACKOFF * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.error(
+                    f"Transfer failed between {from_account_id} and {to_account_id}: {str(e)}"
+                )
+                raise ValueError("Transaction processing failed")
+            except Exception:
+                db.session.rollback()
+                raise
 
-            # Verify source account ownership
-            from_account = Account.query.filter_by(
-                account_id=from_account_id,
-                user_id=user_id
-            ).first()
+        logger.info(
+            f"Transfer of {amount} cents from {from_account_id} to {to_account_id} by user {user_id}"
+        )
+        return transaction
 
-            if not from_account:
-                raise Forbidden(description="Unauthorized access to source account")
-
-            # Verify target account exists
-            to_account = Account.query.get(to_account_id)
-            if not to_account:
-                raise NotFound(description="Recipient account not found")
-
-            # Check sufficient balance
-            if from_account.balance < amount:
-                raise ValueError("Insufficient funds for transfer")
-
-            # Check for self-transfer
-            if from_account_id == to_account_id:
-                raise ValueError("Cannot transfer to same account")
-
-            # Create transaction record
-            transaction = Transaction(
-                from_account_id=from_account_id,
-                to_account_id=to_account_id,
-                amount=amount,
-                transaction_type='transfer',
-                reference=reference,
-                status='pending',
-                created_at=datetime.utcnow()
-            )
+    @staticmethod
+    def _apply_transfer(user_id, from_account_id, to_account_id, amount, reference):
+        """
+        Apply a single transfer attempt; the caller commits.
 
-            # Update balances
-            from_account.balance -= amount
-            to_account.balance += amount
-            transaction.status = 'completed'
-            transaction.completed_at = datetime.utcnow()
+        Both account rows are locked with one SELECT ... FOR UPDATE ordered by
+        account_id, so concurrent transfers always acquire locks in the same
+        order and cannot deadlock. Balances are then moved with conditional
+        UPDATE statements instead of read-modify-write in Python.
 
-            db.session.add(transaction)
-            db.session.commit()
-
-            # Fraud detection and prevention
-            TransactionService._check_for_fraud(transaction)
+        The locks are FOR NO KEY UPDATE (plain FOR UPDATE on SQLite), so
+        foreign key checks from concurrent deposits into the same accounts
+        are not blocked.
+        """
+        accounts = Account.query.filter(
+            Account.account_id.in_([from_account_id, to_account_id])
+        ).order_by(Account.account_id).with_for_update(key_share=True).all()
+        accounts = {str(acc.account_id): acc for acc in accounts}
+
+        # Verify source account ownership
+        from_account = accounts.get(str(from_account_id))
+        if not from_account or str(from_account.user_id) != str(user_id):
+            raise Forbidden(description="Unauthorized access to source account")
+
+        # Verify target account exists
+        to_account = accounts.get(str(to_account_id))
+        if not to_account:
+            raise NotFound(description="Recipient account not found")
+
+        # Debit only if the balance covers the amount. For a hot account the
+        # balance includes its shard rows; shards only grow while the account
+        # row is locked, so the check stays safe.
+        available = Account.balance_cents
+        if from_account.balance_shards:
+            available = available + shard_total(from_account.account_id)
+        debited = db.session.execute(
+            update(Account)
+            .where(Account.account_id == from_account.account_id, available >= amount)
+            .values(balance_cents=Account.balance_cents - amount)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not debited:
+            raise ValueError("Insufficient funds for transfer")
+
+        db.session.execute(
+            update(Account)
+            .where(Account.account_id == to_account.account_id)
+            .values(balance_cents=Account.balance_cents + amount)
+            .execution_options(synchronize_session=False)
+        )
+
+        now = datetime.utcnow()
+        transaction = Transaction(
+            transaction_id=uuid7(),
+            from_account_id=from_account.account_id,
+            to_account_id=to_account.account_id,
+            amount_cents=amount,
+            transaction_type='transfer',
+            reference=reference,
+            status='completed',
+            created_at=now,
+            completed_at=now
+        )
+        db.session.add(transaction)
+        # Flush the transaction first so the postings' and job's foreign keys are satisfied
+        db.session.flush()
+        LedgerService.post(postings(
+            transaction.transaction_id, from_account.account_id, to_account.account_id, amount, now
+        ))
+        ActivityService.record(activity_deltas(from_account, to_account, amount, now, transaction.transaction_id))
+        db.session.add(FraudCheckJob(transaction_id=transaction.transaction_id, created_at=now))
+        mark_summaries_stale(from_account.user_id, to_account.user_id)
+        return transaction
 
-            logger.info(
-                f"Transfer of {amount} from {from_account_id} to {to_account_id} by user {user_id}"
-            )
-            return transaction
+    @staticmethod
+    def _commit_write(apply, *args):
+        """
+        Run apply(*args) and commit it, sharing the commit with concurrent
+        writes when group commit is enabled
+        """
+        committer = get_group_committer()
+        if committer:
+            try:
+                return committer.submit(apply, *args)
+            except GroupCommitUnavailable as e:
+                logger.warning(f"Committing directly: {str(e)}")
+        result = apply(*args)
+        db.session.commit()
+        return result
 
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            logger.error(
-                f"Transfer failed between {from_account_id} and {to_account_id}: {str(e)}"
-            )
-            raise ValueError("Transaction processing failed")
+    @staticmethod
+    def _is_retryable(error):
+        """Whether a database error is a transient lock/serialization conflict"""
+        pgcode = getattr(error.orig, 'pgcode', None)
+        if pgcode in RETRYABLE_PGCODES:
+            return True
+        return 'database is locked' in str(error.orig)
 
     @staticmethod
     def create_deposit(user_id, account_id, amount, reference=""):
@@ -99,87 +203,377 @@ class TransactionService:
         Args:
             user_id: UUID of requesting user
             account_id: UUID of target account
-            amount: Decimal deposit amount
+            amount: Integer deposit amount, in cents
             reference: Optional transaction reference
         Returns:
             Transaction: The created transaction record
         """
+        amount = require_cents(amount)
         try:
-            amount = validate_amount(amount)
-
-            # Verify account ownership
-            account = Account.query.filter_by(
-                account_id=account_id,
-                user_id=user_id
-            ).first()
+            transaction = TransactionService._commit_write(
+                TransactionService._apply_deposit, user_id, account_id, amount, reference
+            )
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Deposit failed to account {account_id}: {str(e)}")
+            raise ValueError("Deposit processing failed")
 
-            if not account:
-                raise Forbidden(description="Unauthorized access to account")
+        logger.info(f"Deposit of {amount} cents to account {account_id}")
+        return transaction
 
-            # Create deposit transaction
-            transaction = Transaction(
-                to_account_id=account_id,
-                amount=amount,
-                transaction_type='deposit',
-                reference=reference,
-                status='completed',
-                created_at=datetime.utcnow(),
-                completed_at=datetime.utcnow()
+    @staticmethod
+    def _apply_deposit(user_id, account_id, amount, reference):
+        """Apply a single deposit; the caller commits"""
+        # Verify account ownership
+        account = Account.query.filter_by(
+            account_id=account_id,
+            user_id=user_id
+        ).first()
+
+        if not account:
+            raise Forbidden(description="Unauthorized access to account")
+
+        # Create deposit transaction
+        now = datetime.utcnow()
+        transaction = Transaction(
+            transaction_id=uuid7(),
+            to_account_id=account_id,
+            amount_cents=amount,
+            transaction_type='deposit',
+            reference=reference,
+            status='completed',
+            created_at=now,
+            completed_at=now
+        )
+
+        if account.balance_shards:
+            # Hot account: credit one shard row instead of the contended account row
+            db.session.add(transaction)
+            db.session.flush()
+            BalanceShardService.credit(
+                account.account_id, account.balance_shards, amount, transaction.transaction_id
             )
-
-            # Update balance
-            account.balance += amount
+        else:
+            # Update balance atomically in SQL
+            account.balance_cents = Account.balance_cents + amount
             db.session.add(transaction)
-            db.session.commit()
+            db.session.flush()
+        LedgerService.post(postings(transaction.transaction_id, None, account.account_id, amount, now))
+        ActivityService.record(activity_deltas(None, account, amount, now, transaction.transaction_id))
+        db.session.add(FraudCheckJob(transaction_id=transaction.transaction_id, created_at=now))
+        mark_summaries_stale(account.user_id)
+        return transaction
 
-            logger.info(f"Deposit of {amount} to account {account_id}")
-            return transaction
+    @staticmethod
+    def process_batch(user_id, items):
+        """
+        Apply a batch of transfers/deposits in one database transaction
+        Args:
+            user_id: UUID of requesting user
+            items: List of dicts with type, from_account, to_account, amount (major units), reference
+        Returns:
+            List[Dict]: Per-item results in request order
+        Raises:
+            ValueError: If the batch is too large or cannot be processed
+
+        Every touched account is locked once (ordered by account_id), items are
+        applied in order against the locked balances in memory, and the net
+        delta per account is written back with a single executemany UPDATE.
+        Transactions, their journal postings and fraud-check jobs are inserted
+        with multi-row INSERTs.
+        """
+        if len(items) > MAX_BATCH_SIZE:
+            raise ValueError(f"Batch exceeds maximum of {MAX_BATCH_SIZE} items")
+
+        results = [None] * len(items)
+        parsed = []
+        for index, item in enumerate(items):
+            try:
+                parsed.append((index, TransactionService._parse_batch_item(item)))
+            except (InvalidInputError, ValueError) as e:
+                results[index] = {'index': index, 'status': 'rejected',
+                                  'error': getattr(e, 'message', str(e))}
+
+        account_ids = {acc_id for _, item in parsed
+                       for acc_id in (item['from_account'], item['to_account']) if acc_id}
+
+        try:
+            accounts = Account.query.filter(
+                Account.account_id.in_(account_ids)
+            ).order_by(Account.account_id).with_for_update().all() if account_ids else []
+            owners = {acc.account_id: str(acc.user_id) for acc in accounts}
+            by_id = {acc.account_id: acc for acc in accounts}
+            shard_totals = BalanceShardService.totals(
+                [acc.account_id for acc in accounts if acc.balance_shards]
+            )
+            balances = {acc.account_id: acc.balance_cents + shard_totals.get(acc.account_id, 0)
+                        for acc in accounts}
+            deltas = defaultdict(int)
+
+            now = datetime.utcnow()
+            transaction_rows = []
+            journal_rows = []
+            activity = []
+            job_rows = []
+            for index, item in parsed:
+                source, target, amount = item['from_account'], item['to_account'], item['amount']
+                owned = source if item['type'] == 'transfer' else target
+
+                if owners.get(owned) != str(user_id):
+                    error = 'Unauthorized access to account'
+                elif target not in balances:
+                    error = 'Recipient account not found'
+                elif source and balances[source] < amount:
+                    error = 'Insufficient funds'
+                else:
+                    error = None
+
+                if error:
+                    results[index] = {'index': index, 'status': 'rejected', 'error': error}
+                    continue
+
+                if source:
+                    balances[source] -= amount
+                    deltas[source] -= amount
+                balances[target] += amount
+                deltas[target] += amount
+
+                transaction_id = uuid7()
+                transaction_rows.append({
+                    'transaction_id': transaction_id,
+                    'from_account_id': source,
+                    'to_account_id': target,
+                    'amount_cents': amount,
+                    'transaction_type': item['type'],
+                    'reference': item['reference'],
+                    'status': 'completed',
+                    'is_fraudulent': False,
+                    'created_at': now,
+                    'completed_at': now
+                })
+                journal_rows.extend(postings(transaction_id, source, target, amount, now))
+                activity.extend(activity_deltas(
+                    by_id[source] if source else None, by_id[target], amount, now, transaction_id
+                ))
+                job_rows.append({'transaction_id': transaction_id, 'created_at': now})
+                results[index] = {'index': index, 'status': 'completed',
+                                  'transaction_id': str(transaction_id)}
+
+            balance_updates = [{'b_account_id': acc_id, 'b_delta': delta}
+                               for acc_id, delta in sorted(deltas.items()) if delta]
+            if balance_updates:
+                accounts_table = Account.__table__
+                db.session.execute(
+                    accounts_table.update()
+                    .where(accounts_table.c.account_id == bindparam('b_account_id'))
+                    .values(balance_cents=accounts_table.c.balance_cents + bindparam('b_delta')),
+                    balance_updates
+                )
+            if transaction_rows:
+                db.session.execute(insert(Transaction.__table__), transaction_rows)
+            LedgerService.post(journal_rows)
+            ActivityService.record(activity)
+            if job_rows:
+                db.session.execute(insert(FraudCheckJob.__table__), job_rows)
+            mark_summaries_stale(*{owners[acc_id] for acc_id in deltas})
+            db.session.commit()
 
         except SQLAlchemyError as e:
             db.session.rollback()
-            logger.error(f"Deposit failed to account {account_id}: {str(e)}")
-            raise ValueError("Deposit processing failed")
+            logger.error(f"Batch of {len(items)} items failed for user {user_id}: {str(e)}")
+            raise ValueError("Batch processing failed")
+
+        logger.info(
+            f"Batch for user {user_id}: {len(transaction_rows)} applied, "
+            f"{len(items) - len(transaction_rows)} rejected"
+        )
+        return results
 
     @staticmethod
-    def get_transaction_history(user_id, account_id=None, limit=50, offset=0):
+    def _parse_batch_item(item):
+        """Validate and normalize a single batch item"""
+        if not isinstance(item, dict):
+            raise ValueError("Item must be an object")
+
+        txn_type = item.get('type')
+        if txn_type == 'transfer':
+            required_fields = ['from_account', 'to_account', 'amount']
+        elif txn_type == 'deposit':
+            required_fields = ['to_account', 'amount']
+        else:
+            raise ValueError("Invalid transaction type")
+
+        if not all(field in item for field in required_fields):
+            raise ValueError(f"{txn_type.capitalize()} requires: {required_fields}")
+
+        try:
+            to_account = uuid.UUID(str(item['to_account']))
+            from_account = uuid.UUID(str(item['from_account'])) if txn_type == 'transfer' else None
+        except ValueError:
+            raise ValueError("Invalid account id")
+
+        if from_account == to_account:
+            raise ValueError("Cannot transfer to same account")
+
+        return {
+            'type': txn_type,
+            'from_account': from_account,
+            'to_account': to_account,
+            'amount': validate_amount(item['amount']),
+            'reference': item.get('reference', '')
+        }
+
+    @staticmethod
+    def get_transaction_history(user_id, account_id=None, limit=50, offset=0, cursor=None,
+                                with_accounts=False):
         """
         Get transaction history for user with pagination
         Args:
             user_id: UUID of user
             account_id: Optional specific account UUID
             limit: Max results to return
-            offset: Pagination offset
+            offset: Pagination offset (deprecated, use cursor)
+            cursor: Opaque cursor from encode_cursor() of the last row seen
+            with_accounts: Also load sender/receiver account numbers in the same query
         Returns:
             List[Transaction]: List of transaction records
+        Raises:
+            InvalidInputError: If the cursor is malformed
         """
         try:
-            base_query = Transaction.query.join(
-                Account,
-                (Transaction.from_account_id == Account.account_id) |
-                (Transaction.to_account_id == Account.account_id)
-            ).filter(Account.user_id == user_id)
-
-            if account_id:
-                # Verify account belongs to user
-                if not Account.query.filter_by(
-                        account_id=account_id,
-                        user_id=user_id
-                ).first():
-                    raise Forbidden(description="Unauthorized access to account")
-
-                base_query = base_query.filter(
-                    (Transaction.from_account_id == account_id) |
-                    (Transaction.to_account_id == account_id)
-                )
+            page = TransactionService._history_page(user_id, account_id, limit, offset, cursor)
 
-            return base_query.order_by(
-                Transaction.created_at.desc()
-            ).limit(limit).offset(offset).all()
+            query = Transaction.query.join(page, Transaction.transaction_id == page.c.transaction_id)
+            if with_accounts:
+                query = query.options(*TransactionService._account_number_loads())
+            return query.order_by(
+                Transaction.created_at.desc(),
+                Transaction.transaction_id.desc()
+            ).all()
 
         except SQLAlchemyError as e:
             logger.error(f"Failed to get transactions for user {user_id}: {str(e)}")
             raise ValueError("Failed to retrieve transaction history")
 
+    @staticmethod
+    def _history_page(user_id, account_id, limit, offset, cursor):
+        """
+        Subquery of (transaction_id, created_at) for one page of a user's
+        history, newest first; shared by the ORM and read-model paths
+        Raises:
+            Forbidden: If account_id is not the user's
+            InvalidInputError: If the cursor is malformed
+        """
+        if account_id:
+            # Verify account belongs to user
+            if not Account.query.filter_by(
+                    account_id=account_id,
+                    user_id=user_id
+            ).first():
+                raise Forbidden(description="Unauthorized access to account")
+
+            account_filter = [account_id]
+        else:
+            account_filter = select(Account.account_id).where(
+                Account.user_id == user_id
+            ).scalar_subquery()
+
+        seek = None
+        if cursor:
+            # Keyset pagination: seek past the last row instead of skipping rows
+            created_at, transaction_id = TransactionService.decode_cursor(cursor)
+            seek = or_(
+                Transaction.created_at < created_at,
+                and_(Transaction.created_at == created_at,
+                     Transaction.transaction_id < transaction_id)
+            )
+            offset = 0
+
+        # One branch per side of the transfer, each walking its own
+        # (account, created_at) index and stopping after enough rows
+        branches = []
+        for column in (Transaction.from_account_id, Transaction.to_account_id):
+            branch = select(Transaction.transaction_id, Transaction.created_at).where(
+                column.in_(account_filter)
+            )
+            if seek is not None:
+                branch = branch.where(seek)
+            branches.append(select(branch.order_by(
+                Transaction.created_at.desc(),
+                Transaction.transaction_id.desc()
+            ).limit(limit + offset).subquery()))
+
+        # Own-account transfers appear in both branches; collapse them
+        merged = union_all(*branches).subquery()
+        return select(merged.c.transaction_id, merged.c.created_at).group_by(
+            merged.c.transaction_id, merged.c.created_at
+        ).order_by(
+            merged.c.created_at.desc(),
+            merged.c.transaction_id.desc()
+        ).limit(limit).offset(offset).subquery()
+
+    @staticmethod
+    def stream_transactions(user_id, account_id=None, start=None, end=None, chunk_size=2000):
+        """
+        Stream a user's transactions oldest first with a server-side cursor
+        Args:
+            user_id: UUID of user
+            account_id: Optional specific account UUID
+            start: Optional datetime, inclusive lower bound on created_at
+            end: Optional datetime, exclusive upper bound on created_at
+            chunk_size: Rows fetched from the database per round trip
+        Returns:
+            Iterator[Row]: Rows of EXPORT_COLUMNS, without ORM objects
+        Raises:
+            Forbidden: If user doesn't own the account
+        """
+        if account_id:
+            if not Account.query.filter_by(account_id=account_id, user_id=user_id).first():
+                raise Forbidden(description="Unauthorized access to account")
+            account_filter = [account_id]
+        else:
+            account_filter = select(Account.account_id).where(
+                Account.user_id == user_id
+            ).scalar_subquery()
+
+        query = select(*[getattr(Transaction, column) for column in EXPORT_COLUMNS]).where(or_(
+            Transaction.from_account_id.in_(account_filter),
+            Transaction.to_account_id.in_(account_filter)
+        ))
+        if start:
+            query = query.where(Transaction.created_at >= start)
+        if end:
+            query = query.where(Transaction.created_at < end)
+
+        return db.session.execute(
+            query.order_by(Transaction.created_at, Transaction.transaction_id)
+            .execution_options(stream_results=True, yield_per=chunk_size)
+        )
+
+    @staticmethod
+    def _account_number_loads():
+        """Join sender/receiver accounts into the transaction query, loading only their numbers"""
+        return (
+            joinedload(Transaction.sender_account).load_only(Account.account_number),
+            joinedload(Transaction.receiver_account).load_only(Account.account_number),
+        )
+
+    @staticmethod
+    def encode_cursor(transaction):
+        """Build an opaque pagination cursor positioned after the given transaction"""
+        raw = f"{transaction.created_at.isoformat()}|{transaction.transaction_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a cursor from encode_cursor() into (created_at, transaction_id)"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, transaction_id = base64.urlsafe_b64decode(padded).decode().split('|')
+            return datetime.fromisoformat(created_at), uuid.UUID(transaction_id)
+        except (ValueError, UnicodeDecodeError):
+            raise InvalidInputError("Invalid pagination cursor", field="cursor")
+
     @staticmethod
     def get_transaction_details(user_id, transaction_id):
         """
@@ -194,13 +588,16 @@ class TransactionService:
             NotFound: If transaction doesn't exist
         """
         try:
-            transaction = db.session.query(Transaction).join(
-                Account,
-                (Transaction.from_account_id == Account.account_id) |
-                (Transaction.to_account_id == Account.account_id)
+            user_accounts = select(Account.account_id).where(
+                Account.user_id == user_id
+            ).scalar_subquery()
+
+            transaction = Transaction.query.options(
+                *TransactionService._account_number_loads()
             ).filter(
-                Account.user_id == user_id,
-                Transaction.transaction_id == transaction_id
+                Transaction.transaction_id == transaction_id,
+                or_(Transaction.from_account_id.in_(user_accounts),
+                    Transaction.to_account_id.in_(user_accounts))
             ).first()
 
             if not transaction:
@@ -211,38 +608,3 @@ class TransactionService:
         except SQLAlchemyError as e:
             logger.error(f"Failed to get transaction {transaction_id}: {str(e)}")
             raise ValueError("Failed to retrieve transaction details")
-
-    @staticmethod
-    def _check_for_fraud(transaction):
-        """Internal fraud detection logic"""
-        try:
-            # Large amount check
-            if transaction.amount > Decimal('50000'):
-                alert = FraudAlert(
-                    transaction_id=transaction.transaction_id,
-                    reason='Large transaction amount',
-                    action_taken='flagged',
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(alert)
-
-            # Rapid successive transactions check
-            recent_txns = Transaction.query.filter(
-                Transaction.from_account_id == transaction.from_account_id,
-                Transaction.created_at > datetime.utcnow() - timedelta(minutes=5)
-            ).count()
-
-            if recent_txns > 3:
-                alert = FraudAlert(
-                    transaction_id=transaction.transaction_id,
-                    reason='High frequency transactions',
-                    action_taken='flagged',
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(alert)
-
-            db.session.commit()
-
-        except Exception as e:
-            logger.warning(f"Fraud detection failed for transaction {transaction.transaction_id}: {str(e)}")
-            db.session.rollback()
@@ -1,11 +1,19 @@
+import csv
+import io
+import json
 import logging
+import zlib
+from datetime import datetime, timedelta
 
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
+from flask import Blueprint, Response, request, jsonify, render_template, redirect, url_for, flash, stream_with_context
 from werkzeug.exceptions import BadRequest, NotFound, Forbidden
 from flask_login import login_required, current_user
 
-from app.services.transaction_service import TransactionService
-from app.utils.validators import validate_amount, InvalidInputError
+from app.services.read_models import ReadModelService
+from app.services.transaction_service import TransactionService, EXPORT_COLUMNS
+from app.utils.idempotency import idempotent
+from app.utils.money import to_major
+from app.utils.validators import validate_amount, validate_date, InvalidInputError
 
 transactions_bp = Blueprint('transactions', __name__)
 logger = logging.getLogger(__name__)
@@ -18,33 +26,54 @@ def get_transactions():
     try:
         account_id = request.args.get('account_id')
         limit = min(int(request.args.get('limit', 50)), 100)
+        cursor = request.args.get('cursor')
+        # Offset paging is deprecated in favour of cursor and ignored when a cursor is given
         offset = int(request.args.get('offset', 0))
 
-        transactions = TransactionService.get_transaction_history(
-            user_id=current_user.user_id,
-            account_id=account_id,
-            limit=limit,
-            offset=offset
-        )
+        wants_json = request.is_json or request.headers.get('Accept') == 'application/json'
+        if wants_json:
+            transactions = ReadModelService.transaction_rows(
+                user_id=current_user.user_id,
+                account_id=account_id,
+                limit=limit,
+                offset=offset,
+                cursor=cursor
+            )
+        else:
+            transactions = TransactionService.get_transaction_history(
+                user_id=current_user.user_id,
+                account_id=account_id,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                with_accounts=True
+            )
+        next_cursor = TransactionService.encode_cursor(transactions[-1]) \
+            if len(transactions) == limit else None
         
-        if request.is_json or request.headers.get('Accept') == 'application/json':
-            return jsonify([{
-                'transaction_id': str(txn.transaction_id),
-                'amount': float(txn.amount),
-                'type': txn.transaction_type,
-                'status': txn.status,
-                'reference': txn.reference,
-                'timestamp': txn.created_at.isoformat(),
-                'from_account': str(txn.from_account_id) if txn.from_account_id else None,
-                'to_account': str(txn.to_account_id)
-            } for txn in transactions]), 200
+        if wants_json:
+            response = jsonify([txn.to_json() for txn in transactions])
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+                response.headers['Link'] = '<{}>; rel="next"'.format(url_for(
+                    'transactions.get_transactions',
+                    account_id=account_id, limit=limit, cursor=next_cursor
+                ))
+            return response, 200
         else:
             return render_template('transactions.html', 
                                  transactions=transactions,
                                  account_id=account_id,
                                  limit=limit,
-                                 offset=offset)
+                                 cursor=cursor,
+                                 next_cursor=next_cursor)
 
+    except InvalidInputError as e:
+        if request.is_json or request.headers.get('Accept') == 'application/json':
+            return jsonify({'error': e.message, 'field': e.field, 'code': 'VALIDATION_ERROR'}), 400
+        else:
+            flash(e.message, 'danger')
+            return redirect(url_for('transactions.get_transactions'))
     except Exception as e:
         logger.error(f"Failed to get transactions: {str(e)}")
         if request.is_json or request.headers.get('Accept') == 'application/json':
@@ -54,6 +83,101 @@ def get_transactions():
             return redirect(url_for('accounts.dashboard'))
 
 
+@transactions_bp.route('/export', methods=['GET'])
+@login_required
+def export_transactions():
+    """Stream full transaction history as CSV or NDJSON"""
+    try:
+        export_format = request.args.get('format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            raise InvalidInputError("Format must be csv or ndjson", field="format")
+
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start = datetime.combine(validate_date(start), datetime.min.time()) if start else None
+        # The to date is inclusive
+        end = datetime.combine(validate_date(end), datetime.min.time()) + timedelta(days=1) if end else None
+        compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+        rows = TransactionService.stream_transactions(
+            user_id=current_user.user_id,
+            account_id=request.args.get('account_id'),
+            start=start,
+            end=end
+        )
+
+        logger.info(f"Exporting transactions for user {current_user.user_id} as {export_format}")
+
+        body = _export_csv(rows) if export_format == 'csv' else _export_ndjson(rows)
+        filename = f"transactions.{export_format}"
+        mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        if compress:
+            body = _gzip_stream(body)
+            filename += '.gz'
+            mimetype = 'application/gzip'
+
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+
+    except InvalidInputError as e:
+        return jsonify({'error': e.message, 'field': e.field, 'code': 'VALIDATION_ERROR'}), 400
+    except Forbidden as e:
+        return jsonify({'error': str(e), 'code': 'UNAUTHORIZED_ACCESS'}), 403
+    except Exception as e:
+        logger.error(f"Failed to export transactions: {str(e)}")
+        return jsonify({'error': 'Failed to export transactions', 'code': 'SERVER_ERROR'}), 500
+
+
+# Rows buffered before each chunk of export output is flushed
+EXPORT_FLUSH_ROWS = 1000
+
+
+def _export_value(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (int, float, bool)):
+        return value
+    return str(value)
+
+
+def _export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(['' if value is None else _export_value(value) for value in row])
+        if count % EXPORT_FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _export_ndjson(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, map(_export_value, row)))))
+        if len(lines) == EXPORT_FLUSH_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
 @transactions_bp.route('/<transaction_id>', methods=['GET'])
 @login_required
 def get_transaction_details(transaction_id):
@@ -64,7 +188,7 @@ def get_transaction_details(transaction_id):
         if request.is_json or request.headers.get('Accept') == 'application/json':
             return jsonify({
                 'transaction_id': str(transaction.transaction_id),
-                'amount': float(transaction.amount),
+                'amount': to_major(transaction.amount_cents),
                 'type': transaction.transaction_type,
                 'status': transaction.status,
                 'reference': transaction.reference,
@@ -105,6 +229,7 @@ def get_transaction_details(transaction_id):
 
 @transactions_bp.route('/', methods=['POST'])
 @login_required
+@idempotent
 def create_transaction():
     """Create a new transaction (transfer, deposit, etc.)"""
     try:
@@ -159,7 +284,7 @@ def create_transaction():
             return jsonify({
                 'transaction_id': str(transaction.transaction_id),
                 'status': transaction.status,
-                'amount': float(transaction.amount),
+                'amount': to_major(transaction.amount_cents),
                 'type': transaction.transaction_type,
                 'timestamp': transaction.created_at.isoformat()
             }), 201
@@ -197,3 +322,38 @@ def create_transaction():
         else:
             flash('Transaction failed', 'danger')
             return redirect(url_for('accounts.dashboard'))
+
+
+@transactions_bp.route('/batch', methods=['POST'])
+@login_required
+@idempotent
+def create_transaction_batch():
+    """Apply a batch of transfers/deposits in a single database transaction"""
+    try:
+        data = request.get_json(silent=True)
+
+        if not isinstance(data, dict) or not isinstance(data.get('transactions'), list):
+            raise BadRequest(description='Request body requires a transactions list')
+
+        results = TransactionService.process_batch(
+            user_id=current_user.user_id,
+            items=data['transactions']
+        )
+
+        succeeded = sum(1 for result in results if result['status'] == 'completed')
+        logger.info(f"Batch processed for user {current_user.user_id}: {succeeded}/{len(results)} completed")
+
+        return jsonify({
+            'results': results,
+            'completed': succeeded,
+            'rejected': len(results) - succeeded
+        }), 200
+
+    except BadRequest as e:
+        logger.warning(f"Invalid batch request: {str(e)}")
+        return jsonify({'error': str(e), 'code': 'VALIDATION_ERROR'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e), 'code': 'BATCH_REJECTED'}), 400
+    except Exception as e:
+        logger.error(f"Batch failed: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Batch failed', 'code': 'SERVER_ERROR'}), 500
@@ -6,6 +6,7 @@ import phonenumbers
 from flask import jsonify, request
 
 from app.utils.error_handlers import InvalidInputError
+from app.utils.money import MAX_AMOUNT_CENTS, parse_cents
 
 
 def validate_mobile_number(number):
@@ -62,14 +63,22 @@ def validate_cnic(cnic):
 
 
 def validate_amount(amount):
-    """Validate positive amount with 2 decimal places"""
+    """
+    Validate a positive amount with at most 2 decimal places
+    Returns:
+        int: Amount in cents
+    Raises:
+        InvalidInputError: If invalid
+    """
     try:
-        amount = float(amount)
-        if amount <= 0:
-            raise InvalidInputError("Amount must be positive", field="amount")
-        return round(amount, 2)
+        cents = parse_cents(amount)
     except ValueError:
         raise InvalidInputError("Invalid amount", field="amount")
+    if cents <= 0:
+        raise InvalidInputError("Amount must be positive", field="amount")
+    if cents > MAX_AMOUNT_CENTS:
+        raise InvalidInputError("Amount is too large", field="amount")
+    return cents
 
 
 def validate_date(date_str, fmt='%Y-%m-%d'):
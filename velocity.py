@@ -0,0 +1,192 @@
+"""
+Sliding-window velocity counters for the high-frequency fraud rule
+
+Each account keeps a fixed ring of time buckets, so recording a transfer and
+answering "transfers in the last N minutes" cost the same regardless of how
+many transactions exist. Two backends share one interface:
+
+    VelocityTracker        in-process, for a single fraud worker
+    SharedVelocityTracker  SQLite file, shared by every worker on the host
+
+Records may carry an event_id, such as the transaction_id, and an event is
+counted once however often it is recorded within the window. A fraud batch
+that fails and is retried, possibly by another worker, is then not counted
+twice.
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class VelocityTracker:
+    """In-process bucketed sliding window per account"""
+
+    def __init__(self, window=timedelta(minutes=5), bucket_seconds=10, max_accounts=100000):
+        self.bucket_seconds = bucket_seconds
+        self.size = max(1, int(window.total_seconds() // bucket_seconds))
+        self.max_accounts = max_accounts
+        # account_id -> [bucket ids, counts, newest bucket], least recently used first
+        self._accounts = OrderedDict()
+        # event_id -> bucket of events counted in the window, oldest first
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bucket(self, timestamp):
+        """Bucket number for a naive UTC timestamp"""
+        return int((timestamp - EPOCH).total_seconds() // self.bucket_seconds)
+
+    def record(self, account_id, timestamp, count=1, event_id=None):
+        """Add count transfers for account_id at timestamp, unless event_id was already counted"""
+        current = self.bucket(timestamp)
+        slot = current % self.size
+        with self._lock:
+            if event_id is not None:
+                if event_id in self._events:
+                    return
+                self._events[event_id] = current
+            entry = self._accounts.get(account_id)
+            if entry is None:
+                entry = self._accounts[account_id] = [[-1] * self.size, [0] * self.size, current]
+            else:
+                self._accounts.move_to_end(account_id)
+
+            ids, counts = entry[0], entry[1]
+            if ids[slot] != current:
+                ids[slot] = current
+                counts[slot] = 0
+            counts[slot] += count
+            entry[2] = max(entry[2], current)
+            self._evict(current)
+
+    def count(self, account_id, timestamp):
+        """Transfers recorded for account_id in the window ending at timestamp"""
+        current = self.bucket(timestamp)
+        with self._lock:
+            entry = self._accounts.get(account_id)
+            if entry is None:
+                return 0
+            oldest = current - self.size
+            return sum(c for b, c in zip(entry[0], entry[1]) if oldest < b <= current)
+
+    def reset(self, account_id):
+        """Forget everything recorded for account_id"""
+        with self._lock:
+            self._accounts.pop(account_id, None)
+
+    def seed(self, rows):
+        """Replace all state from (event_id, account_id, timestamp) rows"""
+        with self._lock:
+            self._accounts.clear()
+            self._events.clear()
+        for event_id, account_id, timestamp in sorted(rows, key=lambda row: row[2]):
+            self.record(account_id, timestamp, event_id=event_id)
+
+    def _evict(self, current):
+        """Drop least recently used accounts that are idle or over capacity, and expired events"""
+        while self._events and next(iter(self._events.values())) <= current - self.size:
+            self._events.popitem(last=False)
+        while self._accounts:
+            account_id, entry = next(iter(self._accounts.items()))
+            if len(self._accounts) <= self.max_accounts and entry[2] > current - self.size:
+                break
+            del self._accounts[account_id]
+
+
+class SharedVelocityTracker(VelocityTracker):
+    """Bucketed sliding window stored in a SQLite file shared across processes"""
+
+    # Purge expired buckets once every this many records
+    PURGE_EVERY = 1000
+
+    def __init__(self, path, window=timedelta(minutes=5), bucket_seconds=10):
+        super().__init__(window=window, bucket_seconds=bucket_seconds)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS velocity ("
+            "account_id TEXT NOT NULL, bucket INTEGER NOT NULL, count INTEGER NOT NULL, "
+            "PRIMARY KEY (account_id, bucket)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS velocity_events ("
+            "event_id TEXT PRIMARY KEY, bucket INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_velocity_events_bucket ON velocity_events (bucket)")
+        self._records = 0
+
+    def record(self, account_id, timestamp, count=1, event_id=None):
+        current = self.bucket(timestamp)
+        with self._lock:
+            if event_id is None:
+                self._add(str(account_id), current, count)
+            else:
+                self._transaction(lambda: self._add_event(str(event_id), str(account_id), current, count))
+            self._records += 1
+            if self._records % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM velocity WHERE bucket <= ?", (current - self.size,))
+                self._conn.execute("DELETE FROM velocity_events WHERE bucket <= ?", (current - self.size,))
+
+    def count(self, account_id, timestamp):
+        current = self.bucket(timestamp)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM velocity "
+                "WHERE account_id = ? AND bucket > ? AND bucket <= ?",
+                (str(account_id), current - self.size, current)
+            ).fetchone()
+        return row[0]
+
+    def reset(self, account_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM velocity WHERE account_id = ?", (str(account_id),))
+
+    def seed(self, rows):
+        """
+        Record (event_id, account_id, timestamp) rows not counted yet. Nothing is
+        cleared: other workers and the login throttle keep their windows in the
+        same file, and events already counted are skipped.
+        """
+        def add_all():
+            for event_id, account_id, timestamp in rows:
+                self._add_event(str(event_id), str(account_id), self.bucket(timestamp), 1)
+
+        with self._lock:
+            self._transaction(add_all)
+
+    def _add(self, account_id, bucket, count):
+        self._conn.execute(
+            "INSERT INTO velocity (account_id, bucket, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (account_id, bucket) DO UPDATE SET count = count + excluded.count",
+            (account_id, bucket, count)
+        )
+
+    def _add_event(self, event_id, account_id, bucket, count):
+        """Count an event unless it was already counted"""
+        claimed = self._conn.execute(
+            "INSERT OR IGNORE INTO velocity_events (event_id, bucket) VALUES (?, ?)", (event_id, bucket)
+        ).rowcount
+        if claimed:
+            self._add(account_id, bucket, count)
+
+    def _transaction(self, work):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            work()
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+
+def create_tracker(config, window):
+    """Build the velocity tracker selected by VELOCITY_BACKEND"""
+    if config.get('VELOCITY_BACKEND') == 'sqlite':
+        return SharedVelocityTracker(
+            config['VELOCITY_STORE_PATH'],
+            window=window,
+            bucket_seconds=config['VELOCITY_BUCKET_SECONDS']
+        )
+    return VelocityTracker(window=window, bucket_seconds=config['VELOCITY_BUCKET_SECONDS'])